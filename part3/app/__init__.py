@@ -4,7 +4,9 @@ Flask application factory for the HBnB application.
 from flask import Flask
 from flask_restx import Api
 from flask_jwt_extended import JWTManager
-from flask_bcrypt import Bcrypt
+from app.compression import init_compression
+from app.metrics import init_metrics
+from app.models.password_hashing import PasswordHashingBusy, bcrypt, password_pool
 from app.api.v1.users import api as users_ns
 from app.api.v1.amenities import api as amenities_ns
 from app.api.v1.places import api as places_ns
@@ -30,7 +32,34 @@ def create_app(config_name='development'):
 
     # Initialize extensions
     jwt = JWTManager(app)
-    bcrypt = Bcrypt(app)
+    bcrypt.init_app(app)
+    password_pool.configure(
+        app.config['PASSWORD_HASH_WORKERS'],
+        app.config['PASSWORD_HASH_MAX_PENDING']
+    )
+
+    # Request metrics, exposed at /metrics
+    init_metrics(app)
+
+    # Response compression (registered after the metrics so that request
+    # latencies include it)
+    init_compression(app)
+
+    if app.config['SQL_QUERY_COUNTER']:
+        from app.persistence.query_counter import init_query_counter
+        init_query_counter(app)
+
+    # Size the shared facade's serialization cache
+    from app.services import facade
+    facade.serialization_cache.maxsize = app.config['SERIALIZATION_CACHE_SIZE']
+
+    # Restore and journal the in-memory repositories, if configured
+    from app.persistence.durability import init_durability
+    init_durability(app)
+
+    # Cache the facade's lookups by ID, if configured
+    from app.persistence.caching_repository import init_repository_cache
+    init_repository_cache(app)
 
     # Initialize Flask-RESTX API
     api = Api(
@@ -41,6 +70,11 @@ def create_app(config_name='development'):
         doc='/api/v1/docs'
     )
 
+    @api.errorhandler(PasswordHashingBusy)
+    def handle_password_hashing_busy(error):
+        """Reject requests quickly while the bcrypt pool is saturated."""
+        return {'message': str(error)}, 503, {'Retry-After': '1'}
+
     # Register namespaces
     api.add_namespace(auth_ns, path='/api/v1/auth')
     api.add_namespace(users_ns, path='/api/v1/users')
@@ -3,6 +3,10 @@ Amenity API endpoints for the HBnB application.
 """
 from flask_restx import Namespace, Resource, fields
 from app.services import facade
+from app.api.v1.encoding import marshal_list_with
+from app.api.v1.batch import batch_models, batch_parser, create_batch
+from app.api.v1.conditional import conditional, entity_headers
+from app.api.v1.pagination import pagination_parser, paginate
 
 api = Namespace('amenities', description='Amenity operations')
 
@@ -11,6 +15,9 @@ amenity_model = api.model('Amenity', {
     'name': fields.String(required=True, description='Name of the amenity', min_length=1, max_length=50)
 })
 
+# Outcome of a batch creation, per item
+batch_model = batch_models(api)
+
 # Define the output model
 amenity_output_model = api.model('AmenityOutput', {
     'id': fields.String(description='Amenity ID'),
@@ -25,11 +32,12 @@ class AmenityList(Resource):
     """Resource for handling amenity collection operations."""
 
     @api.doc('list_amenities')
-    @api.marshal_list_with(amenity_output_model)
+    @api.expect(pagination_parser)
+    @conditional
+    @marshal_list_with(api, amenity_output_model)
     def get(self):
-        """Retrieve a list of all amenities."""
-        amenities = facade.get_all_amenities()
-        return [amenity.to_dict() for amenity in amenities], 200
+        """Retrieve a page of amenities, oldest first."""
+        return paginate(api, facade.get_amenities_page, facade.serialize)
 
     @api.doc('create_amenity')
     @api.expect(amenity_model, validate=True)
@@ -39,26 +47,47 @@ class AmenityList(Resource):
         try:
             amenity_data = api.payload
             amenity = facade.create_amenity(amenity_data)
-            return amenity.to_dict(), 201
+            return facade.serialize(amenity), 201
         except ValueError as e:
             api.abort(400, str(e))
         except Exception as e:
             api.abort(500, f"An error occurred: {str(e)}")
 
 
+@api.route('/batch')
+class AmenityBatch(Resource):
+    """Resource for creating amenities in bulk."""
+
+    @api.doc('create_amenities_batch', body=[amenity_model])
+    @api.expect(batch_parser)
+    @api.response(201, 'Every amenity was created', batch_model)
+    @api.response(207, 'Some amenities were created', batch_model)
+    @api.response(400, 'No amenity was created', batch_model)
+    def post(self):
+        """
+        Create amenities from a JSON array or NDJSON (application/x-ndjson).
+
+        Each item is validated on its own; the response reports the outcome
+        of every item.
+        """
+        return create_batch(api, amenity_model, facade.create_amenities)
+
+
 @api.route('/<amenity_id>')
 @api.param('amenity_id', 'The amenity identifier')
 class AmenityResource(Resource):
     """Resource for handling individual amenity operations."""
 
     @api.doc('get_amenity')
+    @conditional
     @api.marshal_with(amenity_output_model)
     def get(self, amenity_id):
         """Retrieve an amenity by ID."""
         amenity = facade.get_amenity(amenity_id)
         if not amenity:
             api.abort(404, "Amenity not found")
-        return amenity.to_dict(), 200
+        headers = entity_headers(amenity)
+        return facade.serialize(amenity), 200, headers
 
     @api.doc('update_amenity')
     @api.expect(amenity_model, validate=True)
@@ -70,7 +99,7 @@ class AmenityResource(Resource):
             amenity = facade.update_amenity(amenity_id, amenity_data)
             if not amenity:
                 api.abort(404, "Amenity not found")
-            return amenity.to_dict(), 200
+            return facade.serialize(amenity), 200
         except ValueError as e:
             api.abort(400, str(e))
         except Exception as e:
@@ -0,0 +1,120 @@
+"""
+Batch creation helpers shared by the collection endpoints.
+
+Batch endpoints accept a JSON array of items, or NDJSON (one JSON item per
+line, sent as ``application/x-ndjson``). Each item is validated on its own
+against the endpoint's input model and the response reports the outcome of
+every item, so one bad record does not reject the others (unless the client
+asks for an atomic batch).
+"""
+import json
+
+from flask import current_app, request
+from flask_restx import fields, inputs, reqparse
+from jsonschema import Draft4Validator
+
+from app.api.v1.encoding import NDJSON
+
+# Query parameters accepted by every batch endpoint
+batch_parser = reqparse.RequestParser()
+batch_parser.add_argument('atomic', type=inputs.boolean, location='args', default=False,
+                          help='Create nothing unless every item is valid')
+
+
+def batch_models(api):
+    """
+    Register the batch response models on a namespace.
+
+    Returns:
+        Model: The batch response model
+    """
+    result_model = api.model('BatchItemResult', {
+        'index': fields.Integer(description='Position of the item in the batch'),
+        'status': fields.Integer(description='201 if the item was created, 400 otherwise'),
+        'id': fields.String(description='ID of the created entity'),
+        'message': fields.String(description='Why the item was not created'),
+        'errors': fields.Raw(description='Validation errors by field')
+    })
+    return api.model('BatchResult', {
+        'created': fields.Integer(description='Number of entities created'),
+        'failed': fields.Integer(description='Number of items not created'),
+        'items': fields.List(fields.Nested(result_model, skip_none=True), description='Outcome per item')
+    })
+
+
+def _read_items(api):
+    """
+    Parse the request body into items.
+
+    Returns:
+        list: ``(item, None)`` per item, or ``(None, error message)`` for
+        NDJSON lines that are not valid JSON
+    """
+    if request.mimetype == NDJSON:
+        items = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append((json.loads(line), None))
+            except ValueError:
+                items.append((None, "Invalid JSON"))
+        return items
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, list):
+        api.abort(400, "Request body must be a JSON array or NDJSON")
+    return [(item, None) for item in payload]
+
+
+def create_batch(api, model, create, max_items=None):
+    """
+    Validate and create the items of a batch request.
+
+    Args:
+        api (Namespace): The namespace handling the request
+        model (Model): Input model each item is validated against
+        create (callable): Facade batch method taking ``(items,
+            chunk_size, atomic)`` and returning ``(entity, None)`` or
+            ``(None, error message)`` per item
+        max_items (int): Maximum number of items; BATCH_MAX_ITEMS when None
+
+    Returns:
+        tuple: ``(result, status)``; the status is 201 if every item was
+        created, 207 if some were and 400 if none was
+    """
+    atomic = batch_parser.parse_args()['atomic']
+    raw = _read_items(api)
+    if not raw:
+        api.abort(400, "Batch is empty")
+    if max_items is None:
+        max_items = current_app.config.get('BATCH_MAX_ITEMS', 10000)
+    if len(raw) > max_items:
+        api.abort(413, f"Batches are limited to {max_items} items")
+
+    validator = Draft4Validator(model.__schema__)
+    outcomes = [None] * len(raw)  # index -> result of the item
+    valid = []  # (index, item) of the items passing validation
+    for index, (item, error) in enumerate(raw):
+        if error is None:
+            errors = dict(model.format_error(e) for e in validator.iter_errors(item))
+            if errors:
+                outcomes[index] = {'index': index, 'status': 400, 'message': "Input payload validation failed",
+                                   'errors': errors}
+                continue
+            valid.append((index, item))
+        else:
+            outcomes[index] = {'index': index, 'status': 400, 'message': error}
+
+    if atomic and len(valid) < len(raw):
+        created = [(None, "Not created: another item of the batch failed")] * len(valid)
+    else:
+        created = create([item for _, item in valid], current_app.config.get('BATCH_CHUNK_SIZE', 0), atomic)
+    for (index, _), (entity, error) in zip(valid, created):
+        outcomes[index] = (
+            {'index': index, 'status': 201, 'id': entity.id} if entity is not None
+            else {'index': index, 'status': 400, 'message': error}
+        )
+
+    count = sum(1 for outcome in outcomes if outcome['status'] == 201)
+    status = 201 if count == len(outcomes) else 207 if count else 400
+    return {'created': count, 'failed': len(outcomes) - count, 'items': outcomes}, status
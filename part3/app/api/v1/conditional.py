@@ -0,0 +1,168 @@
+"""
+Conditional GET support shared by the resource endpoints.
+
+GET responses carry a strong ``ETag`` and, for single entities, a
+``Last-Modified`` date. A request whose ``If-None-Match`` (or, without it,
+``If-Modified-Since``) shows the client already holds the current
+representation gets an empty 304 instead, decided before anything is
+serialized or marshalled. Otherwise, a compressed response cached for the
+same representation (see ``app.compression``) is sent, still without
+serializing anything.
+
+Entity version stamps are strictly increasing microsecond timestamps (see
+``app.models.entity``), so an entity's ``serial_version`` both identifies
+its representation and dates its last change, nested entities included.
+A page of a collection is identified by the IDs and versions of its items
+and its next cursor; pages get no ``Last-Modified`` date, since removing
+an item changes a page without making it any newer.
+"""
+import hashlib
+import time
+import zlib
+from functools import wraps
+
+from flask import Response, current_app, request
+from werkzeug.http import http_date, quote_etag
+
+from app.compression import ETAG_SUFFIXES, cached_response
+
+US_PER_SECOND = 1000000
+
+_SUFFIXES = ('',) + tuple(ETAG_SUFFIXES.values())
+
+
+class NotModified(Exception):
+    """
+    Raised by an endpoint once it knows the client's copy is current.
+    """
+
+    def __init__(self, headers):
+        """
+        Initialize the exception.
+
+        Args:
+            headers (dict): Validator headers to send with the 304
+        """
+        super().__init__("Not modified")
+        self.headers = headers
+
+
+class Cached(Exception):
+    """
+    Raised by an endpoint once it knows a cached response answers the request.
+    """
+
+    def __init__(self, response):
+        """
+        Initialize the exception.
+
+        Args:
+            response (Response): The cached response to send
+        """
+        super().__init__("Cached")
+        self.response = response
+
+
+def conditional(func):
+    """
+    Turn NotModified raised by an endpoint into an empty 304 response, and
+    Cached into its cached response.
+
+    Apply it above the marshalling decorator, so that nothing is
+    marshalled for either.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except NotModified as e:
+            return Response(status=304, headers=e.headers)
+        except Cached as e:
+            return e.response
+    return wrapper
+
+
+def _validate(token, version=None):
+    """
+    Build the validator headers of a response and check the request's
+    preconditions against them.
+
+    Args:
+        token (str): Identifies the representation
+        version (int): Version stamp dating the representation, if any
+
+    Returns:
+        dict: ``ETag`` (and ``Last-Modified``) headers for the response
+
+    Raises:
+        NotModified: If the client's copy is current
+        Cached: If a cached response holds the representation
+    """
+    # The field mask header selects the fields sent, so it is part of the
+    # representation too
+    mask = request.headers.get(current_app.config['RESTX_MASK_HEADER'])
+    etag = f'{token}.{zlib.crc32(mask.encode()):x}' if mask else token
+    headers = {'ETag': quote_etag(etag)}
+
+    modified = None
+    if version is not None:
+        modified = version // US_PER_SECOND
+        # HTTP dates count whole seconds: a date within the current second
+        # would still match after a later change in that same second
+        if modified < int(time.time()):
+            headers['Last-Modified'] = http_date(modified)
+        else:
+            modified = None
+
+    if request.if_none_match:
+        # Compressed responses carry the tag with their encoding appended
+        fresh = any(request.if_none_match.contains_weak(etag + suffix) for suffix in _SUFFIXES)
+    else:
+        since = request.if_modified_since
+        fresh = modified is not None and since is not None and modified <= since.timestamp()
+    if fresh:
+        raise NotModified(headers)
+    response = cached_response(etag)
+    if response is not None:
+        raise Cached(response)
+    return headers
+
+
+def entity_headers(entity):
+    """
+    Check the preconditions of a request for one entity.
+
+    Args:
+        entity: A User, Place, Review or Amenity
+
+    Returns:
+        dict: Validator headers for the 200 response
+
+    Raises:
+        NotModified: If the client's copy is current
+        Cached: If a cached response holds the representation
+    """
+    version = entity.serial_version
+    return _validate(f'{version:x}', version)
+
+
+def collection_headers(entities, next_cursor=None):
+    """
+    Check the preconditions of a request for a page of entities.
+
+    Args:
+        entities (list): The entities of the page, in order
+        next_cursor (str): Cursor of the next page, if any
+
+    Returns:
+        dict: Validator headers for the 200 response
+
+    Raises:
+        NotModified: If the client's copy is current
+        Cached: If a cached response holds the representation
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for entity in entities:
+        digest.update(f'{entity.id}:{entity.serial_version:x};'.encode())
+    digest.update((next_cursor or '').encode())
+    return _validate(digest.hexdigest())
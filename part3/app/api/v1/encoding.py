@@ -0,0 +1,213 @@
+"""
+Fast JSON encoding for list endpoints.
+
+Each Flask-RESTX model is compiled once into a projection function that
+copies exactly the documented fields, then the whole list is encoded in a
+single call (orjson when installed, the standard library otherwise). This
+replaces flask_restx's per-field ``marshal`` walk and its JSON encoder.
+
+The path is opt-in through the FAST_JSON configuration flag; the Swagger
+documentation is produced by the regular ``marshal_list_with`` either way.
+
+Clients sending ``Accept: application/x-ndjson`` get list responses as
+NDJSON instead: one JSON object per line, streamed chunk by chunk as the
+endpoint produces them.
+"""
+import json
+from functools import wraps
+
+from flask import Response, current_app, request, stream_with_context
+from flask_restx import fields, marshal
+from flask_restx.mask import apply as apply_mask
+from flask_restx.utils import unpack
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+NDJSON = 'application/x-ndjson'
+
+
+def _dumps(data):
+    """Encode data as compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _scalar(cast):
+    """Build a converter applying ``cast`` to non-null values."""
+    def convert(value):
+        return None if value is None else cast(value)
+    return convert
+
+
+def _string(value):
+    """Convert a value the way fields.String does."""
+    if value is None or type(value) is str:
+        return value
+    return str(value)
+
+
+def _identity(value):
+    """Return a value unchanged (fields.Raw)."""
+    return value
+
+
+def _compile_field(field):
+    """
+    Build the converter for one model field.
+
+    Args:
+        field: A flask_restx field class or instance
+
+    Returns:
+        callable: Converts a raw attribute value to its JSON-ready form
+    """
+    if isinstance(field, type):
+        field = field()
+    if isinstance(field, fields.Nested):
+        project = compile_model(field.nested)
+        allow_null = field.allow_null
+
+        def convert(value):
+            if value is None:
+                return None if allow_null else project({})
+            return project(value)
+        return convert
+    if isinstance(field, fields.List):
+        item = _compile_field(field.container)
+
+        def convert(value):
+            return None if value is None else [item(element) for element in value]
+        return convert
+    if isinstance(field, fields.String):
+        return _string
+    if isinstance(field, fields.Float):
+        return _scalar(float)
+    if isinstance(field, fields.Integer):
+        return _scalar(int)
+    if isinstance(field, fields.Boolean):
+        return _scalar(bool)
+    return _identity
+
+
+def compile_model(model):
+    """
+    Compile a Flask-RESTX model into a projection function.
+
+    The projection takes a dict (as returned by ``to_dict()``) and returns a
+    new dict holding only the model's fields, converted like ``marshal``
+    would. Compiled projections are memoized on the model.
+
+    Args:
+        model: A flask_restx Model
+
+    Returns:
+        callable: The projection function
+    """
+    project = getattr(model, '_fast_projection', None)
+    if project is not None:
+        return project
+
+    plan = [
+        (name, getattr(field, 'attribute', None) or name, _compile_field(field))
+        for name, field in getattr(model, 'resolved', model).items()
+    ]
+
+    def project(data):
+        get = data.get
+        return {name: convert(get(key)) for name, key, convert in plan}
+
+    model._fast_projection = project
+    return project
+
+
+def encode_list(model, items):
+    """
+    Encode a list of dicts as JSON bytes according to a model.
+
+    Args:
+        model: The flask_restx Model describing each item
+        items (list): Item dictionaries
+
+    Returns:
+        bytes: The encoded JSON array
+    """
+    project = compile_model(model)
+    return _dumps([project(item) for item in items])
+
+
+def wants_ndjson():
+    """Return whether the client asked for an NDJSON response."""
+    return request.accept_mimetypes.best_match(('application/json', NDJSON)) == NDJSON
+
+
+def encode_ndjson(model, chunks, mask=None):
+    """
+    Encode chunks of dicts as NDJSON according to a model.
+
+    The mask is applied before the first chunk is encoded, so an invalid
+    one is reported before anything is sent.
+
+    Args:
+        model: The flask_restx Model describing each item
+        chunks (iterable): Lists of item dictionaries
+        mask (str): Field mask selecting the fields sent, if any
+
+    Returns:
+        iterator: One bytes block of NDJSON lines per non-empty chunk
+    """
+    if mask:
+        masked = apply_mask(getattr(model, 'resolved', model), mask, skip=True)
+
+        def project(item):
+            return marshal(item, masked)
+    else:
+        project = compile_model(model)
+
+    def encode():
+        for chunk in chunks:
+            if chunk:
+                yield b'\n'.join(_dumps(project(item)) for item in chunk) + b'\n'
+    return encode()
+
+
+def marshal_list_with(api, model):
+    """
+    Drop-in replacement for ``api.marshal_list_with`` with a fast path.
+
+    The endpoint is documented and, by default, marshalled exactly like
+    ``api.marshal_list_with(model)``. When FAST_JSON is enabled the result
+    is encoded directly with encode_list instead (unless the client asks
+    for a field mask, which only ``marshal`` supports).
+
+    When the client accepts NDJSON, the result is streamed with
+    encode_ndjson. Endpoints may then return an iterable of chunks (lists
+    of dicts) instead of a list, which is sent as a single chunk.
+
+    Args:
+        api (Namespace): The namespace the endpoint belongs to
+        model: The flask_restx Model describing each item
+    """
+    def decorator(func):
+        marshalled = api.marshal_list_with(model)(func)
+
+        @wraps(marshalled)
+        def wrapper(*args, **kwargs):
+            mask = request.headers.get(current_app.config['RESTX_MASK_HEADER'])
+            if wants_ndjson():
+                data, code, headers = unpack(func(*args, **kwargs))
+                chunks = [data] if isinstance(data, list) else data
+                response = Response(stream_with_context(encode_ndjson(model, chunks, mask)), status=code,
+                                    headers=headers, mimetype=NDJSON)
+                response.vary.add('Accept')
+                return response
+            if not current_app.config.get('FAST_JSON') or mask:
+                return marshalled(*args, **kwargs)
+            data, code, headers = unpack(func(*args, **kwargs))
+            return Response(encode_list(model, data), status=code, headers=headers,
+                            mimetype='application/json')
+        return wrapper
+    return decorator
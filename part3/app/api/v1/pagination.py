@@ -0,0 +1,104 @@
+"""
+Keyset pagination helpers shared by the collection endpoints.
+"""
+from itertools import chain
+from urllib.parse import urlencode
+
+from flask import current_app, request
+from flask_restx import reqparse
+
+from app.api.v1.conditional import collection_headers
+from app.api.v1.encoding import wants_ndjson
+from app.persistence.pagination import iterate_pages
+
+# Query parameters accepted by every paginated collection endpoint
+pagination_parser = reqparse.RequestParser()
+pagination_parser.add_argument('limit', type=int, location='args',
+                               help='Maximum number of items to return')
+pagination_parser.add_argument('after', type=str, location='args',
+                               help='Cursor returned in X-Next-Cursor by the previous page')
+
+
+def resolve_limit(api, limit):
+    """
+    Apply the configured default and maximum to a requested page size.
+
+    Args:
+        api (Namespace): The namespace handling the request
+        limit (int): The requested size, or None for the default
+
+    Returns:
+        int: The page size to use
+    """
+    if limit is None:
+        limit = current_app.config.get('PAGE_SIZE_DEFAULT', 100)
+    if limit < 1:
+        api.abort(400, "limit must be a positive integer")
+    return min(limit, current_app.config.get('PAGE_SIZE_MAX', 1000))
+
+
+def export(api, fetch_page, serialize, after=None):
+    """
+    Stream a whole collection, from a cursor on, in chunks.
+
+    The first chunk is fetched right away, so that a malformed cursor is
+    reported before the response starts; the others are fetched as the
+    response is sent, one at a time. Their representations are not kept in
+    the serialization cache, which an export would otherwise flush.
+
+    Args:
+        api (Namespace): The namespace handling the request
+        fetch_page (callable): Facade method taking ``(limit, after)``
+        serialize (callable): Converts one entity to a dict, without
+            caching it when called with ``store=False``
+        after (str): Cursor to resume after, or None to start at the beginning
+
+    Returns:
+        iterator: Lists of item dicts, NDJSON_CHUNK_SIZE items at most
+    """
+    pages = iterate_pages(fetch_page, current_app.config.get('NDJSON_CHUNK_SIZE', 500), after)
+    try:
+        first = next(pages, [])
+    except ValueError as e:
+        api.abort(400, str(e))
+    return ([serialize(obj, store=False) for obj in page] for page in chain([first], pages))
+
+
+def paginate(api, fetch_page, serialize):
+    """
+    Fetch and serialize one page of a collection.
+
+    Clients accepting NDJSON get the whole collection streamed instead
+    (see export); ``limit`` is ignored then.
+
+    Args:
+        api (Namespace): The namespace handling the request
+        fetch_page (callable): Facade method taking ``(limit, after)``
+        serialize (callable): Converts one entity to a dict
+
+    Returns:
+        tuple: ``(items, status, headers)``; the next page cursor is sent in
+        the ``X-Next-Cursor`` and ``Link`` headers
+
+    Raises:
+        NotModified: If the client's copy of the page is current
+        Cached: If a cached response holds the page
+    """
+    args = pagination_parser.parse_args()
+    if wants_ndjson():
+        return export(api, fetch_page, serialize, args.get('after')), 200
+    limit = resolve_limit(api, args.get('limit'))
+
+    try:
+        objects, next_cursor = fetch_page(limit, args.get('after'))
+    except ValueError as e:
+        api.abort(400, str(e))
+
+    headers = collection_headers(objects, next_cursor)
+    headers['Vary'] = 'Accept'
+    if next_cursor:
+        headers['X-Next-Cursor'] = next_cursor
+        # Keep the request's other parameters (e.g. filters) in the next link
+        query = dict(request.args.lists(), limit=[limit], after=[next_cursor])
+        headers['Link'] = f'<{request.base_url}?{urlencode(query, doseq=True)}>; rel="next"'
+    return [serialize(obj) for obj in objects], 200, headers
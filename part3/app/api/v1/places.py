@@ -1,8 +1,16 @@
 """
 Place API endpoints for the HBnB application.
 """
-from flask_restx import Namespace, Resource, fields
+from functools import partial
+
+from flask import current_app
+from flask_restx import Namespace, Resource, fields, reqparse
 from app.services import facade
+from app.api.v1.encoding import marshal_list_with, wants_ndjson
+from app.api.v1.batch import batch_models, batch_parser, create_batch
+from app.api.v1.conditional import collection_headers, conditional, entity_headers
+from app.api.v1.pagination import pagination_parser, paginate, resolve_limit
+from app.persistence.text import tokenize
 
 api = Namespace('places', description='Place operations')
 
@@ -31,6 +39,9 @@ place_model = api.model('Place', {
     'amenities': fields.List(fields.String, description='List of amenity IDs')
 })
 
+# Outcome of a batch creation, per item
+batch_model = batch_models(api)
+
 # Define the review model for nested representation
 review_simple_model = api.model('ReviewSimple', {
     'id': fields.String(description='Review ID'),
@@ -50,21 +61,138 @@ place_output_model = api.model('PlaceOutput', {
     'owner_id': fields.String(description='Owner ID'),
     'owner': fields.Nested(owner_model, description='Owner details'),
     'amenities': fields.List(fields.Nested(amenity_simple_model), description='List of amenities'),
+    'review_count': fields.Integer(description='Number of reviews'),
+    'rating_sum': fields.Integer(description='Sum of all review ratings'),
+    'average_rating': fields.Float(description='Average review rating, null without reviews'),
+    'rating_histogram': fields.List(fields.Integer, description='Number of 1 to 5 star ratings'),
     'created_at': fields.String(description='Creation timestamp'),
     'updated_at': fields.String(description='Last update timestamp')
 })
 
+# Define the search result model (place plus distance from the search point
+# or relevance to the text query)
+place_search_model = api.inherit('PlaceSearchResult', place_output_model, {
+    'distance_km': fields.Float(description='Distance from the search point in kilometers'),
+    'score': fields.Float(description='Relevance to the text query, higher is better')
+})
+
+# Number of places per amenity, for the places matching the filters
+amenity_facet_model = api.model('AmenityFacet', {
+    'id': fields.String(description='Amenity ID'),
+    'name': fields.String(description='Name of the amenity'),
+    'count': fields.Integer(description='Number of matching places with this amenity')
+})
+
+# Number of places per price bucket, for the places matching the filters
+price_bucket_model = api.model('PriceBucket', {
+    'min': fields.Float(description='Lowest price of the bucket'),
+    'max': fields.Float(description='Price the bucket ends before, null for the last bucket'),
+    'count': fields.Integer(description='Number of matching places in the bucket')
+})
+
+place_facets_model = api.model('PlaceFacets', {
+    'count': fields.Integer(description='Number of matching places'),
+    'amenities': fields.List(fields.Nested(amenity_facet_model),
+                             description='Amenities of the matching places, most common first'),
+    'price': fields.List(fields.Nested(price_bucket_model),
+                         description='Price histogram of the matching places')
+})
+
+# Amenity and price filters accepted by the listing, search and facets endpoints
+place_filter_parser = reqparse.RequestParser()
+place_filter_parser.add_argument('amenities', type=str, location='args',
+                                 help='Comma-separated IDs of amenities the places must all have')
+place_filter_parser.add_argument('any_amenities', type=str, location='args',
+                                 help='Comma-separated IDs of amenities the places must have one of')
+place_filter_parser.add_argument('exclude_amenities', type=str, location='args',
+                                 help='Comma-separated IDs of amenities the places must not have')
+place_filter_parser.add_argument('min_price', type=float, location='args', help='Lowest price per night')
+place_filter_parser.add_argument('max_price', type=float, location='args', help='Highest price per night')
+
+# Query parameters of the listing endpoint, besides pagination
+place_list_parser = place_filter_parser.copy()
+place_list_parser.add_argument('sort', type=str, location='args', default='created_at',
+                               choices=('created_at', 'price', '-price'),
+                               help='Order of the places: oldest, cheapest or most expensive first')
+
+# Query parameters of the search endpoint
+search_parser = place_filter_parser.copy()
+search_parser.add_argument('q', type=str, location='args',
+                           help='Full-text query over titles, descriptions and reviews')
+search_parser.add_argument('lat', type=float, location='args', help='Latitude of the search point')
+search_parser.add_argument('lon', type=float, location='args', help='Longitude of the search point')
+search_parser.add_argument('radius_km', type=float, location='args',
+                           help='Return places within this distance of lat/lon')
+search_parser.add_argument('k', type=int, location='args',
+                           help='Return the k places nearest to lat/lon')
+search_parser.add_argument('min_lat', type=float, location='args', help='Bounding box southern edge')
+search_parser.add_argument('min_lon', type=float, location='args', help='Bounding box western edge')
+search_parser.add_argument('max_lat', type=float, location='args', help='Bounding box northern edge')
+search_parser.add_argument('max_lon', type=float, location='args', help='Bounding box eastern edge')
+search_parser.add_argument('limit', type=int, location='args', help='Maximum number of places to return')
+
+
+def _check_coordinates(latitude, longitude):
+    """Abort with 400 unless a latitude/longitude pair is present and in range."""
+    if latitude is None or longitude is None:
+        api.abort(400, "lat and lon are required")
+    if not -90.0 <= latitude <= 90.0:
+        api.abort(400, "lat must be between -90.0 and 90.0")
+    if not -180.0 <= longitude <= 180.0:
+        api.abort(400, "lon must be between -180.0 and 180.0")
+
+
+def _check_price_range(args):
+    """Abort with 400 if min_price exceeds max_price."""
+    if None not in (args['min_price'], args['max_price']) and args['min_price'] > args['max_price']:
+        api.abort(400, "min_price must not exceed max_price")
+
+
+def _select_places(args, prices=True):
+    """
+    Select the places matching the filters of parsed request arguments.
+
+    Args:
+        args (dict): Arguments parsed by place_filter_parser or a copy of it
+        prices (bool): Apply min_price/max_price too; callers scanning the
+            price index apply the price range themselves
+
+    Returns:
+        Selection: The selected places, or None without filters
+    """
+    amenity_ids = [
+        [amenity_id.strip() for amenity_id in (args[name] or '').split(',') if amenity_id.strip()]
+        for name in ('amenities', 'any_amenities', 'exclude_amenities')
+    ]
+    if not prices:
+        return facade.select_places(*amenity_ids)
+    _check_price_range(args)
+    return facade.select_places(*amenity_ids, args['min_price'], args['max_price'])
+
 
 @api.route('/')
 class PlaceList(Resource):
     """Resource for handling place collection operations."""
 
     @api.doc('list_places')
-    @api.marshal_list_with(place_output_model)
+    @api.expect(pagination_parser, place_list_parser)
+    @conditional
+    @marshal_list_with(api, place_output_model)
     def get(self):
-        """Retrieve a list of all places."""
-        places = facade.get_all_places()
-        return [place.to_dict() for place in places], 200
+        """Retrieve a page of places, optionally filtered by amenities and price and sorted by price."""
+        args = place_list_parser.parse_args()
+        if args['sort'] == 'created_at':
+            fetch_page = partial(facade.get_places_page, selection=_select_places(args))
+        else:
+            _check_price_range(args)
+            fetch_page = partial(
+                facade.get_places_by_price,
+                min_price=args['min_price'],
+                max_price=args['max_price'],
+                descending=args['sort'] == '-price',
+                selection=_select_places(args, prices=False)
+            )
+        return paginate(api, fetch_page, facade.serialize)
 
     @api.doc('create_place')
     @api.expect(place_model, validate=True)
@@ -74,26 +202,129 @@ class PlaceList(Resource):
         try:
             place_data = api.payload
             place = facade.create_place(place_data)
-            return place.to_dict(), 201
+            return facade.serialize(place), 201
         except ValueError as e:
             api.abort(400, str(e))
         except Exception as e:
             api.abort(500, f"An error occurred: {str(e)}")
 
 
+@api.route('/batch')
+class PlaceBatch(Resource):
+    """Resource for creating places in bulk."""
+
+    @api.doc('create_places_batch', body=[place_model])
+    @api.expect(batch_parser)
+    @api.response(201, 'Every place was created', batch_model)
+    @api.response(207, 'Some places were created', batch_model)
+    @api.response(400, 'No place was created', batch_model)
+    def post(self):
+        """
+        Create places from a JSON array or NDJSON (application/x-ndjson).
+
+        Each item is validated on its own; the response reports the outcome
+        of every item.
+        """
+        return create_batch(api, place_model, facade.create_places)
+
+
+@api.route('/search')
+class PlaceSearch(Resource):
+    """Resource for searching places by location."""
+
+    @api.doc('search_places')
+    @api.expect(search_parser)
+    @marshal_list_with(api, place_search_model)
+    def get(self):
+        """
+        Search places by text or location.
+
+        Supports four modes: the places best matching the text query q
+        (most relevant first), within radius_km of lat/lon (nearest first),
+        the k places nearest to lat/lon, or inside the bounding box
+        min_lat/min_lon/max_lat/max_lon. Every mode can be restricted with
+        the amenity and price filters.
+        """
+        args = search_parser.parse_args()
+        limit = resolve_limit(api, args['limit'])
+        selection = _select_places(args)
+
+        if args['q'] is not None:
+            if not tokenize(args['q']):
+                api.abort(400, "q must contain at least one word")
+            return [
+                dict(facade.serialize(place), score=score)
+                for place, score in facade.search_places_text(args['q'], limit, selection)
+            ], 200
+
+        if args['radius_km'] is not None:
+            _check_coordinates(args['lat'], args['lon'])
+            if args['radius_km'] <= 0:
+                api.abort(400, "radius_km must be positive")
+            matches = facade.search_places_within_radius(args['lat'], args['lon'], args['radius_km'], selection)
+        elif args['k'] is not None:
+            _check_coordinates(args['lat'], args['lon'])
+            if args['k'] < 1:
+                api.abort(400, "k must be a positive integer")
+            matches = facade.get_nearest_places(args['lat'], args['lon'], min(args['k'], limit), selection)
+        else:
+            box = [args['min_lat'], args['min_lon'], args['max_lat'], args['max_lon']]
+            if None in box:
+                api.abort(400, "Provide lat/lon with radius_km or k, or a full bounding box")
+            _check_coordinates(box[0], box[1])
+            _check_coordinates(box[2], box[3])
+            if box[0] > box[2]:
+                api.abort(400, "min_lat must not exceed max_lat")
+            matches = [(place, None) for place in facade.search_places_in_box(*box, selection)]
+
+        return [
+            dict(facade.serialize(place), distance_km=distance)
+            for place, distance in matches[:limit]
+        ], 200
+
+
+@api.route('/facets')
+class PlaceFacets(Resource):
+    """Resource for counting places per amenity and price bucket."""
+
+    @api.doc('get_place_facets')
+    @api.expect(place_filter_parser)
+    @api.marshal_with(place_facets_model)
+    def get(self):
+        """Count the places matching the filters, in total, per amenity and per price bucket."""
+        args = place_filter_parser.parse_args()
+        facets = facade.get_place_facets(_select_places(args))
+        edges = list(current_app.config['PRICE_HISTOGRAM_EDGES'])
+        counts = facade.get_price_histogram(
+            edges, args['min_price'], args['max_price'], _select_places(args, prices=False))
+        return {
+            'count': facets['count'],
+            'amenities': [
+                {'id': amenity.id, 'name': amenity.name, 'count': count}
+                for amenity, count in facets['amenities']
+            ],
+            'price': [
+                {'min': edge, 'max': upper, 'count': count}
+                for edge, upper, count in zip(edges, edges[1:] + [None], counts)
+            ]
+        }, 200
+
+
 @api.route('/<place_id>')
 @api.param('place_id', 'The place identifier')
 class PlaceResource(Resource):
     """Resource for handling individual place operations."""
 
     @api.doc('get_place')
+    @conditional
     @api.marshal_with(place_output_model)
     def get(self, place_id):
         """Retrieve a place by ID."""
-        place = facade.get_place(place_id)
+        place = facade.get_place(place_id, profile='detail')
         if not place:
             api.abort(404, "Place not found")
-        return place.to_dict(), 200
+        headers = entity_headers(place)
+        return facade.serialize(place), 200, headers
 
     @api.doc('update_place')
     @api.expect(place_model, validate=True)
@@ -110,7 +341,7 @@ class PlaceResource(Resource):
             place = facade.update_place(place_id, place_data)
             if not place:
                 api.abort(404, "Place not found")
-            return place.to_dict(), 200
+            return facade.serialize(place), 200
         except ValueError as e:
             api.abort(400, str(e))
         except Exception as e:
@@ -123,7 +354,8 @@ class PlaceReviewList(Resource):
     """Resource for retrieving reviews for a specific place."""
 
     @api.doc('get_place_reviews')
-    @api.marshal_list_with(review_simple_model)
+    @conditional
+    @marshal_list_with(api, review_simple_model)
     def get(self, place_id):
         """Retrieve all reviews for a specific place."""
         place = facade.get_place(place_id)
@@ -131,4 +363,8 @@ class PlaceReviewList(Resource):
             api.abort(404, "Place not found")
 
         reviews = facade.get_reviews_by_place(place_id)
-        return [review.to_dict() for review in reviews], 200
+        if wants_ndjson():
+            return [facade.serialize(review) for review in reviews], 200
+        headers = collection_headers(reviews)
+        headers['Vary'] = 'Accept'
+        return [facade.serialize(review) for review in reviews], 200, headers
@@ -3,6 +3,10 @@ Review API endpoints for the HBnB application.
 """
 from flask_restx import Namespace, Resource, fields
 from app.services import facade
+from app.api.v1.encoding import marshal_list_with
+from app.api.v1.batch import batch_models, batch_parser, create_batch
+from app.api.v1.conditional import conditional, entity_headers
+from app.api.v1.pagination import pagination_parser, paginate
 
 api = Namespace('reviews', description='Review operations')
 
@@ -22,6 +26,9 @@ review_model = api.model('Review', {
     'user_id': fields.String(required=True, description='ID of the user')
 })
 
+# Outcome of a batch creation, per item
+batch_model = batch_models(api)
+
 # Define the output model with nested objects
 review_output_model = api.model('ReviewOutput', {
     'id': fields.String(description='Review ID'),
@@ -40,11 +47,12 @@ class ReviewList(Resource):
     """Resource for handling review collection operations."""
 
     @api.doc('list_reviews')
-    @api.marshal_list_with(review_output_model)
+    @api.expect(pagination_parser)
+    @conditional
+    @marshal_list_with(api, review_output_model)
     def get(self):
-        """Retrieve a list of all reviews."""
-        reviews = facade.get_all_reviews()
-        return [review.to_dict() for review in reviews], 200
+        """Retrieve a page of reviews, oldest first."""
+        return paginate(api, facade.get_reviews_page, facade.serialize)
 
     @api.doc('create_review')
     @api.expect(review_model, validate=True)
@@ -54,26 +62,47 @@ class ReviewList(Resource):
         try:
             review_data = api.payload
             review = facade.create_review(review_data)
-            return review.to_dict(), 201
+            return facade.serialize(review), 201
         except ValueError as e:
             api.abort(400, str(e))
         except Exception as e:
             api.abort(500, f"An error occurred: {str(e)}")
 
 
+@api.route('/batch')
+class ReviewBatch(Resource):
+    """Resource for creating reviews in bulk."""
+
+    @api.doc('create_reviews_batch', body=[review_model])
+    @api.expect(batch_parser)
+    @api.response(201, 'Every review was created', batch_model)
+    @api.response(207, 'Some reviews were created', batch_model)
+    @api.response(400, 'No review was created', batch_model)
+    def post(self):
+        """
+        Create reviews from a JSON array or NDJSON (application/x-ndjson).
+
+        Each item is validated on its own; the response reports the outcome
+        of every item.
+        """
+        return create_batch(api, review_model, facade.create_reviews)
+
+
 @api.route('/<review_id>')
 @api.param('review_id', 'The review identifier')
 class ReviewResource(Resource):
     """Resource for handling individual review operations."""
 
     @api.doc('get_review')
+    @conditional
     @api.marshal_with(review_output_model)
     def get(self, review_id):
         """Retrieve a review by ID."""
-        review = facade.get_review(review_id)
+        review = facade.get_review(review_id, profile='detail')
         if not review:
             api.abort(404, "Review not found")
-        return review.to_dict(), 200
+        headers = entity_headers(review)
+        return facade.serialize(review), 200, headers
 
     @api.doc('update_review')
     @api.expect(review_model, validate=True)
@@ -92,7 +121,7 @@ class ReviewResource(Resource):
             review = facade.update_review(review_id, review_data)
             if not review:
                 api.abort(404, "Review not found")
-            return review.to_dict(), 200
+            return facade.serialize(review), 200
         except ValueError as e:
             api.abort(400, str(e))
         except Exception as e:
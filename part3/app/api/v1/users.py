@@ -1,8 +1,14 @@
 """
 User API endpoints for the HBnB application.
 """
+from flask import current_app
 from flask_restx import Namespace, Resource, fields
 from app.services import facade
+from app.models.password_hashing import PasswordHashingBusy
+from app.api.v1.encoding import marshal_list_with
+from app.api.v1.batch import batch_models, batch_parser, create_batch
+from app.api.v1.conditional import conditional, entity_headers
+from app.api.v1.pagination import pagination_parser, paginate
 
 api = Namespace('users', description='User operations')
 
@@ -14,6 +20,9 @@ user_model = api.model('User', {
     'password': fields.String(required=True, description='Password of the user', min_length=6),
 })
 
+# Outcome of a batch creation, per item
+batch_model = batch_models(api)
+
 # Define the output model (excludes password)
 user_output_model = api.model('UserOutput', {
     'id': fields.String(description='User ID'),
@@ -31,11 +40,12 @@ class UserList(Resource):
     """Resource for handling user collection operations."""
 
     @api.doc('list_users')
-    @api.marshal_list_with(user_output_model)
+    @api.expect(pagination_parser)
+    @conditional
+    @marshal_list_with(api, user_output_model)
     def get(self):
-        """Retrieve a list of all users."""
-        users = facade.get_all_users()
-        return [user.to_dict() for user in users], 200
+        """Retrieve a page of users, oldest first."""
+        return paginate(api, facade.get_users_page, facade.serialize)
 
     @api.doc('create_user')
     @api.expect(user_model, validate=True)
@@ -45,26 +55,50 @@ class UserList(Resource):
         try:
             user_data = api.payload
             user = facade.create_user(user_data)
-            return user.to_dict(), 201
+            return facade.serialize(user), 201
         except ValueError as e:
             api.abort(400, str(e))
+        except PasswordHashingBusy:
+            raise
         except Exception as e:
             api.abort(500, f"An error occurred: {str(e)}")
 
 
+@api.route('/batch')
+class UserBatch(Resource):
+    """Resource for creating users in bulk."""
+
+    @api.doc('create_users_batch', body=[user_model])
+    @api.expect(batch_parser)
+    @api.response(201, 'Every user was created', batch_model)
+    @api.response(207, 'Some users were created', batch_model)
+    @api.response(400, 'No user was created', batch_model)
+    def post(self):
+        """
+        Create users from a JSON array or NDJSON (application/x-ndjson).
+
+        Each item is validated on its own; the response reports the outcome
+        of every item. Passwords are hashed on the shared bcrypt pool, so
+        batches hold at most BATCH_MAX_USERS users.
+        """
+        return create_batch(api, user_model, facade.create_users, current_app.config.get('BATCH_MAX_USERS', 100))
+
+
 @api.route('/<user_id>')
 @api.param('user_id', 'The user identifier')
 class UserResource(Resource):
     """Resource for handling individual user operations."""
 
     @api.doc('get_user')
+    @conditional
     @api.marshal_with(user_output_model)
     def get(self, user_id):
         """Retrieve a user by ID."""
         user = facade.get_user(user_id)
         if not user:
             api.abort(404, "User not found")
-        return user.to_dict(), 200
+        headers = entity_headers(user)
+        return facade.serialize(user), 200, headers
 
     @api.doc('update_user')
     @api.expect(user_model, validate=True)
@@ -76,8 +110,10 @@ class UserResource(Resource):
             user = facade.update_user(user_id, user_data)
             if not user:
                 api.abort(404, "User not found")
-            return user.to_dict(), 200
+            return facade.serialize(user), 200
         except ValueError as e:
             api.abort(400, str(e))
+        except PasswordHashingBusy:
+            raise
         except Exception as e:
             api.abort(500, f"An error occurred: {str(e)}")
@@ -0,0 +1,295 @@
+"""
+HTTP response compression for the HBnB application.
+
+Responses of compressible media types are compressed with the best
+encoding the client accepts: brotli when the ``brotli`` package is
+installed, gzip otherwise. Bodies under COMPRESSION_MIN_SIZE bytes are sent
+as they are, since compressing them saves less than it costs.
+
+- Bodies of COMPRESSION_STREAM_SIZE bytes and more, and streamed responses,
+  are compressed incrementally while being sent, so the client receives
+  the first bytes of a large listing before the last ones are compressed.
+- Compressed responses carrying an ``ETag`` are cached by URL, ETag and
+  encoding. Endpoints validated by ``app.api.v1.conditional`` know their
+  ETag before serializing anything, and send a cached response right
+  away (see cached_response): a hot listing is serialized and compressed
+  once per version of its content instead of once per request.
+- A compressed response is a different representation from the identity
+  one: its strong ETag gets the encoding appended (``"abc-gzip"``), which
+  ``app.api.v1.conditional`` accepts in ``If-None-Match``.
+"""
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import Response, current_app, request
+
+from app.metrics import registry
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+# Suffix appended to the ETag of a response in each encoding
+ETAG_SUFFIXES = {'br': '-br', 'gzip': '-gzip'}
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Headers describing the body, or the request, rather than the representation
+_UNCACHED_HEADERS = frozenset(('Content-Length', 'Set-Cookie'))
+
+compressed_bytes = registry.counter(
+    'hbnb_compression_bytes_total', 'Response bytes compressed (in) and produced (out), by encoding.',
+    ('encoding', 'stage'))
+compression_cache_lookups = registry.counter(
+    'hbnb_compression_cache_lookups_total', 'Lookups of compressed bodies in the compression cache.',
+    ('result',))
+
+
+def available_encodings():
+    """
+    Return the encodings this server can produce, preferred first.
+
+    Returns:
+        tuple: Content-Encoding tokens
+    """
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate(accept_encodings):
+    """
+    Pick the encoding of a response.
+
+    Args:
+        accept_encodings: The request's parsed Accept-Encoding header
+
+    Returns:
+        str: The accepted encoding of highest quality (ties go to the
+        preferred one), or None to send the body as is
+    """
+    best, best_quality = None, 0
+    for encoding in available_encodings():
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class _Compressor:
+    """
+    Incremental compressor with the same interface for every encoding.
+    """
+
+    def __init__(self, encoding, config):
+        """
+        Initialize the compressor.
+
+        Args:
+            encoding (str): 'br' or 'gzip'
+            config (dict): Application config holding the compression levels
+        """
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=config.get('COMPRESSION_BROTLI_QUALITY', 5))
+            self.compress = self._compressor.process
+            self.flush = self._compressor.flush
+            self.finish = self._compressor.finish
+        else:
+            # wbits 31: deflate in a gzip container
+            self._compressor = zlib.compressobj(config.get('COMPRESSION_GZIP_LEVEL', 6), zlib.DEFLATED, 31)
+            self.compress = self._compressor.compress
+            self.flush = lambda: self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self.finish = self._compressor.flush
+
+
+def compress(data, encoding, config):
+    """
+    Compress a whole body.
+
+    Args:
+        data (bytes): The body
+        encoding (str): 'br' or 'gzip'
+        config (dict): Application config holding the compression levels
+
+    Returns:
+        bytes: The compressed body
+    """
+    compressor = _Compressor(encoding, config)
+    return compressor.compress(data) + compressor.finish()
+
+
+def compress_stream(chunks, encoding, config, flush=False, done=None):
+    """
+    Compress a body chunk by chunk while it is being sent.
+
+    Args:
+        chunks (iterable): Chunks of the body (bytes or str)
+        encoding (str): 'br' or 'gzip'
+        config (dict): Application config holding the compression levels
+        flush (bool): Whether to flush the output after each chunk, so the
+            client can decode each chunk as soon as it arrives (for streamed
+            responses, at some cost in compression ratio)
+        done (callable): Called with the whole compressed body once the
+            last chunk is compressed
+
+    Yields:
+        bytes: Pieces of the compressed body
+    """
+    compressor = _Compressor(encoding, config)
+    pieces = [] if done is not None else None
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        piece = compressor.compress(chunk)
+        if flush:
+            piece += compressor.flush()
+        if piece:
+            if pieces is not None:
+                pieces.append(piece)
+            yield piece
+    piece = compressor.finish()
+    if pieces is not None:
+        pieces.append(piece)
+        done(b''.join(pieces))
+    yield piece
+
+
+class CompressionCache:
+    """
+    LRU cache of compressed responses (body and headers), bounded by the
+    total size of their bodies.
+    """
+
+    def __init__(self, max_bytes):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes (int): Maximum total size of the cached bodies;
+                0 disables caching
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()  # key -> (compressed body, headers)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Return the number of cached bodies."""
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the ``(body, headers)`` cached under a key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        compression_cache_lookups.inc('hit' if entry is not None else 'miss')
+        return entry
+
+    def set(self, key, body, headers=()):
+        """Cache a compressed response, evicting the least recently used ones."""
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous[0])
+            self._entries[key] = (body, headers)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        """Drop every cached body."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+def cached_response(etag):
+    """
+    Look up the compressed response to the current request.
+
+    Args:
+        etag (str): The (unquoted, strong) ETag of the representation the
+            request asks for
+
+    Returns:
+        Response: The cached response in the encoding negotiated for the
+        request, or None if there is none
+    """
+    cache = current_app.extensions.get('compression_cache')
+    if cache is None:
+        return None
+    encoding = negotiate(request.accept_encodings)
+    if encoding is None:
+        return None
+    entry = cache.get((request.full_path, etag, encoding))
+    if entry is None:
+        return None
+    body, headers = entry
+    return Response(body, headers=headers)
+
+
+def init_compression(app):
+    """
+    Compress the application's responses.
+
+    Does nothing unless COMPRESSION_ENABLED is set.
+
+    Args:
+        app (Flask): The application to configure
+    """
+    if not app.config.get('COMPRESSION_ENABLED'):
+        return
+    config = app.config
+    mimetypes = frozenset(config.get('COMPRESSION_MIMETYPES', ('application/json',)))
+    cache = app.extensions['compression_cache'] = CompressionCache(config.get('COMPRESSION_CACHE_BYTES', 0))
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough or 'Content-Encoding' in response.headers
+                or response.mimetype not in mimetypes):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        etag, weak = response.get_etag()
+        compressed = None
+        if response.is_streamed:
+            response.response = compress_stream(response.response, encoding, config, flush=True)
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < config.get('COMPRESSION_MIN_SIZE', 0):
+                return response
+            # Looked up by cached_response before the next request for the
+            # same representation is serialized
+            key = (request.full_path, etag, encoding) if etag and not weak else None
+
+            def compressed_body(data):
+                compressed_bytes.inc(encoding, 'in', amount=len(body))
+                compressed_bytes.inc(encoding, 'out', amount=len(data))
+                if key is not None:
+                    cache.set(key, data, headers)
+
+            if len(body) >= config.get('COMPRESSION_STREAM_SIZE', float('inf')):
+                chunks = (body[i:i + STREAM_CHUNK_SIZE] for i in range(0, len(body), STREAM_CHUNK_SIZE))
+                response.response = compress_stream(chunks, encoding, config, done=compressed_body)
+                response.headers.pop('Content-Length', None)
+            else:
+                compressed = compress(body, encoding, config)
+                response.set_data(compressed)
+
+        response.headers['Content-Encoding'] = encoding
+        if etag:
+            response.set_etag(etag + ETAG_SUFFIXES[encoding], weak)
+        # The headers of the final response, cached with its body
+        headers = [(name, value) for name, value in response.headers if name not in _UNCACHED_HEADERS]
+        if compressed is not None:
+            compressed_body(compressed)
+        return response
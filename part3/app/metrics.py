@@ -0,0 +1,274 @@
+"""
+Lightweight Prometheus-style instrumentation for the HBnB application.
+
+Records per-route request latency histograms, request counts by status and
+in-flight gauges, plus call timings of the facade and repositories, and
+renders them in the Prometheus text exposition format at ``/metrics``.
+
+Recording a sample costs one ``bisect`` and a few integer increments under
+an uncontended lock, cheap enough to leave enabled in production.
+"""
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+from flask import Response, g, request
+
+# Upper bounds (seconds) of the request latency buckets
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Upper bounds (seconds) of the facade/repository call buckets
+CALL_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(names, values, extra=''):
+    """Render a label set such as ``{method="GET",route="/"}``."""
+    pairs = [
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    """Render a sample value."""
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base class for labelled metrics."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        """
+        Initialize the metric.
+
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labels (tuple): Label names
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _header(self):
+        """Return the HELP and TYPE lines."""
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = 'counter'
+
+    def inc(self, *label_values, amount=1):
+        """Increase the counter for a label set."""
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        """Return the current value for a label set."""
+        return self._values.get(label_values, 0)
+
+    def render(self):
+        """Render the metric in the exposition format."""
+        lines = self._header()
+        for label_values, value in sorted(self._values.items()):
+            lines.append(f'{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}')
+        return lines
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = 'gauge'
+
+    def dec(self, *label_values, amount=1):
+        """Decrease the gauge for a label set."""
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, *label_values, value):
+        """Set the gauge for a label set."""
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram(_Metric):
+    """Distribution of observations over fixed buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=REQUEST_BUCKETS):
+        """
+        Initialize the histogram.
+
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labels (tuple): Label names
+            buckets (tuple): Sorted bucket upper bounds
+        """
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *label_values):
+        """Record one observation for a label set."""
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                # Per-bucket counts (last one is +Inf), then sum
+                state = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][position] += 1
+            state[1] += value
+
+    def render(self):
+        """Render the metric in the exposition format."""
+        lines = self._header()
+        for label_values, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                labels = _format_labels(self.labels, label_values, f'le="{le}"')
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f'{self.name}_sum{labels} {repr(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics rendered together.
+    """
+
+    def __init__(self):
+        """Initialize an empty, enabled registry."""
+        self.enabled = True
+        self._metrics = {}
+
+    def _register(self, metric):
+        """Register a metric, or return the one already registered under its name."""
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labels=()):
+        """Create (or fetch) a counter."""
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()):
+        """Create (or fetch) a gauge."""
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=REQUEST_BUCKETS):
+        """Create (or fetch) a histogram."""
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# Shared registry and the metrics recorded by the application itself
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    'hbnb_http_request_duration_seconds', 'HTTP request latency by route.',
+    ('method', 'route'))
+http_requests = registry.counter(
+    'hbnb_http_requests_total', 'HTTP requests by route and status code.',
+    ('method', 'route', 'status'))
+http_requests_in_flight = registry.gauge(
+    'hbnb_http_requests_in_flight', 'HTTP requests currently being served.',
+    ('method', 'route'))
+call_duration = registry.histogram(
+    'hbnb_call_duration_seconds', 'Duration of facade and repository calls.',
+    ('component', 'method'), CALL_BUCKETS)
+
+
+def _timed(component, name, fn):
+    """Wrap a function so each call is observed in call_duration."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not registry.enabled:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            call_duration.observe(time.perf_counter() - start, component, name)
+    return wrapper
+
+
+def timed_methods(component, exclude=()):
+    """
+    Class decorator timing every public method of a class.
+
+    Args:
+        component (str): Value of the ``component`` label, e.g. 'facade'
+        exclude (tuple): Method names left untimed, for per-item helpers
+            called too often for timing to be worth its cost
+    """
+    def decorator(cls):
+        for name, attribute in list(vars(cls).items()):
+            if (not name.startswith('_') and name not in exclude
+                    and callable(attribute) and not isinstance(attribute, type)):
+                setattr(cls, name, _timed(component, f'{cls.__name__}.{name}', attribute))
+        return cls
+    return decorator
+
+
+def init_metrics(app):
+    """
+    Instrument an application and expose ``/metrics``.
+
+    Args:
+        app (Flask): The application to instrument
+    """
+    registry.enabled = app.config.get('METRICS_ENABLED', True)
+    if not registry.enabled:
+        return
+
+    @app.before_request
+    def start_request_timer():
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        g.metrics_route = route
+        g.metrics_start = time.perf_counter()
+        http_requests_in_flight.inc(request.method, route)
+
+    @app.after_request
+    def record_request(response):
+        route = g.get('metrics_route')
+        if route is not None:
+            http_request_duration.observe(time.perf_counter() - g.metrics_start, request.method, route)
+            http_requests.inc(request.method, route, str(response.status_code))
+        return response
+
+    @app.teardown_request
+    def end_request(exc):
+        route = g.pop('metrics_route', None)
+        if route is not None:
+            http_requests_in_flight.dec(request.method, route)
+
+    def metrics():
+        """Expose the metrics in the Prometheus text format."""
+        return Response(registry.render(), content_type=CONTENT_TYPE)
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
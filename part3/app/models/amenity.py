@@ -1,15 +1,16 @@
 """
 Amenity model for the HBnB application.
 """
-import uuid
-from datetime import datetime
+from app.models.entity import Entity
 
 
-class Amenity:
+class Amenity(Entity):
     """
     Amenity entity representing an amenity that can be associated with places.
     """
 
+    __slots__ = ('name',)
+
     def __init__(self, name):
         """
         Initialize a new Amenity.
@@ -17,10 +18,8 @@ class Amenity:
         Args:
             name (str): The name of the amenity
         """
-        self.id = str(uuid.uuid4())
+        super().__init__()
         self.name = name
-        self.created_at = datetime.utcnow()
-        self.updated_at = datetime.utcnow()
 
     def validate(self):
         """
@@ -41,11 +40,7 @@ class Amenity:
         Args:
             data (dict): Dictionary containing attributes to update
         """
-        if 'name' in data:
-            self.name = data['name']
-
-        self.updated_at = datetime.utcnow()
-        self.validate()
+        self._apply({key: data[key] for key in ('name',) if key in data})
 
     def to_dict(self):
         """
@@ -1,12 +1,49 @@
 """
 Base model for all database entities.
 """
+from contextlib import contextmanager
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 import uuid
 
 db = SQLAlchemy()
 
+# Session.info key holding how many units of work are currently open
+_UNIT_OF_WORK_DEPTH = 'hbnb_unit_of_work_depth'
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Group every write made inside the block into a single transaction.
+
+    While a unit of work is open, repository and model writes only stage
+    their changes; the outermost block commits them once on exit, or rolls
+    everything back if an exception escapes. Units of work may be nested.
+
+    Yields:
+        Session: The current database session
+    """
+    info = db.session.info
+    depth = info.get(_UNIT_OF_WORK_DEPTH, 0)
+    info[_UNIT_OF_WORK_DEPTH] = depth + 1
+    try:
+        yield db.session
+        if depth == 0:
+            db.session.commit()
+    except Exception:
+        if depth == 0:
+            db.session.rollback()
+        raise
+    finally:
+        info[_UNIT_OF_WORK_DEPTH] = depth
+
+
+def commit():
+    """Commit the session, unless a unit of work will commit it later."""
+    if not db.session.info.get(_UNIT_OF_WORK_DEPTH, 0):
+        db.session.commit()
+
 
 class BaseModel(db.Model):
     """
@@ -21,12 +58,12 @@ class BaseModel(db.Model):
     def save(self):
         """Save the current instance to the database."""
         db.session.add(self)
-        db.session.commit()
+        commit()
 
     def delete(self):
         """Delete the current instance from the database."""
         db.session.delete(self)
-        db.session.commit()
+        commit()
 
     def update(self, data):
         """
@@ -39,4 +76,4 @@ class BaseModel(db.Model):
             if hasattr(self, key) and key not in ['id', 'created_at']:
                 setattr(self, key, value)
         self.updated_at = datetime.utcnow()
-        db.session.commit()
+        commit()
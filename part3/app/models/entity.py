@@ -0,0 +1,162 @@
+"""
+Base class for the in-memory domain entities of the HBnB application.
+"""
+import contextlib
+import copy
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+# Process-wide version stamps: every mutation of any entity takes a stamp
+# greater than all previous ones
+_version_lock = threading.Lock()
+_last_version = 0
+
+
+def new_version():
+    """
+    Issue a version stamp.
+
+    Stamps are the current time in microseconds since the epoch, bumped
+    when needed to stay strictly greater than every stamp issued before,
+    so a version also dates the change that produced it.
+
+    Returns:
+        int: The new stamp
+    """
+    global _last_version
+    now = time.time_ns() // 1000
+    with _version_lock:
+        _last_version = version = max(now, _last_version + 1)
+    return version
+
+
+def to_epoch_us(value):
+    """Convert a naive UTC datetime to integer microseconds since the epoch."""
+    return (value - EPOCH) // MICROSECOND
+
+
+def from_epoch_us(value):
+    """Convert integer microseconds since the epoch to a naive UTC datetime."""
+    return EPOCH + timedelta(microseconds=value)
+
+
+class Entity:
+    """
+    Common behaviour shared by User, Place, Review and Amenity.
+
+    Entities use ``__slots__`` and store their timestamps as integer
+    microseconds since the epoch (``created_at_us``/``updated_at_us``);
+    ``created_at`` and ``updated_at`` decode them to datetimes on access.
+    The string ID is the same object the repository uses as its storage
+    key, so it is never held twice.
+
+    Every mutation stamps the entity with a new, strictly increasing
+    version, which lets serialized representations be cached (and HTTP
+    clients revalidate them) until the entity, or an entity nested in its
+    representation, changes.
+
+    An entity stored in an InMemoryRepository keeps a reference to that
+    repository so that mutations made through the model itself (for example
+    ``update()``) keep the repository's secondary indexes in sync.
+    """
+
+    __slots__ = ('id', 'created_at_us', 'updated_at_us', '_repository', '_version')
+
+    def __init__(self):
+        """Assign a new ID and set both timestamps to the current time."""
+        self.id = str(uuid.uuid4())
+        self.created_at_us = self.updated_at_us = to_epoch_us(datetime.utcnow())
+        self._repository = None
+        self._version = new_version()
+
+    @property
+    def created_at(self):
+        """datetime: Creation timestamp (naive UTC)."""
+        return from_epoch_us(self.created_at_us)
+
+    @created_at.setter
+    def created_at(self, value):
+        self.created_at_us = to_epoch_us(value)
+
+    @property
+    def updated_at(self):
+        """datetime: Last update timestamp (naive UTC)."""
+        return from_epoch_us(self.updated_at_us)
+
+    @updated_at.setter
+    def updated_at(self, value):
+        self.updated_at_us = to_epoch_us(value)
+
+    @property
+    def serial_version(self):
+        """
+        int: Version of the entity's ``to_dict()`` representation, which is
+        also the time of its last change in microseconds since the epoch.
+
+        Subclasses whose representation nests other entities fold in the
+        versions of those entities.
+        """
+        return self._version
+
+    def _touch(self):
+        """Stamp the entity with a new version."""
+        self._version = new_version()
+
+    def _load_related(self, slot):
+        """
+        Allocate one of the entity's lazily created lists of related entities.
+
+        Entities whose repository still reads from a mapped snapshot fill
+        the list with the related entities recorded there.
+
+        Args:
+            slot (str): The list's slot, e.g. ``'_reviews'``
+        """
+        repository = self._repository
+        source = repository.source if repository is not None else None
+        if source is None:
+            setattr(self, slot, [])
+        else:
+            source.load_related(self, slot)
+
+    def _changed(self):
+        """Record a mutation and re-index the entity in its repository."""
+        self._touch()
+        if self._repository is not None:
+            self._repository.reindex(self)
+
+    def _apply(self, changes):
+        """
+        Validate attribute changes, then make them and record the mutation.
+
+        The changes are made on a copy of the entity first, which is
+        validated and checked against its repository's unique indexes, so
+        an invalid update or a duplicate unique value leaves the entity,
+        the indexes and the journal untouched.
+
+        Args:
+            changes (dict): New attribute values by attribute name
+
+        Raises:
+            ValueError: If the changed entity would not be valid, or would
+                take a unique value held by another entity
+        """
+        candidate = copy.copy(self)
+        for name, value in changes.items():
+            setattr(candidate, name, value)
+        candidate.validate()
+        repository = self._repository
+        # The writer lock keeps other writers from taking a unique value
+        # between the check and the assignment
+        with repository.transaction() if repository is not None else contextlib.nullcontext():
+            if repository is not None:
+                repository.check(candidate)
+            for name, value in changes.items():
+                setattr(self, name, value)
+            self.updated_at = datetime.utcnow()
+            self._changed()
@@ -0,0 +1,105 @@
+"""
+Password hashing for the User model.
+
+bcrypt is deliberately slow, so hashing and verification run on a small,
+bounded thread pool (bcrypt releases the GIL while it works). The pool
+caps how many hashes run at once and how many may wait; once both are
+full, new requests fail fast with PasswordHashingBusy instead of piling up
+behind each other and stalling every request thread.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask_bcrypt import Bcrypt
+
+bcrypt = Bcrypt()
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the password hashing pool is saturated."""
+
+
+class PasswordHashingPool:
+    """
+    Bounded worker pool for bcrypt hashing and verification.
+    """
+
+    def __init__(self, max_workers=4, max_pending=16):
+        """
+        Initialize the pool.
+
+        Args:
+            max_workers (int): Hashes computed concurrently; 0 hashes inline
+                in the calling thread
+            max_pending (int): Hashes allowed to wait for a free worker
+        """
+        self._executor = None
+        self._slots = None
+        self.configure(max_workers, max_pending)
+
+    def configure(self, max_workers, max_pending):
+        """
+        Resize the pool.
+
+        Hashes already submitted finish on the previous executor.
+
+        Args:
+            max_workers (int): Hashes computed concurrently; 0 hashes inline
+            max_pending (int): Hashes allowed to wait for a free worker
+        """
+        previous = self._executor
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = (
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bcrypt')
+            if max_workers > 0 else None
+        )
+        self._slots = threading.BoundedSemaphore(max(max_workers, 1) + max_pending)
+        if previous is not None:
+            previous.shutdown(wait=False)
+
+    def _run(self, fn, *args):
+        """
+        Run a function on the pool and wait for its result.
+
+        Raises:
+            PasswordHashingBusy: If every worker and queue slot is taken
+        """
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise PasswordHashingBusy("Too many concurrent password operations, retry later")
+        try:
+            if self._executor is None:
+                return fn(*args)
+            return self._executor.submit(fn, *args).result()
+        finally:
+            slots.release()
+
+    def hash(self, password):
+        """
+        Hash a password with bcrypt.
+
+        Args:
+            password (str): Plain text password
+
+        Returns:
+            str: Hashed password
+        """
+        return self._run(bcrypt.generate_password_hash, password).decode('utf-8')
+
+    def verify(self, password_hash, password):
+        """
+        Check a password against a bcrypt hash.
+
+        Args:
+            password_hash (str): The stored hash
+            password (str): Plain text password to verify
+
+        Returns:
+            bool: True if the password matches
+        """
+        return self._run(bcrypt.check_password_hash, password_hash, password)
+
+
+# Shared pool, sized from the configuration by the application factory
+password_pool = PasswordHashingPool()
@@ -1,15 +1,19 @@
 """
 Place model for the HBnB application.
 """
-import uuid
-from datetime import datetime
+from app.models.entity import Entity
 
 
-class Place:
+class Place(Entity):
     """
     Place entity representing a property listing.
     """
 
+    __slots__ = (
+        'title', 'description', 'price', 'latitude', 'longitude', '_owner',
+        '_reviews', '_amenities', 'review_count', 'rating_sum', '_rating_histogram'
+    )
+
     def __init__(self, title, description, price, latitude, longitude, owner):
         """
         Initialize a new Place.
@@ -22,17 +26,86 @@ class Place:
             longitude (float): Longitude coordinate
             owner (User): The owner of the place
         """
-        self.id = str(uuid.uuid4())
+        super().__init__()
         self.title = title
         self.description = description
         self.price = price
         self.latitude = latitude
         self.longitude = longitude
-        self.owner = owner
-        self.created_at = datetime.utcnow()
-        self.updated_at = datetime.utcnow()
-        self.reviews = []  # List of reviews for this place
-        self.amenities = []  # List of amenities for this place
+        self._owner = owner
+        # Lists are only allocated once the place gets a review or amenity
+        self._reviews = None
+        self._amenities = None
+        # Running rating aggregates, maintained as reviews come and go
+        self.review_count = 0
+        self.rating_sum = 0
+        self._rating_histogram = None  # Count of 1..5 star ratings
+
+    @property
+    def owner(self):
+        """User: The owner of the place."""
+        return self._owner
+
+    @owner.setter
+    def owner(self, value):
+        self._owner = value
+        self._changed()
+
+    @property
+    def reviews(self):
+        """list: Reviews for this place."""
+        if self._reviews is None:
+            self._load_related('_reviews')
+        return self._reviews
+
+    @reviews.setter
+    def reviews(self, value):
+        self._reviews = value
+
+    @property
+    def amenities(self):
+        """list: Amenities of this place."""
+        if self._amenities is None:
+            self._amenities = []
+        return self._amenities
+
+    @amenities.setter
+    def amenities(self, value):
+        self._amenities = value
+        self._changed()
+
+    @property
+    def rating_histogram(self):
+        """list: Number of 1, 2, 3, 4 and 5 star reviews."""
+        if self._rating_histogram is None:
+            self._rating_histogram = [0, 0, 0, 0, 0]
+        return self._rating_histogram
+
+    @property
+    def serial_version(self):
+        """int: Version of the place's representation, including owner and amenities."""
+        version = max(self._version, self._owner._version)
+        for amenity in self._amenities or ():
+            if amenity._version > version:
+                version = amenity._version
+        return version
+
+    @property
+    def owner_id(self):
+        """str: ID of the place's owner."""
+        return self.owner.id if self.owner else None
+
+    @property
+    def amenity_ids(self):
+        """tuple: IDs of the place's amenities."""
+        return tuple(amenity.id for amenity in self._amenities or ())
+
+    @property
+    def average_rating(self):
+        """float: Mean rating of the place's reviews, or None without reviews."""
+        if not self.review_count:
+            return None
+        return self.rating_sum / self.review_count
 
     def validate(self):
         """
@@ -69,33 +142,51 @@ class Place:
         Args:
             data (dict): Dictionary containing attributes to update
         """
-        if 'title' in data:
-            self.title = data['title']
-        if 'description' in data:
-            self.description = data['description']
-        if 'price' in data:
-            self.price = data['price']
-        if 'latitude' in data:
-            self.latitude = data['latitude']
-        if 'longitude' in data:
-            self.longitude = data['longitude']
-
-        self.updated_at = datetime.utcnow()
-        self.validate()
+        self._apply({
+            key: data[key] for key in ('title', 'description', 'price', 'latitude', 'longitude') if key in data
+        })
 
     def add_review(self, review):
-        """Add a review to the place."""
+        """Add a review to the place and count its rating."""
         self.reviews.append(review)
+        self.review_count += 1
+        self.rating_sum += review.rating
+        self.rating_histogram[review.rating - 1] += 1
+        self._touch()
+
+    def remove_review(self, review):
+        """Remove a review from the place and uncount its rating."""
+        if review in self.reviews:
+            self.reviews.remove(review)
+            self.review_count -= 1
+            self.rating_sum -= review.rating
+            self.rating_histogram[review.rating - 1] -= 1
+            self._touch()
+
+    def change_review_rating(self, old_rating, new_rating):
+        """
+        Move one review's rating within the aggregates.
+
+        Args:
+            old_rating (int): The rating before the review was updated
+            new_rating (int): The rating after the review was updated
+        """
+        self.rating_sum += new_rating - old_rating
+        self.rating_histogram[old_rating - 1] -= 1
+        self.rating_histogram[new_rating - 1] += 1
+        self._touch()
 
     def add_amenity(self, amenity):
         """Add an amenity to the place."""
         if amenity not in self.amenities:
             self.amenities.append(amenity)
+            self._changed()
 
     def remove_amenity(self, amenity):
         """Remove an amenity from the place."""
         if amenity in self.amenities:
             self.amenities.remove(amenity)
+            self._changed()
 
     def to_dict(self):
         """
@@ -118,7 +209,11 @@ class Place:
                 'last_name': self.owner.last_name,
                 'email': self.owner.email
             },
-            'amenities': [amenity.to_dict() for amenity in self.amenities],
+            'amenities': [amenity.to_dict() for amenity in self._amenities or ()],
+            'review_count': self.review_count,
+            'rating_sum': self.rating_sum,
+            'average_rating': self.average_rating,
+            'rating_histogram': list(self._rating_histogram or (0, 0, 0, 0, 0)),
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
@@ -1,15 +1,16 @@
 """
 Review model for the HBnB application.
 """
-import uuid
-from datetime import datetime
+from app.models.entity import Entity
 
 
-class Review:
+class Review(Entity):
     """
     Review entity representing a review of a place by a user.
     """
 
+    __slots__ = ('text', 'rating', 'place', 'user')
+
     def __init__(self, text, rating, place, user):
         """
         Initialize a new Review.
@@ -20,13 +21,26 @@ class Review:
             place (Place): The place being reviewed
             user (User): The user who wrote the review
         """
-        self.id = str(uuid.uuid4())
+        super().__init__()
         self.text = text
         self.rating = rating
         self.place = place
         self.user = user
-        self.created_at = datetime.utcnow()
-        self.updated_at = datetime.utcnow()
+
+    @property
+    def place_id(self):
+        """str: ID of the reviewed place."""
+        return self.place.id if self.place else None
+
+    @property
+    def user_id(self):
+        """str: ID of the review's author."""
+        return self.user.id if self.user else None
+
+    @property
+    def serial_version(self):
+        """int: Version of the review's representation, including its author."""
+        return max(self._version, self.user._version)
 
     def validate(self):
         """
@@ -56,13 +70,7 @@ class Review:
         Args:
             data (dict): Dictionary containing attributes to update
         """
-        if 'text' in data:
-            self.text = data['text']
-        if 'rating' in data:
-            self.rating = data['rating']
-
-        self.updated_at = datetime.utcnow()
-        self.validate()
+        self._apply({key: data[key] for key in ('text', 'rating') if key in data})
 
     def to_dict(self):
         """
@@ -1,19 +1,18 @@
 """
 User model for the HBnB application.
 """
-import uuid
-from datetime import datetime
 import re
-from flask_bcrypt import Bcrypt
+from app.models.entity import Entity
+from app.models.password_hashing import password_pool
 
-bcrypt = Bcrypt()
 
-
-class User:
+class User(Entity):
     """
     User entity representing a user in the system.
     """
 
+    __slots__ = ('first_name', 'last_name', 'email', 'is_admin', 'password', '_places', '_reviews')
+
     def __init__(self, first_name, last_name, email, password=None, is_admin=False):
         """
         Initialize a new User.
@@ -25,30 +24,54 @@ class User:
             password (str): User's password (will be hashed)
             is_admin (bool): Whether the user is an administrator
         """
-        self.id = str(uuid.uuid4())
+        super().__init__()
         self.first_name = first_name
         self.last_name = last_name
         self.email = email
         self.is_admin = is_admin
         self.password = self.hash_password(password) if password else None
-        self.created_at = datetime.utcnow()
-        self.updated_at = datetime.utcnow()
-        self.places = []  # List of places owned by this user
-        self.reviews = []  # List of reviews written by this user
+        # Lists are only allocated once the user owns a place or writes a review
+        self._places = None
+        self._reviews = None
+
+    @property
+    def places(self):
+        """list: Places owned by this user."""
+        if self._places is None:
+            self._load_related('_places')
+        return self._places
+
+    @places.setter
+    def places(self, value):
+        self._places = value
+
+    @property
+    def reviews(self):
+        """list: Reviews written by this user."""
+        if self._reviews is None:
+            self._load_related('_reviews')
+        return self._reviews
+
+    @reviews.setter
+    def reviews(self, value):
+        self._reviews = value
 
     def hash_password(self, password):
         """
-        Hash a password using bcrypt.
+        Hash a password using bcrypt on the shared hashing pool.
 
         Args:
             password (str): Plain text password
 
         Returns:
             str: Hashed password
+
+        Raises:
+            PasswordHashingBusy: If the hashing pool is saturated
         """
         if password is None:
             return None
-        return bcrypt.generate_password_hash(password).decode('utf-8')
+        return password_pool.hash(password)
 
     def verify_password(self, password):
         """
@@ -59,10 +82,13 @@ class User:
 
         Returns:
             bool: True if password matches, False otherwise
+
+        Raises:
+            PasswordHashingBusy: If the hashing pool is saturated
         """
         if not self.password or not password:
             return False
-        return bcrypt.check_password_hash(self.password, password)
+        return password_pool.verify(self.password, password)
 
     def validate(self):
         """
@@ -89,24 +115,22 @@ class User:
         if not re.match(email_regex, self.email):
             raise ValueError("Invalid email format")
 
-    def update(self, data):
+    def update(self, data, password_hash=None):
         """
         Update user attributes.
 
         Args:
             data (dict): Dictionary containing attributes to update
+            password_hash (str): Hash of ``data['password']`` computed
+                beforehand with hash_password, so that callers holding a
+                lock need not hash under it
         """
-        if 'first_name' in data:
-            self.first_name = data['first_name']
-        if 'last_name' in data:
-            self.last_name = data['last_name']
-        if 'email' in data:
-            self.email = data['email']
-        if 'password' in data:
-            self.password = self.hash_password(data['password'])
-
-        self.updated_at = datetime.utcnow()
-        self.validate()
+        changes = {key: data[key] for key in ('first_name', 'last_name', 'email') if key in data}
+        if password_hash is not None:
+            changes['password'] = password_hash
+        elif 'password' in data:
+            changes['password'] = self.hash_password(data['password'])
+        self._apply(changes)
 
     def add_place(self, place):
         """Add a place to the user's owned places."""
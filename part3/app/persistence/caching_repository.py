@@ -0,0 +1,375 @@
+"""
+Read-through caching of repository lookups by ID.
+
+``CachingRepository`` wraps any repository (in practice
+SQLAlchemyRepository, where every ``get`` is a database round trip) and
+serves ``get`` from a bounded LRU cache whose entries expire after a TTL.
+Misses are cached too (for a shorter TTL), so repeated lookups of unknown
+IDs do not reach the database either. Writes made through the wrapper
+invalidate the entries of the objects they touch; every other method is
+delegated unchanged.
+
+Policies are set per entity in REPOSITORY_CACHE_POLICIES, and hits and
+misses are exported at ``/metrics``. Each worker process caches on its own
+by default; see ``app.persistence.shared_cache`` for a cache shared by the
+workers of a host and for broadcasting invalidations between them.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from app.metrics import registry
+
+cache_lookups = registry.counter(
+    'hbnb_repository_cache_lookups_total', 'Repository cache lookups by entity and result.',
+    ('entity', 'result'))
+cache_hit_ratio = registry.gauge(
+    'hbnb_repository_cache_hit_ratio', 'Fraction of repository cache lookups served from the cache.',
+    ('entity',))
+cache_invalidations = registry.counter(
+    'hbnb_repository_cache_invalidations_total',
+    'Repository cache invalidations by entity and origin (this process or another one).',
+    ('entity', 'origin'))
+
+MISSING = object()  # Returned by caches for keys they do not hold
+ABSENT = object()  # Cached value of an ID the repository does not hold
+
+# Facade attributes holding the repositories, by entity name
+FACADE_REPOSITORIES = {'User': 'user_repo', 'Amenity': 'amenity_repo', 'Place': 'place_repo', 'Review': 'review_repo'}
+
+
+class CachePolicy:
+    """
+    Caching policy of one entity.
+    """
+
+    __slots__ = ('ttl', 'maxsize', 'negative_ttl')
+
+    def __init__(self, ttl=60.0, maxsize=10000, negative_ttl=5.0):
+        """
+        Initialize the policy.
+
+        Args:
+            ttl (float): Seconds an object stays cached (None: until evicted)
+            maxsize (int): Maximum number of cached IDs; 0 disables caching
+            negative_ttl (float): Seconds a miss stays cached; 0 disables
+                negative caching
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.negative_ttl = negative_ttl
+
+
+class LRUCache:
+    """
+    Bounded mapping evicting the least recently used entries, whose entries
+    also expire after a per-entry TTL.
+
+    ``generation`` counts removals, so that a value computed before a
+    removal is not stored after it (see ``set``).
+    """
+
+    def __init__(self, maxsize, clock=time.monotonic):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize (int): Maximum number of entries
+            clock (callable): Returns the current time in seconds
+        """
+        self.maxsize = maxsize
+        self.clock = clock
+        self.generation = 0
+        self._entries = OrderedDict()  # key -> (expires_at or None, value)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Return the number of entries, including expired ones not yet dropped."""
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Return the value of a key.
+
+        Returns:
+            The value, or MISSING if the key is absent or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= self.clock():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None, generation=None):
+        """
+        Store a value, evicting the least recently used entries if full.
+
+        Args:
+            key: The key
+            value: The value
+            ttl (float): Seconds until the entry expires (None: never)
+            generation (int): ``generation`` read before computing the
+                value; nothing is stored if a removal happened since
+        """
+        if self.maxsize <= 0:
+            return
+        expires_at = None if ttl is None else self.clock() + ttl
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        """Drop a key, if present."""
+        with self._lock:
+            self.generation += 1
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+class CachingRepository:
+    """
+    Repository decorator caching ``get`` by ID.
+
+    A lookup that misses reads through to the wrapped repository; the
+    result is only cached if no write invalidated anything meanwhile, so a
+    lookup racing with an update cannot cache the value from before it.
+    With a ``bus``, invalidations are also broadcast to the caches of the
+    other worker processes.
+    Objects changed without going through the wrapper (e.g. mutated in
+    place by a model's ``update()``) must be invalidated by the caller, as
+    the facade does after each such write. Repositories whose objects
+    belong to a session get cached objects re-attached on each hit through
+    their ``attach(obj)`` method.
+    """
+
+    def __init__(self, repository, entity, policy=None, cache=None, bus=None):
+        """
+        Initialize the decorator.
+
+        Args:
+            repository: The repository to wrap
+            entity (str): Entity name, used as the metrics label
+            policy (CachePolicy): Caching policy; defaults to CachePolicy()
+            cache: Cache to use (LRUCache or SharedMemoryCache); defaults to
+                an LRUCache sized by the policy
+            bus (InvalidationBus): Broadcasts invalidations to other processes
+        """
+        self.repository = repository
+        self.entity = entity
+        self.policy = policy or CachePolicy()
+        self.cache = cache if cache is not None else LRUCache(self.policy.maxsize)
+        self.bus = bus
+        self.hits = 0
+        self.misses = 0
+        self._attach = getattr(repository, 'attach', None)
+
+    def __getattr__(self, name):
+        """Delegate every other attribute to the wrapped repository."""
+        return getattr(self.repository, name)
+
+    @property
+    def hit_ratio(self):
+        """float: Fraction of lookups served from the cache (0.0 before any)."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def _record(self, result):
+        """Count a lookup in the metrics."""
+        if result == 'miss':
+            self.misses += 1
+        else:
+            self.hits += 1
+        cache_lookups.inc(self.entity, result)
+        cache_hit_ratio.set(self.entity, value=self.hit_ratio)
+
+    def get(self, obj_id, profile=None):
+        """
+        Retrieve an object by its ID, from the cache if possible.
+
+        Args:
+            obj_id: The unique identifier of the object
+            profile (str): Loading profile, passed to the wrapped repository
+                on a miss (cached objects load other relationships lazily)
+
+        Returns:
+            The object if found, None otherwise
+        """
+        value = self.cache.get(obj_id)
+        if value is ABSENT:
+            self._record('negative_hit')
+            return None
+        if value is not MISSING:
+            self._record('hit')
+            return self._attach(value) if self._attach is not None else value
+
+        self._record('miss')
+        generation = self.cache.generation
+        obj = self.repository.get(obj_id, profile)
+        if obj is not None:
+            self.cache.set(obj_id, obj, self.policy.ttl, generation)
+        elif self.policy.negative_ttl:
+            self.cache.set(obj_id, ABSENT, self.policy.negative_ttl, generation)
+        return obj
+
+    def invalidate(self, obj_id, broadcast=True):
+        """
+        Drop the cached object (or cached miss) of an ID.
+
+        Args:
+            obj_id: The unique identifier of the object
+            broadcast (bool): Whether to tell the other processes too
+                (False when handling their broadcast)
+        """
+        self.cache.discard(obj_id)
+        cache_invalidations.inc(self.entity, 'local' if broadcast else 'remote')
+        if broadcast and self.bus is not None:
+            self.bus.publish(self.entity, obj_id)
+
+    def clear(self, broadcast=True):
+        """Drop every cached entry (see ``invalidate``)."""
+        self.cache.clear()
+        if broadcast and self.bus is not None:
+            self.bus.publish(self.entity)
+
+    def add(self, obj):
+        """Add an object, dropping a cached miss of its ID."""
+        try:
+            return self.repository.add(obj)
+        finally:
+            self.invalidate(obj.id)
+
+    def adopt(self, obj):
+        """Store a restored object, dropping a cached miss of its ID."""
+        try:
+            return self.repository.adopt(obj)
+        finally:
+            self.invalidate(obj.id)
+
+    def add_if_absent(self, obj, attr_name):
+        """Add an object unless its attribute value is taken (see the wrapped repository)."""
+        try:
+            return self.repository.add_if_absent(obj, attr_name)
+        finally:
+            self.invalidate(obj.id)
+
+    def add_many(self, objs):
+        """Add several objects, dropping cached misses of their IDs."""
+        objs = list(objs)
+        try:
+            return self.repository.add_many(objs)
+        finally:
+            for obj in objs:
+                self.invalidate(obj.id)
+
+    def update(self, obj_id, data):
+        """Update an object and drop its cached entry."""
+        try:
+            return self.repository.update(obj_id, data)
+        finally:
+            self.invalidate(obj_id)
+
+    def update_many(self, updates):
+        """Update several objects and drop their cached entries."""
+        try:
+            return self.repository.update_many(updates)
+        finally:
+            for obj_id in list(updates):
+                self.invalidate(obj_id)
+
+    def delete(self, obj_id):
+        """Delete an object and drop its cached entry."""
+        try:
+            return self.repository.delete(obj_id)
+        finally:
+            self.invalidate(obj_id)
+
+    def delete_many(self, obj_ids):
+        """Delete several objects and drop their cached entries."""
+        obj_ids = list(obj_ids)
+        try:
+            return self.repository.delete_many(obj_ids)
+        finally:
+            for obj_id in obj_ids:
+                self.invalidate(obj_id)
+
+
+def init_repository_cache(app):
+    """
+    Put the shared facade's repositories behind read-through caches.
+
+    Does nothing unless REPOSITORY_CACHE_ENABLED is set. Each entity uses
+    its policy from REPOSITORY_CACHE_POLICIES, and the cache backend set by
+    REPOSITORY_CACHE_BACKEND: 'local' (an LRUCache per process, kept
+    consistent across processes by broadcasting invalidations when
+    REPOSITORY_CACHE_BROADCAST_DIR is set) or 'shared' (a SharedMemoryCache
+    per entity, mapped by every process of the host).
+
+    Args:
+        app (Flask): The application being configured
+
+    Raises:
+        ValueError: If the backend is unknown, or is 'shared' and a
+            repository cannot serve copies of its objects
+    """
+    if not app.config.get('REPOSITORY_CACHE_ENABLED'):
+        return
+    from app.persistence.shared_cache import InvalidationBus, SharedMemoryCache
+    from app.services import facade
+    backend = app.config.get('REPOSITORY_CACHE_BACKEND', 'local')
+    if backend not in ('local', 'shared'):
+        raise ValueError(f"Unknown repository cache backend: {backend}")
+    policies = app.config.get('REPOSITORY_CACHE_POLICIES', {})
+    wrapped = {}
+    for entity, attr in FACADE_REPOSITORIES.items():
+        repository = getattr(facade, attr)
+        if isinstance(repository, CachingRepository):
+            repository = repository.repository  # Configured by an earlier app
+        # The shared table returns copies: only repositories that can
+        # re-attach a copy serve them (in-memory ones hold the live objects)
+        if backend == 'shared' and getattr(repository, 'attach', None) is None:
+            raise ValueError(f"The shared repository cache cannot serve {entity} objects: "
+                             f"{type(repository).__name__} cannot re-attach copies")
+        wrapped[entity] = repository
+
+    repositories = {}
+    for entity, attr in FACADE_REPOSITORIES.items():
+        previous = getattr(facade, attr)
+        if isinstance(previous, CachingRepository) and previous.bus is not None:
+            previous.bus.close()
+        repository = wrapped[entity]
+        policy = CachePolicy(**policies.get(entity, {}))
+        cache = None
+        if backend == 'shared':
+            cache = SharedMemoryCache(f"{app.config['REPOSITORY_CACHE_SHARED_NAME']}-{entity.lower()}",
+                                      policy.maxsize, app.config['REPOSITORY_CACHE_SHARED_SLOT_SIZE'])
+        repositories[entity] = CachingRepository(repository, entity, policy, cache)
+        setattr(facade, attr, repositories[entity])
+
+    directory = app.config.get('REPOSITORY_CACHE_BROADCAST_DIR')
+    if backend == 'local' and directory:
+        def receive(entity, obj_id):
+            repository = repositories.get(entity)
+            if repository is None:
+                return
+            if obj_id is None:
+                repository.clear(broadcast=False)
+            else:
+                repository.invalidate(obj_id, broadcast=False)
+
+        bus = InvalidationBus(directory, receive)
+        for repository in repositories.values():
+            repository.bus = bus
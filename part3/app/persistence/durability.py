@@ -0,0 +1,569 @@
+"""
+Write-ahead log and snapshot durability for the in-memory repositories.
+
+Every mutation of a journaled InMemoryRepository (add, re-index after an
+update, delete) is appended to a binary write-ahead log while the writer
+lock is held, so the log order is the order in which changes were applied.
+A single background thread writes and fsyncs the log; records appended
+while an fsync is in progress are written together by the next one (group
+commit), so concurrent writers share the cost of each fsync. Requests wait
+for their own records to be durable before responding.
+
+A background thread periodically writes a snapshot of every entity and
+starts a new log segment; segments covered by a snapshot are deleted. On
+startup the latest snapshot is memory-mapped, so its entities are decoded
+lazily on first access (see mapped_snapshot.py), and the log written after
+it is replayed on top. A torn record at the end of the log (a crash during
+a write) is discarded.
+
+On-disk layout, in the configured directory::
+
+    snapshot-<lsn>.map    entities as of log sequence number <lsn>
+    wal-<lsn>.log         records from sequence number <lsn> onwards
+
+Log segments hold frames: a ``<length, crc32>`` header followed by a
+``marshal``-encoded ``(lsn, op, kind, data)`` tuple, where data is an entity
+state (see records.py) or, for deletions, an entity ID.
+"""
+import atexit
+import logging
+import marshal
+import os
+import struct
+import threading
+import time
+import zlib
+
+from app.persistence.mapped_snapshot import MappedSnapshot, SnapshotLoader, write_snapshot
+from app.persistence.records import KINDS, assign_state, blank, entity_state, snapshot_state
+
+logger = logging.getLogger(__name__)
+
+_FRAME = struct.Struct('<II')  # payload length, CRC-32 of the payload
+
+PUT = 1
+DELETE = 2
+
+
+def encode_record(lsn, op, kind, data):
+    """
+    Encode one log record as a checksummed frame.
+
+    Args:
+        lsn (int): Log sequence number
+        op (int): PUT or DELETE
+        kind (str): Entity class name
+        data: Entity state (PUT) or entity ID (DELETE)
+
+    Returns:
+        bytes: The frame
+    """
+    payload = marshal.dumps((lsn, op, kind, data))
+    return _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(file):
+    """
+    Decode the frames of an open binary file.
+
+    Decoding stops at the first incomplete or corrupt frame.
+
+    Args:
+        file: File positioned at the first frame
+
+    Returns:
+        tuple: (list of ``(lsn, op, kind, data)`` records, offset of the
+        end of the last valid frame)
+    """
+    records = []
+    end = file.tell()
+    while True:
+        header = file.read(_FRAME.size)
+        if len(header) < _FRAME.size:
+            break
+        length, checksum = _FRAME.unpack(header)
+        payload = file.read(length)
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            break
+        records.append(marshal.loads(payload))
+        end = file.tell()
+    return records, end
+
+
+def _fsync_directory(directory):
+    """Make file creations and renames in a directory durable."""
+    if not hasattr(os, 'O_DIRECTORY'):  # pragma: no cover - Windows
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _sequence_files(directory, prefix, suffix):
+    """Return ``(lsn, path)`` of the numbered files in a directory, in order."""
+    files = []
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name.endswith(suffix):
+            number = name[len(prefix):-len(suffix)]
+            if number.isdigit():
+                files.append((int(number), os.path.join(directory, name)))
+    return sorted(files)
+
+
+class WriteAheadLog:
+    """
+    Append-only, segmented log with a group-committing writer thread.
+    """
+
+    def __init__(self, directory, start_lsn, fsync=True, commit_delay=0.0):
+        """
+        Open a new segment and start the writer thread.
+
+        Args:
+            directory (str): Directory holding the segments
+            start_lsn (int): Sequence number of the next record
+            fsync (bool): Whether to fsync after each group of writes;
+                without it records survive a process crash but not an OS
+                crash or power loss
+            commit_delay (float): Seconds the writer waits after the first
+                pending record, letting more records join the same fsync
+        """
+        self.directory = directory
+        self.fsync = fsync
+        self.commit_delay = commit_delay
+        self.segment_bytes = 0
+        lock = threading.Lock()
+        self._pending = threading.Condition(lock)  # records queued, for the writer
+        self._synced = threading.Condition(lock)  # records made durable, for waiters
+        self._io_lock = threading.Lock()
+        self._buffer = []
+        self._next_lsn = start_lsn
+        self._durable_lsn = start_lsn - 1
+        self._error = None
+        self._closed = False
+        self._file = self._open_segment(start_lsn)
+        self._thread = threading.Thread(target=self._write_loop, name='wal-writer', daemon=True)
+        self._thread.start()
+
+    @property
+    def last_lsn(self):
+        """int: Sequence number of the last appended record."""
+        return self._next_lsn - 1
+
+    def _open_segment(self, start_lsn):
+        """Create the segment whose first record is ``start_lsn``."""
+        file = open(os.path.join(self.directory, f'wal-{start_lsn:020d}.log'), 'ab')
+        _fsync_directory(self.directory)
+        return file
+
+    def append(self, op, kind, data):
+        """
+        Queue a record for writing.
+
+        Args:
+            op (int): PUT or DELETE
+            kind (str): Entity class name
+            data: Entity state (PUT) or entity ID (DELETE)
+
+        Returns:
+            int: The record's sequence number
+        """
+        with self._pending:
+            if self._closed:
+                raise ValueError("Write-ahead log is closed")
+            lsn = self._next_lsn
+            self._next_lsn += 1
+            self._buffer.append(encode_record(lsn, op, kind, data))
+            self._pending.notify()
+        return lsn
+
+    def _write_loop(self):
+        """Write and sync queued records until the log is closed."""
+        while True:
+            with self._pending:
+                while not self._buffer and not self._closed:
+                    self._pending.wait()
+                if not self._buffer:
+                    return
+            if self.commit_delay:
+                time.sleep(self.commit_delay)
+            with self._pending:
+                batch, self._buffer = self._buffer, []
+                last = self._next_lsn - 1
+            data = b''.join(batch)
+            try:
+                with self._io_lock:
+                    self._file.write(data)
+                    self._file.flush()
+                    if self.fsync:
+                        os.fsync(self._file.fileno())
+                    self.segment_bytes += len(data)
+            except OSError as error:
+                logger.exception("Write-ahead log write failed")
+                with self._synced:
+                    self._error = error
+                    self._synced.notify_all()
+                return
+            with self._synced:
+                self._durable_lsn = last
+                self._synced.notify_all()
+
+    def wait(self, lsn):
+        """
+        Block until a record is durable.
+
+        Args:
+            lsn (int): Sequence number of the record
+
+        Raises:
+            OSError: If the log could not be written
+        """
+        with self._synced:
+            while self._durable_lsn < lsn and self._error is None:
+                self._synced.wait()
+            if self._error is not None:
+                raise self._error
+
+    def rotate(self):
+        """
+        Close the current segment and start a new one.
+
+        Callers must prevent concurrent appends (by holding the repositories'
+        writer lock).
+
+        Returns:
+            int: Sequence number of the last record of the closed segment
+        """
+        last = self.last_lsn
+        self.wait(last)
+        with self._io_lock:
+            self._file.close()
+            self._file = self._open_segment(last + 1)
+            self.segment_bytes = 0
+        return last
+
+    def close(self):
+        """Write the pending records and stop the writer thread."""
+        with self._pending:
+            if self._closed:
+                return
+            self._closed = True
+            self._pending.notify()
+        self._thread.join()
+        with self._io_lock:
+            self._file.close()
+
+
+class DurableStore:
+    """
+    Journals a facade's in-memory repositories and restores them on startup.
+    """
+
+    def __init__(self, facade, directory, fsync=True, commit_delay=0.0,
+                 snapshot_interval=300.0, snapshot_wal_bytes=64 * 1024 * 1024, warm_up=False):
+        """
+        Initialize the store; call open() to restore and start journaling.
+
+        Args:
+            facade (HBnBFacade): Facade whose repositories are persisted
+            directory (str): Directory holding snapshots and log segments
+            fsync (bool): Whether log writes are fsynced
+            commit_delay (float): Group commit delay, in seconds
+            snapshot_interval (float): Seconds between snapshots (0 disables
+                periodic snapshots)
+            snapshot_wal_bytes (int): Log segment size that triggers an
+                early snapshot (0 disables)
+            warm_up (bool): Whether to decode every snapshot entity in the
+                background after open(), instead of only on first access
+        """
+        self.facade = facade
+        self.directory = directory
+        self.fsync = fsync
+        self.commit_delay = commit_delay
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_wal_bytes = snapshot_wal_bytes
+        self.warm_up = warm_up
+        self.repositories = {
+            'User': facade.user_repo,
+            'Amenity': facade.amenity_repo,
+            'Place': facade.place_repo,
+            'Review': facade.review_repo,
+        }
+        self.wal = None
+        self.snapshot_lsn = 0
+        self.loader = None
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self._snapshot_lock = threading.Lock()
+        self._thread = None
+
+    # Journal protocol, called by InMemoryRepository under its writer lock
+
+    def record_put(self, obj):
+        """Log the current state of an added or updated entity."""
+        self._local.lsn = self.wal.append(PUT, type(obj).__name__, entity_state(obj))
+
+    def record_delete(self, obj):
+        """Log the deletion of an entity."""
+        self._local.lsn = self.wal.append(DELETE, type(obj).__name__, obj.id)
+
+    def wait_durable(self):
+        """Block until every record logged by the calling thread is durable."""
+        lsn = getattr(self._local, 'lsn', None)
+        if lsn is not None:
+            self._local.lsn = None
+            self.wal.wait(lsn)
+
+    # Lifecycle
+
+    def open(self):
+        """
+        Restore the repositories, then journal every further mutation.
+
+        The repositories must be empty. Entities of the snapshot are only
+        decoded when first accessed (or by the warm-up thread), so this
+        returns as soon as the log written after the snapshot is replayed.
+
+        Returns:
+            int: Number of entities restored
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        restored, last_lsn = self._restore()
+        self.wal = WriteAheadLog(self.directory, last_lsn + 1, self.fsync, self.commit_delay)
+        for repository in self.repositories.values():
+            repository.journal = self
+        if self.snapshot_interval or self.snapshot_wal_bytes:
+            self._thread = threading.Thread(target=self._snapshot_loop, name='snapshotter', daemon=True)
+            self._thread.start()
+        if self.loader is not None and self.warm_up:
+            threading.Thread(target=self._warm_up, name='snapshot-warm-up', daemon=True).start()
+        return restored
+
+    def close(self):
+        """Stop journaling and flush the log."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        for repository in self.repositories.values():
+            if repository.journal is self:
+                repository.journal = None
+        if self.wal is not None:
+            self.wal.close()
+
+    # Restore
+
+    def _restore(self):
+        """
+        Attach the latest snapshot and replay the log written after it.
+
+        Returns:
+            tuple: (number of entities restored, last sequence number found)
+        """
+        restored = last_lsn = 0
+        snapshots = _sequence_files(self.directory, 'snapshot-', '.map')
+        if snapshots:
+            self.snapshot_lsn, path = snapshots[-1]
+            snapshot = MappedSnapshot(path)
+            self.loader = SnapshotLoader(snapshot, self.repositories)
+            restored = sum(snapshot.count(kind) for kind in KINDS)
+            last_lsn = self.snapshot_lsn
+
+        skipped = 0
+        for _, path in _sequence_files(self.directory, 'wal-', '.log'):
+            with open(path, 'rb') as file:
+                records, end = read_records(file)
+                torn = end < os.fstat(file.fileno()).st_size
+            if torn:
+                logger.warning("Discarding torn records at the end of %s", path)
+                with open(path, 'r+b') as file:
+                    file.truncate(end)
+            for lsn, op, kind, data in records:
+                if lsn <= self.snapshot_lsn:
+                    continue
+                change = self._apply(op, kind, data)
+                if change is None:
+                    skipped += 1
+                else:
+                    restored += change
+                last_lsn = max(last_lsn, lsn)
+        if skipped:
+            logger.warning("Skipped %d log records referring to missing entities", skipped)
+        return restored, last_lsn
+
+    def _apply(self, op, kind, data):
+        """
+        Replay one log record onto the repositories, keeping the links
+        between entities and the rating aggregates of places up to date.
+
+        Returns:
+            int: Change in the number of entities (1, 0 or -1), or None if
+            the record refers to a missing entity
+        """
+        repository = self.repositories[kind]
+        if op == DELETE:
+            obj = repository.get(data)
+            if obj is None:
+                return 0
+            if kind == 'Review':
+                obj.place.remove_review(obj)
+                if obj in obj.user.reviews:
+                    obj.user.reviews.remove(obj)
+            elif kind == 'Place' and obj in obj.owner.places:
+                obj.owner.places.remove(obj)
+            repository.delete(data)
+            return -1
+
+        obj = repository.get(data[0])
+        created = obj is None
+        if kind == 'Place':
+            owner = self.repositories['User'].get(data[8])
+            if owner is None:
+                return None
+            if created:
+                obj = blank(kind)
+            elif obj._owner is not owner:
+                if obj in obj._owner.places:
+                    obj._owner.places.remove(obj)
+                owner.add_place(obj)
+            assign_state(obj, data)
+            obj._owner = owner
+            amenities = [amenity for amenity in map(self.repositories['Amenity'].get, data[9]) if amenity]
+            obj._amenities = amenities or None
+        elif kind == 'Review':
+            place = self.repositories['Place'].get(data[5])
+            user = self.repositories['User'].get(data[6])
+            if place is None or user is None:
+                return None
+            if created:
+                obj = blank(kind)
+                obj.place, obj.user = place, user
+                assign_state(obj, data)
+            else:
+                old_rating = obj.rating
+                assign_state(obj, data)
+                if obj.rating != old_rating:
+                    place.change_review_rating(old_rating, obj.rating)
+        else:
+            if created:
+                obj = blank(kind)
+            assign_state(obj, data)
+
+        if not created:
+            obj._changed()
+            return 0
+        repository.adopt(obj)
+        if kind == 'Place':
+            obj.owner.add_place(obj)
+        elif kind == 'Review':
+            obj.place.add_review(obj)
+            obj.user.add_review(obj)
+        return 1
+
+    def _warm_up(self):
+        """Decode the rest of the snapshot in the background."""
+        started = time.monotonic()
+        count = self.loader.warm()
+        logger.info("Loaded %d entities from the snapshot in %.1fs", count, time.monotonic() - started)
+
+    # Snapshots
+
+    def snapshot(self):
+        """
+        Write a snapshot and drop the log segments it covers.
+
+        Writers are paused only while the entity states are copied and the
+        log is rotated; encoding and writing happen afterwards. Entities of
+        the previous snapshot that were never accessed are copied from it
+        without being materialized.
+
+        Returns:
+            str: Path of the snapshot, or None if nothing changed since the
+            previous one
+        """
+        with self._snapshot_lock:
+            with self.facade.user_repo.transaction():
+                if self.wal.last_lsn == self.snapshot_lsn:
+                    return None
+                tables = {}
+                for kind in KINDS:
+                    states = [snapshot_state(obj) for obj in self.repositories[kind].get_loaded()]
+                    if self.loader is not None:
+                        states.extend(self.loader.pending_states(kind))
+                    tables[kind] = states
+                lsn = self.wal.rotate()
+
+            path = os.path.join(self.directory, f'snapshot-{lsn:020d}.map')
+            temporary = path + '.tmp'
+            write_snapshot(temporary, lsn, tables)
+            os.replace(temporary, path)
+            _fsync_directory(self.directory)
+            self.snapshot_lsn = lsn
+
+            # The mapped snapshot is kept until the process exits (removing a
+            # mapped file fails on Windows); a later run removes it
+            in_use = self.loader.snapshot.path if self.loader is not None else None
+            for number, old in _sequence_files(self.directory, 'snapshot-', '.map'):
+                if number < lsn and old != in_use:
+                    os.remove(old)
+            for number, old in _sequence_files(self.directory, 'wal-', '.log'):
+                if number <= lsn:
+                    os.remove(old)
+            return path
+
+    def _snapshot_loop(self):
+        """Take snapshots on schedule until the store is closed."""
+        last = time.monotonic()
+        while not self._stop.wait(1.0):
+            due = self.snapshot_interval and time.monotonic() - last >= self.snapshot_interval
+            large = self.snapshot_wal_bytes and self.wal.segment_bytes >= self.snapshot_wal_bytes
+            if due or large:
+                try:
+                    self.snapshot()
+                except OSError:
+                    logger.exception("Snapshot failed")
+                last = time.monotonic()
+
+
+def init_durability(app):
+    """
+    Persist the shared facade when DURABILITY_DIR is configured.
+
+    Restores the facade from disk, journals its repositories and, unless
+    WAL_WAIT_FOR_SYNC is off, holds each response until the request's
+    writes are durable.
+
+    Args:
+        app (Flask): The application
+
+    Returns:
+        DurableStore: The store, or None when durability is disabled
+    """
+    directory = app.config.get('DURABILITY_DIR')
+    if not directory:
+        return None
+
+    from app.services import facade
+    store = facade.user_repo.journal
+    if store is None:
+        store = DurableStore(
+            facade, directory,
+            fsync=app.config['WAL_FSYNC'],
+            commit_delay=app.config['WAL_COMMIT_DELAY_MS'] / 1000.0,
+            snapshot_interval=app.config['SNAPSHOT_INTERVAL'],
+            snapshot_wal_bytes=app.config['SNAPSHOT_WAL_BYTES'],
+            warm_up=app.config['SNAPSHOT_WARM_UP'],
+        )
+        restored = store.open()
+        logger.info("Restored %d entities from %s", restored, directory)
+        atexit.register(store.close)
+    app.extensions['hbnb_durability'] = store
+
+    if app.config['WAL_WAIT_FOR_SYNC']:
+        @app.after_request
+        def wait_for_durability(response):
+            store.wait_durable()
+            return response
+
+    return store
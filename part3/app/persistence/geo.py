@@ -0,0 +1,83 @@
+"""
+Geographic helpers shared by the spatial queries of both repositories.
+"""
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Half the Earth's circumference: no two points are farther apart than this
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Compute the great-circle distance between two points.
+
+    Args:
+        lat1 (float): Latitude of the first point, in degrees
+        lon1 (float): Longitude of the first point, in degrees
+        lat2 (float): Latitude of the second point, in degrees
+        lon2 (float): Longitude of the second point, in degrees
+
+    Returns:
+        float: Distance in kilometers
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def split_box(min_lat, min_lon, max_lat, max_lon):
+    """
+    Split a bounding box crossing the antimeridian into plain boxes.
+
+    A box whose ``min_lon`` is greater than its ``max_lon`` is taken to wrap
+    around longitude 180.
+
+    Returns:
+        list: One or two ``(min_lat, min_lon, max_lat, max_lon)`` tuples
+        with ``min_lon <= max_lon``
+    """
+    if min_lon <= max_lon:
+        return [(min_lat, min_lon, max_lat, max_lon)]
+    return [(min_lat, min_lon, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon)]
+
+
+def radius_boxes(lat, lon, radius_km):
+    """
+    Compute the bounding boxes enclosing a circle on the Earth's surface.
+
+    Points inside the boxes are candidates only; callers must still check
+    the exact distance with haversine_km.
+
+    Args:
+        lat (float): Latitude of the center, in degrees
+        lon (float): Longitude of the center, in degrees
+        radius_km (float): Radius of the circle, in kilometers
+
+    Returns:
+        list: One or two ``(min_lat, min_lon, max_lat, max_lon)`` tuples
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    d_lat = math.degrees(angular)
+    min_lat = lat - d_lat
+    max_lat = lat + d_lat
+
+    # The circle covers a pole: every longitude is a candidate
+    if min_lat <= -90.0 or max_lat >= 90.0 or angular >= math.pi / 2:
+        return [(max(min_lat, -90.0), -180.0, min(max_lat, 90.0), 180.0)]
+
+    ratio = math.sin(angular) / math.cos(math.radians(lat))
+    if ratio >= 1.0:
+        return [(min_lat, -180.0, max_lat, 180.0)]
+    d_lon = math.degrees(math.asin(ratio))
+    min_lon = lon - d_lon
+    max_lon = lon + d_lon
+    if min_lon < -180.0:
+        return split_box(min_lat, min_lon + 360.0, max_lat, max_lon)
+    if max_lon > 180.0:
+        return split_box(min_lat, min_lon, max_lat, max_lon - 360.0)
+    return [(min_lat, min_lon, max_lat, max_lon)]
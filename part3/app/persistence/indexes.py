@@ -0,0 +1,961 @@
+"""
+Secondary indexes for the in-memory repository.
+
+Every index implements the same small protocol so the repository can keep
+it in sync without knowing how it is organised internally:
+
+- ``name``: the name the index is registered under
+- ``check(obj)``: raise ValueError if inserting/updating ``obj`` would
+  violate a constraint enforced by the index
+- ``insert(obj)``: index a newly stored object
+- ``update(obj)``: re-index an object whose attributes may have changed
+- ``remove(obj_id)``: drop an object from the index
+
+Mutations are serialized by the repository's writer lock, but lookups run
+concurrently with them, so lookups never iterate a live container in Python
+code: they copy it first with a single operation that CPython performs
+atomically (slicing, ``list(dict)``, ``list(dict.items())``).
+"""
+import heapq
+import math
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from itertools import compress
+from app.persistence.geo import MAX_DISTANCE_KM, haversine_km, radius_boxes
+from app.persistence.text import B, K1, idf, tokenize
+
+
+class _AfterAll:
+    """Sentinel comparing greater than any object ID, for bisecting past a value."""
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+
+_AFTER_ALL = _AfterAll()
+
+
+def sorted_range(entries, low=None, high=None, after=None, limit=None, reverse=False):
+    """
+    Slice the entries of a sorted ``(value, id)`` list by value.
+
+    Args:
+        entries (list): Entries sorted by ``(value, id)``
+        low: Smallest value to return, or None for no lower bound
+        high: Largest value to return, or None for no upper bound
+        after (tuple): ``(value, id)`` of the last entry already seen, or
+            None to start from the first entry in the requested order
+        limit (int): Maximum number of entries to return
+        reverse (bool): Return the entries in descending order
+
+    Returns:
+        list: ``(value, id)`` pairs with ``low <= value <= high``
+    """
+    start = 0 if low is None else bisect_left(entries, (low,))
+    end = len(entries) if high is None else bisect_right(entries, (high, _AFTER_ALL))
+    if not reverse:
+        if after is not None:
+            start = max(start, bisect_right(entries, after))
+        return entries[start:end if limit is None else min(end, start + limit)]
+    if after is not None:
+        end = min(end, bisect_left(entries, after))
+    return entries[start if limit is None else max(start, end - limit):end][::-1]
+
+
+class HashIndex:
+    """
+    Equality index on a single attribute.
+
+    Maps attribute values to the IDs of the objects holding them, so that
+    ``get_by_attribute`` lookups are O(1) instead of a full scan.
+    """
+
+    def __init__(self, attr_name, unique=False):
+        """
+        Initialize the index.
+
+        Args:
+            attr_name (str): The attribute to index
+            unique (bool): Whether two objects may share the same value
+        """
+        self.name = attr_name
+        self.attr_name = attr_name
+        self.unique = unique
+        self._entries = {}  # value -> id (unique) or dict of ids (non-unique)
+        self._keys = {}  # id -> indexed value, used to find stale entries
+
+    def key(self, obj):
+        """Return the indexed value of an object."""
+        return getattr(obj, self.attr_name, None)
+
+    def check(self, obj):
+        """
+        Ensure an object does not violate the uniqueness constraint.
+
+        Args:
+            obj: The object about to be inserted or re-indexed
+
+        Raises:
+            ValueError: If another object already holds the same value
+        """
+        if not self.unique:
+            return
+        value = self.key(obj)
+        if value is None:
+            return
+        holder = self._entries.get(value)
+        if holder is not None and holder != obj.id:
+            raise ValueError(f"Duplicate value for unique attribute '{self.attr_name}'")
+
+    def insert(self, obj):
+        """Add an object to the index."""
+        value = self.key(obj)
+        self._keys[obj.id] = value
+        if self.unique:
+            self._entries[value] = obj.id
+        else:
+            self._entries.setdefault(value, {})[obj.id] = None
+
+    def update(self, obj):
+        """Move an object to its new key if the indexed value changed."""
+        if obj.id in self._keys and self._keys[obj.id] == self.key(obj):
+            return
+        self.remove(obj.id)
+        self.insert(obj)
+
+    def remove(self, obj_id):
+        """Drop an object from the index."""
+        if obj_id not in self._keys:
+            return
+        value = self._keys.pop(obj_id)
+        if self.unique:
+            if self._entries.get(value) == obj_id:
+                del self._entries[value]
+        else:
+            ids = self._entries.get(value)
+            if ids is not None:
+                ids.pop(obj_id, None)
+                if not ids:
+                    del self._entries[value]
+
+    def lookup(self, value):
+        """
+        Return the IDs of the objects holding a value.
+
+        Args:
+            value: The value to look up
+
+        Returns:
+            list: Matching object IDs, in insertion order
+        """
+        entry = self._entries.get(value)
+        if entry is None:
+            return []
+        if self.unique:
+            return [entry]
+        return list(entry)
+
+
+class SortedIndex:
+    """
+    Ordered index on a single attribute.
+
+    Keeps ``(value, id)`` pairs in a sorted list so that ordered scans and
+    keyset pagination cost O(log n + k). Ties are broken by object ID.
+    """
+
+    def __init__(self, attr_name):
+        """
+        Initialize the index.
+
+        Args:
+            attr_name (str): The attribute to order by
+        """
+        self.name = attr_name
+        self.attr_name = attr_name
+        self._entries = []  # sorted list of (value, id)
+        self._keys = {}  # id -> indexed value
+
+    def key(self, obj):
+        """Return the indexed value of an object."""
+        return getattr(obj, self.attr_name, None)
+
+    def __len__(self):
+        """Return the number of indexed objects."""
+        return len(self._entries)
+
+    def check(self, obj):
+        """
+        Reject objects without a value, which cannot be ordered.
+
+        Raises:
+            ValueError: If the indexed attribute is None
+        """
+        if self.key(obj) is None:
+            raise ValueError(f"Cannot index a missing {self.attr_name}")
+
+    def insert(self, obj):
+        """Add an object to the index."""
+        value = self.key(obj)
+        self._keys[obj.id] = value
+        insort(self._entries, (value, obj.id))
+
+    def update(self, obj):
+        """Move an object to its new position if the indexed value changed."""
+        if obj.id in self._keys and self._keys[obj.id] == self.key(obj):
+            return
+        self.remove(obj.id)
+        self.insert(obj)
+
+    def remove(self, obj_id):
+        """Drop an object from the index."""
+        if obj_id not in self._keys:
+            return
+        entry = (self._keys.pop(obj_id), obj_id)
+        position = bisect_left(self._entries, entry)
+        if position < len(self._entries) and self._entries[position] == entry:
+            del self._entries[position]
+
+    def lookup(self, value):
+        """
+        Return the IDs of the objects holding a value.
+
+        Args:
+            value: The value to look up
+
+        Returns:
+            list: Matching object IDs, ordered by ID
+        """
+        entries = self._entries
+        start = bisect_left(entries, (value,))
+        end = bisect_right(entries, (value, _AFTER_ALL))
+        return [obj_id for entry_value, obj_id in entries[start:end] if entry_value == value]
+
+    def after(self, value=None, obj_id=None, limit=None):
+        """
+        Return the entries that sort strictly after ``(value, obj_id)``.
+
+        Args:
+            value: Indexed value of the last entry already seen, or None to
+                start from the beginning
+            obj_id (str): ID of the last entry already seen
+            limit (int): Maximum number of entries to return
+
+        Returns:
+            list: ``(value, id)`` pairs in index order
+        """
+        start = 0 if value is None else bisect_right(self._entries, (value, obj_id))
+        end = len(self._entries) if limit is None else start + limit
+        return self._entries[start:end]
+
+    def range(self, low=None, high=None, after=None, limit=None, reverse=False):
+        """
+        Return the entries with ``low <= value <= high`` in O(log n + k).
+
+        See sorted_range() for the arguments.
+
+        Returns:
+            list: ``(value, id)`` pairs in index order (reversed if asked)
+        """
+        return sorted_range(self._entries, low, high, after, limit, reverse)
+
+    def count(self, low=None, high=None):
+        """Return the number of entries with ``low <= value <= high``, in O(log n)."""
+        entries = self._entries
+        start = 0 if low is None else bisect_left(entries, (low,))
+        end = len(entries) if high is None else bisect_right(entries, (high, _AFTER_ALL))
+        return max(end - start, 0)
+
+    def histogram(self, edges, low=None, high=None):
+        """
+        Count the entries per bucket of values, in O(buckets * log n).
+
+        Args:
+            edges (list): Ascending lower edges of the buckets; bucket ``i``
+                holds ``edges[i] <= value < edges[i + 1]`` and the last one
+                every value from ``edges[-1]`` up (values below ``edges[0]``
+                are not counted)
+            low: Only count values from this one up
+            high: Only count values up to this one
+
+        Returns:
+            list: Number of entries per bucket
+        """
+        entries = self._entries
+        start = 0 if low is None else bisect_left(entries, (low,))
+        end = len(entries) if high is None else bisect_right(entries, (high, _AFTER_ALL))
+        positions = [min(max(bisect_left(entries, (edge,)), start), end) for edge in edges]
+        positions.append(max(end, positions[-1]))
+        return [positions[i + 1] - positions[i] for i in range(len(edges))]
+
+
+class GridIndex:
+    """
+    Spatial index bucketing points into fixed-size latitude/longitude cells.
+
+    Box queries only visit the cells overlapping the box, so searching an
+    area costs roughly the number of places inside it rather than the
+    number of places stored.
+    """
+
+    def __init__(self, lat_attr='latitude', lon_attr='longitude', cell_size=0.5, name='location'):
+        """
+        Initialize the index.
+
+        Args:
+            lat_attr (str): Attribute holding the latitude
+            lon_attr (str): Attribute holding the longitude
+            cell_size (float): Cell edge length, in degrees
+            name (str): Name the index is registered under
+        """
+        self.name = name
+        self.lat_attr = lat_attr
+        self.lon_attr = lon_attr
+        self.cell_size = cell_size
+        self._cells = {}  # (row, col) -> {id: (lat, lon)}
+        self._keys = {}  # id -> (lat, lon) or None when not located
+
+    def key(self, obj):
+        """Return the ``(lat, lon)`` of an object, or None if incomplete."""
+        lat = getattr(obj, self.lat_attr, None)
+        lon = getattr(obj, self.lon_attr, None)
+        if lat is None or lon is None:
+            return None
+        return (lat, lon)
+
+    def _cell(self, lat, lon):
+        """Return the cell containing a point."""
+        return (math.floor(lat / self.cell_size), math.floor(lon / self.cell_size))
+
+    def check(self, obj):
+        """Spatial indexes enforce no constraint."""
+
+    def insert(self, obj):
+        """Add an object to the index."""
+        point = self.key(obj)
+        self._keys[obj.id] = point
+        if point is not None:
+            self._cells.setdefault(self._cell(*point), {})[obj.id] = point
+
+    def update(self, obj):
+        """Move an object to its new cell if its coordinates changed."""
+        if obj.id in self._keys and self._keys[obj.id] == self.key(obj):
+            return
+        self.remove(obj.id)
+        self.insert(obj)
+
+    def remove(self, obj_id):
+        """Drop an object from the index."""
+        point = self._keys.pop(obj_id, None)
+        if point is None:
+            return
+        cell_key = self._cell(*point)
+        cell = self._cells.get(cell_key)
+        if cell is not None:
+            cell.pop(obj_id, None)
+            if not cell:
+                del self._cells[cell_key]
+
+    def within_box(self, min_lat, min_lon, max_lat, max_lon):
+        """
+        Return the IDs of the points inside a bounding box.
+
+        The box must not cross the antimeridian (see geo.split_box).
+
+        Returns:
+            list: Matching object IDs
+        """
+        min_row, min_col = self._cell(min_lat, min_lon)
+        max_row, max_col = self._cell(max_lat, max_lon)
+        span = (max_row - min_row + 1) * (max_col - min_col + 1)
+        if span > len(self._cells):
+            # Sparse data: walking the occupied cells is cheaper
+            cells = [
+                cell for (row, col), cell in list(self._cells.items())
+                if min_row <= row <= max_row and min_col <= col <= max_col
+            ]
+        else:
+            get = self._cells.get
+            cells = [
+                cell
+                for row in range(min_row, max_row + 1)
+                for col in range(min_col, max_col + 1)
+                for cell in (get((row, col)),)
+                if cell is not None
+            ]
+        return [
+            obj_id
+            for cell in cells
+            for obj_id, (lat, lon) in list(cell.items())
+            if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
+        ]
+
+    def within_radius(self, lat, lon, radius_km):
+        """
+        Return the points within a distance of a center, nearest first.
+
+        Args:
+            lat (float): Latitude of the center
+            lon (float): Longitude of the center
+            radius_km (float): Search radius, in kilometers
+
+        Returns:
+            list: ``(distance_km, id)`` pairs sorted by distance
+        """
+        matches = []
+        for box in radius_boxes(lat, lon, radius_km):
+            for obj_id in self.within_box(*box):
+                point = self._keys.get(obj_id)
+                if point is None:
+                    continue  # Removed since within_box ran
+                distance = haversine_km(lat, lon, *point)
+                if distance <= radius_km:
+                    matches.append((distance, obj_id))
+        matches.sort()
+        return matches
+
+    def nearest(self, lat, lon, k, within=None):
+        """
+        Return the ``k`` points nearest to a location.
+
+        Searches growing radii starting from one cell, so the cost depends
+        on the local density rather than the total number of points.
+
+        Args:
+            within (container): Only consider the points whose IDs it
+                contains; all when None
+
+        Returns:
+            list: Up to ``k`` ``(distance_km, id)`` pairs sorted by distance
+        """
+        radius_km = self.cell_size * 111.0
+        while True:
+            matches = self.within_radius(lat, lon, radius_km)
+            if within is not None:
+                matches = [match for match in matches if match[1] in within]
+            if len(matches) >= k or radius_km >= MAX_DISTANCE_KM:
+                return matches[:k]
+            radius_km = min(radius_km * 2, MAX_DISTANCE_KM)
+
+
+class TextIndex:
+    """
+    Full-text inverted index ranking documents with BM25.
+
+    Each object is a document made of weighted text attributes. Objects of
+    another repository can contribute text to the documents through a
+    linked index (see linked()), e.g. reviews to the document of their
+    place, so that one ranking covers both. The index only keeps the
+    postings (term -> {document ID: weighted term count}) and, for each
+    contributing object, the strings it last contributed; updates tokenize
+    the old and new text of that one object only.
+    """
+
+    def __init__(self, fields, name='text', max_expansions=50, min_prefix=3):
+        """
+        Initialize the index.
+
+        Args:
+            fields (dict): Maps the text attributes to their integer weight
+                (how many times each occurrence of a term is counted)
+            name (str): Name the index is registered under
+            max_expansions (int): Maximum number of terms the last word of a
+                query is expanded to as a prefix
+            min_prefix (int): Minimum length of a last word to be expanded;
+                shorter ones only match exactly
+        """
+        self.name = name
+        self.fields = fields
+        self.max_expansions = max_expansions
+        self.min_prefix = min_prefix
+        self._postings = {}  # term -> {document id: weighted count}
+        self._lengths = {}  # document id -> weighted number of terms
+        self._sources = {}  # contributing object id -> (document id, field values)
+        self._vocabulary = []  # sorted terms, for prefix matching
+        self._total_length = 0
+
+    def key(self, obj):
+        """Return the values of an object's text attributes."""
+        return tuple(getattr(obj, attr_name, None) for attr_name in self.fields)
+
+    def check(self, obj):
+        """Text indexes enforce no constraint."""
+
+    def insert(self, obj):
+        """Add an object to the index as its own document."""
+        self._contribute(obj.id, obj.id, self.fields, self.key(obj))
+
+    def update(self, obj):
+        """Re-index an object if its text changed."""
+        self._contribute(obj.id, obj.id, self.fields, self.key(obj))
+
+    def remove(self, obj_id):
+        """Drop an object's text from the index."""
+        self._withdraw(obj_id, self.fields)
+
+    def linked(self, fields, doc_attr, name=None):
+        """
+        Create an index adding other objects' text to this index's documents.
+
+        Args:
+            fields (dict): Text attributes of the other objects and their
+                weights
+            doc_attr (str): Attribute of the other objects holding the ID
+                of the document they contribute to
+            name (str): Name the linked index is registered under
+
+        Returns:
+            LinkedTextIndex: The index, to register with the other objects'
+            repository
+        """
+        return LinkedTextIndex(self, fields, doc_attr, name or f'{self.name}_{doc_attr}')
+
+    def _counts(self, fields, values):
+        """Return the weighted term counts of a contribution."""
+        counts = Counter()
+        for weight, value in zip(fields.values(), values):
+            terms = Counter(tokenize(value))
+            if weight != 1:
+                for term in terms:
+                    terms[term] *= weight
+            counts.update(terms)
+        return counts
+
+    def _contribute(self, source_id, doc_id, fields, values):
+        """Replace the text an object contributes to a document."""
+        previous = self._sources.get(source_id)
+        if previous is not None:
+            if previous == (doc_id, values):
+                return
+            self._withdraw(source_id, fields)
+        self._sources[source_id] = (doc_id, values)
+        counts = self._counts(fields, values)
+        for term, count in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._vocabulary, term)
+            postings[doc_id] = postings.get(doc_id, 0) + count
+        length = sum(counts.values())
+        self._lengths[doc_id] = self._lengths.get(doc_id, 0) + length
+        self._total_length += length
+
+    def _withdraw(self, source_id, fields):
+        """Remove the text an object contributed."""
+        previous = self._sources.pop(source_id, None)
+        if previous is None:
+            return
+        doc_id, values = previous
+        counts = self._counts(fields, values)
+        for term, count in counts.items():
+            postings = self._postings[term]
+            remaining = postings[doc_id] - count
+            if remaining:
+                postings[doc_id] = remaining
+                continue
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect_left(self._vocabulary, term)]
+        length = sum(counts.values())
+        remaining = self._lengths[doc_id] - length
+        if remaining:
+            self._lengths[doc_id] = remaining
+        else:
+            del self._lengths[doc_id]
+        self._total_length -= length
+
+    def expand(self, prefix):
+        """
+        Return the indexed terms starting with a prefix.
+
+        Returns:
+            list: Up to ``max_expansions`` terms, in alphabetical order (only
+            the prefix itself if shorter than ``min_prefix``)
+        """
+        if len(prefix) < self.min_prefix:
+            return [prefix] if prefix in self._postings else []
+        vocabulary = self._vocabulary
+        start = bisect_left(vocabulary, prefix)
+        return [
+            term for term in vocabulary[start:start + self.max_expansions]
+            if term.startswith(prefix)
+        ]
+
+    def search(self, query, limit, within=None):
+        """
+        Rank the documents matching a query.
+
+        Documents matching any term of the query are scored with BM25; the
+        last term also matches the indexed terms it is a prefix of (a
+        document scores its best matching expansion), so partially typed
+        queries find results.
+
+        Terms are scored rarest first. Once the terms left could not lift a
+        document that matched none of the previous ones into the top
+        ``limit`` (the sum of their maximum scores is below the current
+        ``limit``-th score), their postings are only probed for the
+        documents already found instead of being scanned (MaxScore).
+
+        Args:
+            query (str): The query text
+            limit (int): Maximum number of documents to return
+            within (container): Only rank the documents whose IDs it
+                contains (e.g. a bitmap Selection); all when None
+
+        Returns:
+            list: Up to ``limit`` ``(score, id)`` pairs, best first
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        documents = len(self._lengths)
+        if not terms or not documents or limit < 1:
+            return []
+        lengths_get = self._lengths.get
+        base = K1 * (1.0 - B)
+        scale = K1 * B * documents / max(self._total_length, 1)
+
+        # Each group is scored by its best term: (maximum score, [(weight, postings)])
+        groups = []
+        for group in [[term] for term in terms[:-1]] + [self.expand(terms[-1]) or [terms[-1]]]:
+            lists = []
+            for term in group:
+                postings = self._postings.get(term)
+                if postings:
+                    lists.append((idf(documents, len(postings)) * (K1 + 1.0), postings))
+            if lists:
+                groups.append((max(weight for weight, _ in lists), lists))
+        groups.sort(key=lambda group: group[0], reverse=True)
+
+        scores = {}
+        remaining = sum(bound for bound, _ in groups)
+        for bound, lists in groups:
+            threshold = heapq.nlargest(limit, scores.values())[-1] if len(scores) >= limit else 0.0
+            exhaustive = remaining > threshold
+            remaining -= bound
+            # A single term adds to the scores directly; expansions keep their best
+            best = scores if len(lists) == 1 else {}
+            best_get = best.get
+            for weight, postings in lists:
+                if exhaustive:
+                    entries = list(postings.items())
+                    if within is not None:
+                        entries = [entry for entry in entries if entry[0] in within]
+                else:
+                    get = postings.get
+                    entries = [(doc_id, count) for doc_id in list(scores) for count in (get(doc_id),) if count]
+                for doc_id, count in entries:
+                    length = lengths_get(doc_id)
+                    if length is None:
+                        continue  # Removed since the postings were copied
+                    score = weight * count / (count + base + scale * length)
+                    if best is scores:
+                        scores[doc_id] = best_get(doc_id, 0.0) + score
+                    elif score > best_get(doc_id, 0.0):
+                        best[doc_id] = score
+            if best is not scores:
+                for doc_id, score in best.items():
+                    scores[doc_id] = scores.get(doc_id, 0.0) + score
+        return heapq.nlargest(limit, ((score, doc_id) for doc_id, score in scores.items()))
+
+
+class LinkedTextIndex:
+    """
+    Adds the text of one repository's objects to the documents of a
+    TextIndex registered with another repository (see TextIndex.linked).
+    """
+
+    def __init__(self, target, fields, doc_attr, name):
+        """
+        Initialize the index.
+
+        Args:
+            target (TextIndex): Index holding the documents
+            fields (dict): Text attributes and their weights
+            doc_attr (str): Attribute holding the document ID
+            name (str): Name the index is registered under
+        """
+        self.name = name
+        self.target = target
+        self.fields = fields
+        self.doc_attr = doc_attr
+
+    def key(self, obj):
+        """Return the values of an object's text attributes."""
+        return tuple(getattr(obj, attr_name, None) for attr_name in self.fields)
+
+    def check(self, obj):
+        """Text indexes enforce no constraint."""
+
+    def insert(self, obj):
+        """Add an object's text to its document."""
+        self.target._contribute(obj.id, getattr(obj, self.doc_attr), self.fields, self.key(obj))
+
+    def update(self, obj):
+        """Re-index an object if its text or document changed."""
+        self.target._contribute(obj.id, getattr(obj, self.doc_attr), self.fields, self.key(obj))
+
+    def remove(self, obj_id):
+        """Drop an object's text from its document."""
+        self.target._withdraw(obj_id, self.fields)
+
+
+_CHUNK_BITS = 16  # Bitmaps are split into chunks of 2**16 ordinals
+_BIT_FLAGS = bytes.maketrans(b'01', b'\x00\x01')
+
+
+class Selection:
+    """
+    Set of objects of a BitmapIndex, as a compressed bitmap of ordinals.
+
+    The bitmap maps chunk numbers to Python integers whose bits are the
+    ordinals of the chunk, so set operations and counts run on machine words
+    in C (roaring-style, with every chunk stored as a bitmap).
+    """
+
+    __slots__ = ('index', 'chunks')
+
+    def __init__(self, index, chunks):
+        """
+        Args:
+            index (BitmapIndex): Index the ordinals belong to
+            chunks (dict): Maps chunk numbers to non-zero bitmaps
+        """
+        self.index = index
+        self.chunks = chunks
+
+    def __len__(self):
+        """Return the number of selected objects."""
+        return sum(bits.bit_count() for bits in self.chunks.values())
+
+    def __and__(self, other):
+        """Return the objects selected by both selections."""
+        return Selection(self.index, _intersect(self.chunks, other.chunks))
+
+    def __contains__(self, obj_id):
+        """Return whether an object is selected."""
+        ordinal = self.index._ordinals.get(obj_id)
+        if ordinal is None:
+            return False
+        return bool(self.chunks.get(ordinal >> _CHUNK_BITS, 0) >> (ordinal & 0xFFFF) & 1)
+
+    def ids(self):
+        """
+        Return the IDs of the selected objects.
+
+        Returns:
+            list: Object IDs, in ordinal order
+        """
+        ids = self.index._ids
+        result = []
+        for chunk in sorted(self.chunks):
+            # One flag byte per ordinal, lowest first, so that the set bits
+            # are picked out in C rather than one big-int operation each
+            flags = bin(self.chunks[chunk])[:1:-1].encode().translate(_BIT_FLAGS)
+            base = chunk << _CHUNK_BITS
+            result.extend(compress(ids[base:base + len(flags)], flags))
+        return [obj_id for obj_id in result if obj_id is not None]
+
+
+def _intersect(a, b):
+    """AND of two chunked bitmaps."""
+    if len(a) > len(b):
+        a, b = b, a
+    result = {}
+    for chunk, bits in a.items():
+        bits &= b.get(chunk, 0)
+        if bits:
+            result[chunk] = bits
+    return result
+
+
+def _union(a, b):
+    """OR of two chunked bitmaps."""
+    result = dict(a)
+    for chunk, bits in b.items():
+        result[chunk] = result.get(chunk, 0) | bits
+    return result
+
+
+def _subtract(a, b):
+    """AND NOT of two chunked bitmaps."""
+    result = {}
+    for chunk, bits in a.items():
+        bits &= ~b.get(chunk, 0)
+        if bits:
+            result[chunk] = bits
+    return result
+
+
+class BitmapIndex:
+    """
+    Bitmap index on a multi-valued attribute, e.g. the amenities of a place.
+
+    Each object gets a dense integer ordinal, and each value a bitmap of the
+    ordinals of the objects holding it, so "holding all of / any of / none
+    of these values" filters are computed with AND/OR/AND NOT over the
+    bitmaps, and facet counts (how many selected objects hold each value)
+    with popcounts, without visiting the objects.
+    """
+
+    def __init__(self, attr_name):
+        """
+        Initialize the index.
+
+        Args:
+            attr_name (str): Attribute holding an iterable of values
+        """
+        self.name = attr_name
+        self.attr_name = attr_name
+        self._ordinals = {}  # id -> ordinal
+        self._ids = []  # ordinal -> id, or None once released
+        self._free = []  # released ordinals, reused first
+        self._keys = {}  # id -> frozenset of values
+        self._bitmaps = {}  # value -> {chunk: bits}
+        self._all = {}  # {chunk: bits} of every indexed object
+
+    def key(self, obj):
+        """Return the set of values an object holds."""
+        return frozenset(getattr(obj, self.attr_name, None) or ())
+
+    def check(self, obj):
+        """Bitmap indexes enforce no constraint."""
+
+    @staticmethod
+    def _set(bitmap, ordinal):
+        """Set one bit of a chunked bitmap."""
+        chunk = ordinal >> _CHUNK_BITS
+        bitmap[chunk] = bitmap.get(chunk, 0) | 1 << (ordinal & 0xFFFF)
+
+    @staticmethod
+    def _clear(bitmap, ordinal):
+        """Clear one bit of a chunked bitmap."""
+        chunk = ordinal >> _CHUNK_BITS
+        bits = bitmap.get(chunk, 0) & ~(1 << (ordinal & 0xFFFF))
+        if bits:
+            bitmap[chunk] = bits
+        else:
+            bitmap.pop(chunk, None)
+
+    def insert(self, obj):
+        """Add an object to the index."""
+        if self._free:
+            ordinal = self._free.pop()
+            self._ids[ordinal] = obj.id
+        else:
+            ordinal = len(self._ids)
+            self._ids.append(obj.id)
+        self._ordinals[obj.id] = ordinal
+        values = self._keys[obj.id] = self.key(obj)
+        self._set(self._all, ordinal)
+        for value in values:
+            self._set(self._bitmaps.setdefault(value, {}), ordinal)
+
+    def update(self, obj):
+        """Set and clear the object's bits for the values it gained and lost."""
+        previous = self._keys.get(obj.id)
+        if previous is None:
+            self.insert(obj)
+            return
+        values = self.key(obj)
+        if values == previous:
+            return
+        ordinal = self._ordinals[obj.id]
+        for value in previous - values:
+            self._clear_value(value, ordinal)
+        for value in values - previous:
+            self._set(self._bitmaps.setdefault(value, {}), ordinal)
+        self._keys[obj.id] = values
+
+    def _clear_value(self, value, ordinal):
+        """Clear an ordinal from a value's bitmap, dropping empty bitmaps."""
+        bitmap = self._bitmaps.get(value)
+        if bitmap is not None:
+            self._clear(bitmap, ordinal)
+            if not bitmap:
+                del self._bitmaps[value]
+
+    def remove(self, obj_id):
+        """Drop an object from the index and release its ordinal."""
+        values = self._keys.pop(obj_id, None)
+        if values is None:
+            return
+        ordinal = self._ordinals.pop(obj_id)
+        for value in values:
+            self._clear_value(value, ordinal)
+        self._clear(self._all, ordinal)
+        self._ids[ordinal] = None
+        self._free.append(ordinal)
+
+    def select(self, all_of=(), any_of=(), none_of=()):
+        """
+        Select the objects by the values they hold.
+
+        Args:
+            all_of (iterable): Values every selected object holds
+            any_of (iterable): Values of which selected objects hold at
+                least one (ignored when empty)
+            none_of (iterable): Values no selected object holds
+
+        Returns:
+            Selection: The selected objects
+        """
+        def bitmap(value):
+            return dict(self._bitmaps.get(value, ()))  # Copied: writers mutate it
+
+        chunks = dict(self._all)
+        # Rarest values first keeps the intermediate bitmaps small
+        for required in sorted(map(bitmap, all_of), key=len):
+            chunks = _intersect(chunks, required)
+        if any_of:
+            union = {}
+            for value in any_of:
+                union = _union(union, bitmap(value))
+            chunks = _intersect(chunks, union)
+        for value in none_of:
+            chunks = _subtract(chunks, bitmap(value))
+        return Selection(self, chunks)
+
+    def selection_of(self, obj_ids):
+        """
+        Select objects by ID, e.g. to combine another index's results with
+        a select() result.
+
+        Args:
+            obj_ids (iterable): IDs of the objects to select (IDs the index
+                does not hold are ignored)
+
+        Returns:
+            Selection: The objects
+        """
+        ordinals = self._ordinals
+        digits = {}  # chunk -> one b'0'/b'1' digit per ordinal, lowest first
+        for obj_id in obj_ids:
+            ordinal = ordinals.get(obj_id)
+            if ordinal is None:
+                continue
+            chunk = digits.get(ordinal >> _CHUNK_BITS)
+            if chunk is None:
+                chunk = digits[ordinal >> _CHUNK_BITS] = bytearray(b'0' * (1 << _CHUNK_BITS))
+            chunk[ordinal & 0xFFFF] = 0x31
+        return Selection(self, {chunk: int(bits[::-1], 2) for chunk, bits in digits.items()})
+
+    def facets(self, selection):
+        """
+        Count the selected objects holding each value.
+
+        Args:
+            selection (Selection): Objects to count, from select()
+
+        Returns:
+            dict: Maps every value held by a selected object to the number
+            of selected objects holding it
+        """
+        counts = {}
+        for value, bitmap in list(self._bitmaps.items()):
+            count = sum(bits.bit_count() for bits in _intersect(selection.chunks, dict(bitmap)).values())
+            if count:
+                counts[value] = count
+        return counts
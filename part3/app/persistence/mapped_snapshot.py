@@ -0,0 +1,482 @@
+"""
+Memory-mapped entity snapshots, decoded lazily.
+
+A snapshot file is laid out so that it can be used in place through
+``mmap`` instead of being decoded up front. For every entity kind it holds:
+
+    <Kind>.data     the ``marshal``-encoded states (see records.py), ordered
+                    by ``(created_at_us, id)``
+    <Kind>.rows     one fixed-size row per state, in the same order:
+                    ``<created_at_us, offset, length>``; a state's position
+                    in this table is its ordinal
+    <Kind>.<attr>   one table per attribute listed in records.KEYS (the ID,
+                    unique attributes and references to other entities):
+                    ``<hash of the value, ordinal>`` rows sorted by hash
+
+A header and a section directory locate the tables. Looking up an entity by
+ID, a user by email or the reviews of a place is a binary search in a table
+followed by decoding the matching states only, and keyset pagination is a
+binary search in the rows table. Hash collisions are resolved by comparing
+the decoded state's value.
+
+Opening a snapshot costs a few system calls whatever its size, so a server
+restarted from one answers requests immediately; entities are decoded on
+first access (see SnapshotLoader) and the pages holding them are read from
+disk on demand. The mapping is read-only and backed by the file, so worker
+processes mapping the same snapshot share one copy of it in the page cache.
+
+Snapshots are written to a temporary file, fsynced and renamed into place,
+so a crash never leaves a partial snapshot behind and records carry no
+checksums.
+"""
+import hashlib
+import heapq
+import marshal
+import mmap
+import os
+import struct
+
+from app.persistence.records import KEYS, KINDS, PLACE_AGGREGATES, assign_state, blank
+
+MAGIC = b'HBNBMAP1'
+
+_HEADER = struct.Struct('<8sQI4x')  # magic, lsn, number of sections
+_SECTION = struct.Struct('<24sQQQ')  # name, offset, length, rows
+_ROW = struct.Struct('<qQI4x')  # created_at_us, offset in the data section, length
+_KEY = struct.Struct('<QI4x')  # hash of the value, ordinal
+_ALIGNMENT = 8
+
+# Lazily allocated lists of related entities: (kind, slot) -> (related kind, attribute)
+RELATIONS = {
+    ('User', '_places'): ('Place', 'owner_id'),
+    ('User', '_reviews'): ('Review', 'user_id'),
+    ('Place', '_reviews'): ('Review', 'place_id'),
+}
+
+# Entities materialized per lock acquisition by SnapshotLoader.load_all
+LOAD_BATCH = 1000
+
+
+def key_hash(value):
+    """Return the stable 64-bit hash a key table stores for a value."""
+    digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def write_snapshot(path, lsn, tables):
+    """
+    Write a snapshot file.
+
+    Args:
+        path (str): File to create
+        lsn (int): Log sequence number the snapshot is consistent with
+        tables (dict): Maps each kind to a list of snapshot states (see
+            records.snapshot_state)
+    """
+    sections = []
+    for kind in KINDS:
+        states = sorted(tables.get(kind, ()), key=lambda state: (state[1], state[0]))
+        payloads = [marshal.dumps(state) for state in states]
+        rows, offset = [], 0
+        for state, payload in zip(states, payloads):
+            rows.append(_ROW.pack(state[1], offset, len(payload)))
+            offset += len(payload)
+        sections.append((f'{kind}.data', b''.join(payloads), len(states)))
+        sections.append((f'{kind}.rows', b''.join(rows), len(states)))
+        for attr, position in KEYS[kind].items():
+            keys = sorted(
+                (key_hash(state[position]), ordinal)
+                for ordinal, state in enumerate(states)
+                if state[position] is not None
+            )
+            sections.append((f'{kind}.{attr}', b''.join(_KEY.pack(*key) for key in keys), len(keys)))
+
+    offset = _HEADER.size + _SECTION.size * len(sections)
+    directory = []
+    for name, data, rows in sections:
+        offset += -offset % _ALIGNMENT
+        directory.append(_SECTION.pack(name.encode('ascii'), offset, len(data), rows))
+        offset += len(data)
+
+    with open(path, 'wb') as file:
+        file.write(_HEADER.pack(MAGIC, lsn, len(sections)))
+        file.write(b''.join(directory))
+        for _, data, _ in sections:
+            file.write(b'\0' * (-file.tell() % _ALIGNMENT))
+            file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+
+
+class MappedSnapshot:
+    """
+    Read-only view of a snapshot file through a memory mapping.
+    """
+
+    def __init__(self, path):
+        """
+        Map a snapshot file.
+
+        Args:
+            path (str): The snapshot file
+
+        Raises:
+            ValueError: If the file is not a snapshot or is truncated
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError(f"Not a snapshot file: {path}")
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.lsn, count = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"Not a snapshot file: {path}")
+        self._sections = {}
+        for i in range(count):
+            name, offset, length, rows = _SECTION.unpack_from(self._map, _HEADER.size + i * _SECTION.size)
+            if offset + length > size:
+                self._map.close()
+                raise ValueError(f"Truncated snapshot file: {path}")
+            self._sections[name.rstrip(b'\0').decode('ascii')] = (offset, rows)
+
+    def close(self):
+        """Unmap the file."""
+        self._map.close()
+
+    def count(self, kind):
+        """Return the number of entities of a kind."""
+        return self._sections[f'{kind}.rows'][1]
+
+    def created_at_us(self, kind, ordinal):
+        """Return the creation time of the entity at an ordinal."""
+        return _ROW.unpack_from(self._map, self._sections[f'{kind}.rows'][0] + ordinal * _ROW.size)[0]
+
+    def state(self, kind, ordinal):
+        """
+        Decode the state of the entity at an ordinal.
+
+        Returns:
+            tuple: The snapshot state
+        """
+        _, offset, length = _ROW.unpack_from(self._map, self._sections[f'{kind}.rows'][0] + ordinal * _ROW.size)
+        start = self._sections[f'{kind}.data'][0] + offset
+        return marshal.loads(self._map[start:start + length])
+
+    def indexed(self, kind, attr):
+        """Return whether the snapshot has a key table for an attribute."""
+        return f'{kind}.{attr}' in self._sections
+
+    def find(self, kind, attr, value):
+        """
+        Look up the entities holding a value.
+
+        Args:
+            kind (str): Entity kind
+            attr (str): Attribute with a key table (see indexed())
+            value: The value to look up
+
+        Returns:
+            list: ``(ordinal, state)`` pairs, in creation order
+        """
+        offset, rows = self._sections[f'{kind}.{attr}']
+        position = KEYS[kind][attr]
+        target = key_hash(value)
+        low, high = 0, rows
+        while low < high:
+            middle = (low + high) // 2
+            if _KEY.unpack_from(self._map, offset + middle * _KEY.size)[0] < target:
+                low = middle + 1
+            else:
+                high = middle
+        found = []
+        while low < rows:
+            digest, ordinal = _KEY.unpack_from(self._map, offset + low * _KEY.size)
+            if digest != target:
+                break
+            state = self.state(kind, ordinal)
+            if state[position] == value:
+                found.append((ordinal, state))
+            low += 1
+        return found
+
+    def first_created(self, kind, created_at_us):
+        """Return the ordinal of the first entity created at or after a time."""
+        low, high = 0, self.count(kind)
+        while low < high:
+            middle = (low + high) // 2
+            if self.created_at_us(kind, middle) < created_at_us:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+
+class SnapshotLoader:
+    """
+    Materializes the entities of a mapped snapshot into a facade's
+    repositories on first access.
+
+    Every repository gets a SnapshotSource as its ``source``; the repository
+    asks it for the entities it does not hold yet (by ID, by indexed
+    attribute, by page), and entities ask it for their lazily allocated
+    lists of related entities. Once an entity has been materialized the
+    repository owns it, and the snapshot's copy is ignored from then on, so
+    updates and deletions only ever apply to repository objects.
+
+    Queries the snapshot has no table for (full listings, spatial search)
+    materialize every entity of the kind first. warm() materializes
+    everything and then detaches the sources.
+    """
+
+    def __init__(self, snapshot, repositories):
+        """
+        Attach a snapshot to empty repositories.
+
+        Args:
+            snapshot (MappedSnapshot): The snapshot
+            repositories (dict): Maps each kind to its InMemoryRepository;
+                the repositories must share their writer lock
+        """
+        self.snapshot = snapshot
+        self.repositories = repositories
+        self.lock = repositories['User'].transaction()
+        self.materialized = {kind: set() for kind in KINDS}
+        self.complete = {kind: False for kind in KINDS}
+        self.skipped = 0
+        for kind, repository in repositories.items():
+            repository.source = SnapshotSource(self, kind)
+
+    def detach(self):
+        """Stop consulting the snapshot; every entity must be materialized."""
+        for repository in self.repositories.values():
+            repository.source = None
+
+    def _build(self, kind, state):
+        """
+        Create the entity of a snapshot state, or None if it refers to a
+        missing entity.
+        """
+        obj = blank(kind)
+        assign_state(obj, state)
+        if kind == 'Place':
+            owner = self.repositories['User'].get(state[8])
+            if owner is None:
+                return None
+            obj._owner = owner
+            amenities = [amenity for amenity in map(self.repositories['Amenity'].get, state[9]) if amenity]
+            obj._amenities = amenities or None
+            obj.review_count, obj.rating_sum, histogram = state[PLACE_AGGREGATES:]
+            obj._rating_histogram = list(histogram) if any(histogram) else None
+        elif kind == 'Review':
+            obj.place = self.repositories['Place'].get(state[5])
+            obj.user = self.repositories['User'].get(state[6])
+            if obj.place is None or obj.user is None:
+                return None
+        return obj
+
+    def materialize(self, kind, state):
+        """
+        Return the repository object of a snapshot state, creating it unless
+        it was materialized before. Callers hold the writer lock.
+
+        Returns:
+            The object, or None if it was deleted or is dangling
+        """
+        repository = self.repositories[kind]
+        materialized = self.materialized[kind]
+        if state[0] in materialized:
+            return repository.get(state[0])
+        obj = self._build(kind, state)
+        if obj is None:
+            self.skipped += 1
+        else:
+            repository.adopt(obj)
+        # Marked once stored, so lock-free readers never miss it in both places
+        materialized.add(state[0])
+        return obj
+
+    def load(self, kind, obj_id):
+        """Materialize an entity by ID; see SnapshotSource.load."""
+        if self.complete[kind] or obj_id in self.materialized[kind]:
+            return None
+        found = self.snapshot.find(kind, 'id', obj_id)
+        if not found:
+            return None
+        with self.lock:
+            return self.materialize(kind, found[0][1])
+
+    def lookup(self, kind, attr, value, ids):
+        """Add the snapshot's matches to index results; see SnapshotSource.lookup."""
+        if self.complete[kind]:
+            return ids
+        materialized = self.materialized[kind]
+        found = [state for _, state in self.snapshot.find(kind, attr, value) if state[0] not in materialized]
+        if not found:
+            return ids
+        with self.lock:
+            objects = [self.materialize(kind, state) for state in found]
+        known = set(ids)
+        return ids + [obj.id for obj in objects if obj is not None and obj.id not in known]
+
+    def page(self, kind, entries, created_at_us, obj_id, limit):
+        """Merge index entries with the snapshot's; see SnapshotSource.page."""
+        if self.complete[kind]:
+            return entries
+        snapshot, materialized = self.snapshot, self.materialized[kind]
+        count = snapshot.count(kind)
+        ordinal = 0 if created_at_us is None else snapshot.first_created(kind, created_at_us)
+        mapped = []
+        while ordinal < count and len(mapped) < limit:
+            state = snapshot.state(kind, ordinal)
+            ordinal += 1
+            entry = (state[1], state[0])
+            if (created_at_us is not None and entry <= (created_at_us, obj_id)) or state[0] in materialized:
+                continue
+            mapped.append(entry)
+        merged, seen = [], set()
+        for entry in heapq.merge(entries, mapped):
+            # An entity materialized while this ran may appear in both
+            if entry[1] not in seen:
+                seen.add(entry[1])
+                merged.append(entry)
+                if len(merged) == limit:
+                    break
+        return merged
+
+    def load_all(self, kind):
+        """
+        Materialize every entity of a kind.
+
+        The writer lock is released between batches so that writers are not
+        paused for the whole load.
+        """
+        if self.complete[kind]:
+            return
+        count = self.snapshot.count(kind)
+        for start in range(0, count, LOAD_BATCH):
+            with self.lock:
+                for ordinal in range(start, min(start + LOAD_BATCH, count)):
+                    state = self.snapshot.state(kind, ordinal)
+                    if state[0] not in self.materialized[kind]:
+                        self.materialize(kind, state)
+        self.complete[kind] = True
+
+    def load_related(self, obj, slot):
+        """
+        Allocate a lazily created list of related entities, filled with the
+        ones the snapshot links to the object.
+
+        Args:
+            obj: A User or Place
+            slot (str): The list's slot (see RELATIONS)
+        """
+        kind, attr = RELATIONS[(type(obj).__name__, slot)]
+        repository = self.repositories[kind]
+        with self.lock:
+            if getattr(obj, slot) is not None:
+                return
+            related = []
+            for _, state in self.snapshot.find(kind, attr, obj.id):
+                child = repository.get(state[0])
+                if child is not None:
+                    related.append(child)
+            setattr(obj, slot, related)
+
+    def pending_states(self, kind):
+        """
+        Return the snapshot states of the entities not materialized yet.
+        Callers hold the writer lock.
+        """
+        if self.complete[kind]:
+            return []
+        materialized = self.materialized[kind]
+        states = (self.snapshot.state(kind, ordinal) for ordinal in range(self.snapshot.count(kind)))
+        return [state for state in states if state[0] not in materialized]
+
+    def warm(self):
+        """
+        Materialize every entity and related list, then detach the sources.
+
+        Returns:
+            int: Number of entities held by the repositories
+        """
+        for kind in KINDS:
+            self.load_all(kind)
+        for (kind, slot) in RELATIONS:
+            for obj in self.repositories[kind].get_all():
+                if getattr(obj, slot) is None:
+                    self.load_related(obj, slot)
+        self.detach()
+        return sum(len(repository.get_all()) for repository in self.repositories.values())
+
+
+class SnapshotSource:
+    """
+    The part of a SnapshotLoader one repository consults.
+    """
+
+    __slots__ = ('loader', 'kind')
+
+    def __init__(self, loader, kind):
+        """
+        Args:
+            loader (SnapshotLoader): The loader
+            kind (str): Kind of the repository's entities
+        """
+        self.loader = loader
+        self.kind = kind
+
+    def load(self, obj_id):
+        """
+        Materialize an entity the repository does not hold.
+
+        Returns:
+            The object, or None if the snapshot has no such entity or it was
+            deleted after being materialized
+        """
+        return self.loader.load(self.kind, obj_id)
+
+    def indexed(self, attr):
+        """Return whether lookups by an attribute can be answered lazily."""
+        return self.loader.snapshot.indexed(self.kind, attr)
+
+    def lookup(self, attr, value, ids):
+        """
+        Complete the result of an index lookup.
+
+        Args:
+            attr (str): An attribute for which indexed() is true
+            value: The value looked up
+            ids (list): IDs the repository's index returned
+
+        Returns:
+            list: ``ids`` followed by the IDs of the snapshot's entities
+            holding the value, which are materialized
+        """
+        return self.loader.lookup(self.kind, attr, value, ids)
+
+    def page(self, entries, created_at_us, obj_id, limit):
+        """
+        Complete one page of the repository's creation order index.
+
+        Args:
+            entries (list): ``(created_at_us, id)`` entries from the index
+            created_at_us (int): Creation time of the cursor, or None
+            obj_id (str): ID of the cursor
+            limit (int): Maximum number of entries
+
+        Returns:
+            list: The first ``limit`` entries after the cursor among both
+            the index and the snapshot's unmaterialized entities
+        """
+        return self.loader.page(self.kind, entries, created_at_us, obj_id, limit)
+
+    def load_all(self):
+        """Materialize every entity of the repository's kind."""
+        self.loader.load_all(self.kind)
+
+    def load_related(self, obj, slot):
+        """Fill a lazily allocated list of related entities."""
+        self.loader.load_related(obj, slot)
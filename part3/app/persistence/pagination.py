@@ -0,0 +1,128 @@
+"""
+Opaque cursors for keyset pagination.
+
+Collections are ordered by ``(created_at, id)``; a cursor encodes that pair
+for the last item of a page so the next page can resume right after it.
+Collections sorted by another attribute use key cursors, which encode the
+attribute's name and ``(value, id)`` instead.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+
+def encode_cursor(created_at, obj_id):
+    """
+    Build an opaque cursor pointing at an item.
+
+    Args:
+        created_at (datetime): Creation timestamp of the item
+        obj_id (str): The item's unique identifier
+
+    Returns:
+        str: URL-safe cursor string
+    """
+    raw = json.dumps([created_at.isoformat(), obj_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor (str): The opaque cursor string
+
+    Returns:
+        tuple: ``(created_at, id)`` of the item the cursor points at
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, obj_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        created_at = datetime.fromisoformat(created_at)
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+    # Timestamps are naive UTC; an aware one cannot be compared with them
+    if created_at.tzinfo is not None or not isinstance(obj_id, str):
+        raise ValueError("Invalid pagination cursor")
+    return created_at, obj_id
+
+
+def encode_key_cursor(attr_name, value, obj_id):
+    """
+    Build an opaque cursor pointing at an item of a collection sorted by
+    an attribute.
+
+    Args:
+        attr_name (str): The attribute the collection is sorted by
+        value (float): The item's value of the attribute
+        obj_id (str): The item's unique identifier
+
+    Returns:
+        str: URL-safe cursor string
+    """
+    raw = json.dumps([attr_name, value, obj_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_key_cursor(cursor, attr_name):
+    """
+    Decode a cursor produced by encode_key_cursor.
+
+    Args:
+        cursor (str): The opaque cursor string
+        attr_name (str): The attribute the collection is sorted by
+
+    Returns:
+        tuple: ``(value, id)`` of the item the cursor points at
+
+    Raises:
+        ValueError: If the cursor is malformed or belongs to a collection
+            sorted differently
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        name, value, obj_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+    # The value is compared with the sorted index's numbers, and the ID with its IDs
+    if (name != attr_name or not isinstance(value, (int, float)) or isinstance(value, bool)
+            or not isinstance(obj_id, str)):
+        raise ValueError("Invalid pagination cursor")
+    return value, obj_id
+
+
+def cursor_for(obj):
+    """Return the cursor pointing at an object."""
+    return encode_cursor(obj.created_at, obj.id)
+
+
+def iterate_pages(fetch_page, chunk_size, after=None):
+    """
+    Walk a paginated collection one page at a time.
+
+    Only one page is held at a time, so a whole collection can be streamed
+    in constant memory.
+
+    Args:
+        fetch_page (callable): Takes ``(limit, after)`` and returns
+            ``(objects, next_cursor)``
+        chunk_size (int): Number of objects per page
+        after (str): Cursor to resume after, or None to start at the beginning
+
+    Yields:
+        list: The objects of each non-empty page, in order
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    while True:
+        objects, after = fetch_page(chunk_size, after)
+        if objects:
+            yield objects
+        if after is None:
+            return
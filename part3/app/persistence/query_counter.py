@@ -0,0 +1,212 @@
+"""
+Counting and profiling of the SQL statements issued by the SQLAlchemy backend.
+
+Useful to check that loading profiles keep endpoints at a constant number
+of queries: wrap code in ``QueryCounter`` in tests and benchmarks, or enable
+SQL_QUERY_COUNTER to profile every request:
+
+- ``X-Query-Count`` and ``Server-Timing: db;dur=...`` response headers
+  report the number of statements and the time spent executing them;
+- statements slower than SQL_SLOW_QUERY_MS are logged with the facade
+  method that issued them;
+- statements of one shape (the same SQL up to bound values) executed at
+  least SQL_REPEATED_QUERY_THRESHOLD times in a request are logged as a
+  likely N+1 pattern, typically lazy loads triggered by ``to_dict()``.
+"""
+import logging
+import re
+import sys
+import time
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_SPACE = re.compile(r'\s+')
+# Expanded IN lists, e.g. "IN (?, ?, ?)" or "IN (%(id_1)s, %(id_2)s)"
+_PARAMETER_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+))+\s*\)')
+
+# Module whose methods are reported as the origin of statements
+_FACADE_MODULE = 'app.services.facade'
+
+
+def statement_shape(statement):
+    """
+    Normalize a statement so that executions differing only in their bound
+    values compare equal.
+
+    Args:
+        statement (str): SQL with bound parameter placeholders
+
+    Returns:
+        str: The statement on one line, with parameter lists collapsed
+    """
+    return _PARAMETER_LIST.sub('(?)', _SPACE.sub(' ', statement).strip())
+
+
+def statement_origin():
+    """
+    Return the facade method on the call stack, innermost first.
+
+    Returns:
+        str: Qualified method name, e.g. 'HBnBFacade.serialize', or None if
+        the statement was not issued through the facade
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        if frame.f_globals.get('__name__') == _FACADE_MODULE:
+            code = frame.f_code
+            return getattr(code, 'co_qualname', code.co_name)
+        frame = frame.f_back
+    return None
+
+
+class QueryStats:
+    """
+    Statements executed within one scope (a request or a QueryCounter block).
+    """
+
+    def __init__(self):
+        """Initialize empty statistics."""
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = {}  # shape -> [executions, origin of the first one]
+
+    def record(self, statement, seconds):
+        """
+        Record one executed statement.
+
+        Args:
+            statement (str): The SQL statement
+            seconds (float): Time spent executing it
+        """
+        self.count += 1
+        self.seconds += seconds
+        shape = statement_shape(statement)
+        entry = self.shapes.get(shape)
+        if entry is None:
+            self.shapes[shape] = [1, statement_origin()]
+        else:
+            entry[0] += 1
+
+    def repeated(self, threshold):
+        """
+        Return the statement shapes executed at least ``threshold`` times.
+
+        Returns:
+            list: ``(shape, executions, origin)`` tuples, most executed first
+        """
+        return sorted(
+            ((shape, count, origin) for shape, (count, origin) in self.shapes.items() if count >= threshold),
+            key=lambda item: item[1], reverse=True
+        )
+
+
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    """Remember when a statement started executing."""
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _elapsed(context):
+    """Return the execution time of a statement, or 0.0 if it was not timed."""
+    started = getattr(context, '_query_started', None)
+    return time.perf_counter() - started if started is not None else 0.0
+
+
+class QueryCounter:
+    """
+    Context manager counting and timing the statements executed while it
+    is active.
+
+    Example::
+
+        with QueryCounter() as counter:
+            repo.get_all(profile='list')
+        assert counter.count == 3
+        assert not counter.stats.repeated(5)
+    """
+
+    def __init__(self, engine=Engine):
+        """
+        Initialize the counter.
+
+        Args:
+            engine: Engine to watch; defaults to every engine
+        """
+        self.engine = engine
+        self.stats = QueryStats()
+        self.statements = []
+
+    @property
+    def count(self):
+        """int: Number of statements executed."""
+        return self.stats.count
+
+    @property
+    def seconds(self):
+        """float: Time spent executing the statements."""
+        return self.stats.seconds
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        """Record one statement."""
+        self.stats.record(statement, _elapsed(context))
+        self.statements.append(statement)
+
+    def __enter__(self):
+        """Start counting."""
+        if not event.contains(self.engine, 'before_cursor_execute', _start_timer):
+            event.listen(self.engine, 'before_cursor_execute', _start_timer)
+        event.listen(self.engine, 'after_cursor_execute', self._after_cursor_execute)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Stop counting."""
+        event.remove(self.engine, 'after_cursor_execute', self._after_cursor_execute)
+
+
+def _profile_request_statement(conn, cursor, statement, parameters, context, executemany):
+    """Record a statement against the current Flask request, if any."""
+    if not has_request_context():
+        return
+    seconds = _elapsed(context)
+    stats = g.get('sql_stats')
+    if stats is None:
+        stats = g.sql_stats = QueryStats()
+    stats.record(statement, seconds)
+    slow_ms = current_app.config.get('SQL_SLOW_QUERY_MS', 0)
+    if slow_ms and seconds * 1000 >= slow_ms:
+        logger.warning("Slow query (%.1f ms) from %s in %s %s: %s", seconds * 1000,
+                       statement_origin() or 'unknown', request.method, request.path,
+                       statement_shape(statement))
+
+
+def init_query_counter(app):
+    """
+    Profile the SQL statements of each request.
+
+    Adds ``X-Query-Count`` and ``Server-Timing`` response headers to every
+    response of the app, and logs slow statements and repeated statement
+    shapes (see the module docstring).
+
+    Args:
+        app (Flask): The application to instrument
+    """
+    if not event.contains(Engine, 'before_cursor_execute', _start_timer):
+        event.listen(Engine, 'before_cursor_execute', _start_timer)
+    if not event.contains(Engine, 'after_cursor_execute', _profile_request_statement):
+        event.listen(Engine, 'after_cursor_execute', _profile_request_statement)
+
+    @app.after_request
+    def add_query_headers(response):
+        stats = g.get('sql_stats') or QueryStats()
+        response.headers['X-Query-Count'] = str(stats.count)
+        response.headers.add('Server-Timing', f'db;dur={stats.seconds * 1000:.2f};desc="{stats.count} queries"')
+        threshold = app.config.get('SQL_REPEATED_QUERY_THRESHOLD', 0)
+        if threshold:
+            for shape, count, origin in stats.repeated(threshold):
+                logger.warning("Possible N+1 in %s %s: %d executions from %s of %s", request.method,
+                               request.path, count, origin or 'unknown', shape)
+        return response
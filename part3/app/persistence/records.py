@@ -0,0 +1,97 @@
+"""
+Plain-tuple encoding of entities, shared by the write-ahead log and snapshots.
+
+An entity's state is a tuple of plain values (strings, numbers, booleans,
+None and tuples of strings) that refers to related entities by ID:
+
+    User     (id, created_at_us, updated_at_us, first_name, last_name, email,
+              is_admin, password)
+    Amenity  (id, created_at_us, updated_at_us, name)
+    Place    (id, created_at_us, updated_at_us, title, description, price,
+              latitude, longitude, owner_id, amenity_ids)
+    Review   (id, created_at_us, updated_at_us, text, rating, place_id,
+              user_id)
+
+Snapshots append a place's rating aggregates (review_count, rating_sum,
+rating_histogram), which the log derives from review records instead.
+"""
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.models.review import Review
+from app.models.user import User
+
+# Restore order: every kind only refers to kinds listed before it
+KINDS = ('User', 'Amenity', 'Place', 'Review')
+
+MODELS = {'User': User, 'Amenity': Amenity, 'Place': Place, 'Review': Review}
+
+# Position in the state tuple of the attributes snapshots are indexed by
+KEYS = {
+    'User': {'id': 0, 'email': 5},
+    'Amenity': {'id': 0, 'name': 3},
+    'Place': {'id': 0, 'owner_id': 8},
+    'Review': {'id': 0, 'place_id': 5, 'user_id': 6},
+}
+
+# Position of the first snapshot-only field of a place
+PLACE_AGGREGATES = 10
+
+
+def entity_state(obj):
+    """
+    Return the persistent state of an entity.
+
+    Returns:
+        tuple: ``(id, created_at_us, updated_at_us, *fields)``; related
+        entities are stored by ID
+    """
+    base = (obj.id, obj.created_at_us, obj.updated_at_us)
+    if isinstance(obj, User):
+        return base + (obj.first_name, obj.last_name, obj.email, obj.is_admin, obj.password)
+    if isinstance(obj, Amenity):
+        return base + (obj.name,)
+    if isinstance(obj, Place):
+        return base + (obj.title, obj.description, obj.price, obj.latitude, obj.longitude,
+                       obj.owner_id, obj.amenity_ids)
+    if isinstance(obj, Review):
+        return base + (obj.text, obj.rating, obj.place_id, obj.user_id)
+    raise ValueError(f"Cannot persist {type(obj).__name__} objects")
+
+
+def snapshot_state(obj):
+    """Return an entity's state including the fields only snapshots keep."""
+    state = entity_state(obj)
+    if isinstance(obj, Place):
+        state += (obj.review_count, obj.rating_sum, tuple(obj._rating_histogram or (0, 0, 0, 0, 0)))
+    return state
+
+
+def assign_state(obj, state):
+    """
+    Copy the plain fields of a state onto an entity.
+
+    Related entities (owner, amenities, place, user) and a place's rating
+    aggregates are left to the caller.
+    """
+    obj.id, obj.created_at_us, obj.updated_at_us = state[:3]
+    if isinstance(obj, User):
+        obj.first_name, obj.last_name, obj.email, obj.is_admin, obj.password = state[3:8]
+    elif isinstance(obj, Amenity):
+        obj.name = state[3]
+    elif isinstance(obj, Place):
+        obj.title, obj.description, obj.price, obj.latitude, obj.longitude = state[3:8]
+    elif isinstance(obj, Review):
+        obj.text, obj.rating = state[3:5]
+
+
+def blank(kind):
+    """Create an entity of a kind without running its constructor's logic."""
+    if kind == 'User':
+        return User(None, None, None)
+    if kind == 'Amenity':
+        return Amenity(None)
+    if kind == 'Place':
+        return Place(None, None, None, None, None, None)
+    if kind == 'Review':
+        return Review(None, None, None, None)
+    raise ValueError(f"Unknown entity kind '{kind}'")
@@ -2,48 +2,453 @@
 In-memory repository implementation for storing and managing objects.
 This will be replaced with a database-backed solution in Part 3.
 """
+import threading
+from bisect import bisect_right
+from app.metrics import timed_methods
+from app.models.entity import to_epoch_us
+from app.persistence.geo import split_box
+from app.persistence.indexes import BitmapIndex, SortedIndex, sorted_range
+from app.persistence.pagination import (
+    cursor_for, decode_cursor, decode_key_cursor, encode_key_cursor, iterate_pages
+)
 
 
+@timed_methods('repository', exclude=('transaction', 'adopt', 'load_all', 'iter_all'))
 class InMemoryRepository:
     """
     In-memory storage for entities.
     Provides basic CRUD operations for objects.
+
+    The repository is safe to share between threads. Writes are serialized
+    by a re-entrant writer lock, which repositories whose writes are grouped
+    together (see transaction()) should share so that a unit of work spanning
+    several of them needs a single lock and cannot deadlock. Reads take no
+    lock at all: they only use container operations CPython performs
+    atomically (``dict.get``, slicing, ``list(dict)``) and skip objects
+    deleted while they run, so a read concurrent with a write sees the data
+    either before or after it, and never blocks behind it.
+
+    A repository restored from a mapped snapshot has a ``source`` until
+    every entity has been loaded: entities it does not hold yet are
+    materialized from the snapshot on first access (see
+    mapped_snapshot.SnapshotLoader).
     """
 
-    def __init__(self):
-        """Initialize the repository with an empty storage dictionary."""
+    def __init__(self, indexes=None, lock=None):
+        """
+        Initialize the repository with an empty storage dictionary.
+
+        Args:
+            indexes (list): Optional secondary indexes (see indexes.py)
+            lock (RLock): Writer lock, possibly shared with other
+                repositories; a private one is created by default
+        """
         self._storage = {}
+        self._indexes = {}
+        self._lock = lock if lock is not None else threading.RLock()
+        # Receives record_put(obj)/record_delete(obj) for every mutation,
+        # under the writer lock (see durability.DurableStore)
+        self.journal = None
+        # Entities not loaded yet (see mapped_snapshot.SnapshotSource)
+        self.source = None
+        # Creation order, used for keyset pagination
+        self._order = SortedIndex('created_at_us')
+        self.add_index(self._order)
+        for index in indexes or []:
+            self.add_index(index)
+
+    def add_index(self, index):
+        """
+        Register a secondary index and populate it with the stored objects.
+
+        Args:
+            index: Index object implementing the protocol in indexes.py
+        """
+        with self._lock:
+            for obj in self._storage.values():
+                index.check(obj)
+                index.insert(obj)
+            self._indexes[index.name] = index
 
     def add(self, obj):
         """
         Add an object to the repository.
 
+        Args:
+            obj: Object with an 'id' attribute to be stored
+
+        Raises:
+            ValueError: If the object violates a unique index
+        """
+        with self._lock:
+            for index in self._indexes.values():
+                index.check(obj)
+            self._storage[obj.id] = obj
+            for index in self._indexes.values():
+                index.insert(obj)
+            obj._repository = self
+            if self.journal is not None:
+                self.journal.record_put(obj)
+
+    def adopt(self, obj):
+        """
+        Store an object restored from persistent storage.
+
+        Unlike add(), the object is neither checked against unique indexes
+        nor journaled, since it is already persisted.
+
         Args:
             obj: Object with an 'id' attribute to be stored
         """
-        self._storage[obj.id] = obj
+        with self._lock:
+            self._storage[obj.id] = obj
+            for index in self._indexes.values():
+                index.insert(obj)
+            obj._repository = self
 
-    def get(self, obj_id):
+    def add_if_absent(self, obj, attr_name):
+        """
+        Add an object unless another one already holds its attribute value.
+
+        The check and the insertion happen atomically, so two threads adding
+        objects with the same value cannot both succeed.
+
+        Args:
+            obj: Object with an 'id' attribute to be stored
+            attr_name (str): The attribute whose value must be unused
+
+        Returns:
+            The object already holding the value, or None if ``obj`` was
+            added
+
+        Raises:
+            ValueError: If the object violates another unique index
+        """
+        with self._lock:
+            existing = self.get_by_attribute(attr_name, getattr(obj, attr_name))
+            if existing is not None:
+                return existing
+            self.add(obj)
+            return None
+
+    def add_many(self, objs):
+        """
+        Add several objects to the repository.
+
+        Args:
+            objs (list): Objects to be stored
+
+        Returns:
+            list: The stored objects
+
+        Raises:
+            ValueError: If an object violates a unique index
+        """
+        objs = list(objs)
+        with self._lock:
+            for obj in objs:
+                self.add(obj)
+        return objs
+
+    def transaction(self):
+        """
+        Open a unit of work.
+
+        Writes to memory are immediate; the unit of work holds the writer
+        lock, so no other thread writes to this repository (or to those
+        sharing its lock) until the block exits. Units of work may be
+        nested.
+
+        Returns:
+            A context manager
+        """
+        return self._lock
+
+    def reindex(self, obj):
+        """
+        Bring the secondary indexes up to date after an object was mutated.
+
+        Called by the models themselves (see Entity._changed) so that
+        model-level ``update()`` calls keep lookups consistent.
+
+        Args:
+            obj: The mutated object
+
+        Raises:
+            ValueError: If the new values violate a unique index
+        """
+        with self._lock:
+            if self._storage.get(obj.id) is not obj:
+                return
+            for index in self._indexes.values():
+                index.check(obj)
+            for index in self._indexes.values():
+                index.update(obj)
+            if self.journal is not None:
+                self.journal.record_put(obj)
+
+    def check(self, obj):
+        """
+        Ensure an object does not violate a constraint of the indexes.
+
+        Used to vet a modified copy of a stored object before the stored
+        object itself is changed.
+
+        Args:
+            obj: The object, or a copy of a stored object with new values
+
+        Raises:
+            ValueError: If the object's values violate an index constraint
+        """
+        with self._lock:
+            for index in self._indexes.values():
+                index.check(obj)
+
+    def get(self, obj_id, profile=None):
         """
         Retrieve an object by its ID.
 
         Args:
             obj_id: The unique identifier of the object
+            profile (str): Loading profile; ignored, since related objects
+                are always in memory
 
         Returns:
             The object if found, None otherwise
         """
-        return self._storage.get(obj_id)
+        return self._get(obj_id)
 
-    def get_all(self):
+    def _get(self, obj_id):
+        """Return a stored object, materializing it from the source if needed."""
+        obj = self._storage.get(obj_id)
+        if obj is None:
+            source = self.source
+            if source is not None:
+                obj = source.load(obj_id)
+        return obj
+
+    def load_all(self):
+        """
+        Materialize every entity the source still holds.
+
+        Does nothing once every entity is in memory (or without a source).
+        """
+        source = self.source
+        if source is not None:
+            source.load_all()
+
+    def get_all(self, profile=None):
         """
         Retrieve all objects from the repository.
 
+        Args:
+            profile (str): Loading profile; ignored in memory
+
         Returns:
             List of all stored objects
         """
+        self.load_all()
+        return list(self._storage.values())
+
+    def get_loaded(self):
+        """
+        Retrieve the objects held in memory, without materializing those the
+        source still holds.
+
+        Returns:
+            List of stored objects
+        """
         return list(self._storage.values())
 
+    def get_page(self, limit, after=None, profile=None, within=None):
+        """
+        Retrieve one page of objects ordered by ``(created_at, id)``.
+
+        Args:
+            limit (int): Maximum number of objects to return
+            after (str): Cursor of the last object of the previous page
+            profile (str): Loading profile; ignored in memory
+            within (Selection): Only return the selected objects (see
+                select()); all when None
+
+        Returns:
+            tuple: ``(objects, next_cursor)``; next_cursor is None on the
+            last page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        created_at_us, obj_id = None, None
+        if after:
+            created_at, obj_id = decode_cursor(after)
+            created_at_us = to_epoch_us(created_at)
+        if within is not None:
+            position = (created_at_us, obj_id) if after else None
+            entries = self._page_within(within, self._order, None, None, position, limit + 1)
+        else:
+            entries = self._order.after(created_at_us, obj_id, limit + 1)
+            source = self.source
+            if source is not None:
+                entries = source.page(entries, created_at_us, obj_id, limit + 1)
+        objects = self._resolve(entry_id for _, entry_id in entries[:limit])
+        next_cursor = cursor_for(objects[-1]) if objects and len(entries) > limit else None
+        return objects, next_cursor
+
+    def iter_all(self, chunk_size=1000, after=None, profile=None):
+        """
+        Iterate over all objects ordered by ``(created_at, id)``, one chunk
+        at a time.
+
+        Unlike get_all, only one chunk is materialized at a time (objects
+        the source still holds are decoded as their chunk is reached), and
+        objects added during the iteration are included if they sort after
+        the current chunk.
+
+        Args:
+            chunk_size (int): Number of objects per chunk
+            after (str): Cursor to resume after, or None to start at the beginning
+            profile (str): Loading profile; ignored in memory
+
+        Yields:
+            list: The objects of each chunk
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        yield from iterate_pages(lambda limit, cursor: self.get_page(limit, cursor, profile), chunk_size, after)
+
+    def _page_within(self, within, index, low, high, position, limit, reverse=False):
+        """
+        Return up to ``limit`` ``(value, id)`` entries of a sorted index
+        for selected objects, resuming after ``position``.
+
+        Scanning the index and filtering it reads about
+        ``limit * total / selected`` entries, while sorting the selected
+        objects costs about ``selected`` steps: the cheaper one is used.
+        See sorted_range() for the other arguments.
+        """
+        selected = len(within)
+        if selected * selected < limit * len(self._storage):
+            key = index.key
+            entries = sorted((key(obj), obj.id) for obj in self._resolve(within.ids()))
+            return sorted_range(entries, low, high, position, limit, reverse)
+        batch = max(limit * 4, 256)
+        entries = []
+        while len(entries) < limit:
+            scanned = index.range(low, high, position, batch, reverse)
+            entries.extend(entry for entry in scanned if entry[1] in within)
+            if len(scanned) < batch:
+                break
+            position = scanned[-1]
+        return entries[:limit]
+
+    def get_page_by(self, attr_name, limit, after=None, low=None, high=None, descending=False, within=None):
+        """
+        Retrieve one page of objects ordered by ``(attribute, id)``,
+        optionally restricted to a range of the attribute, in
+        O(log n + limit).
+
+        Args:
+            attr_name (str): Attribute with a SortedIndex
+            limit (int): Maximum number of objects to return
+            after (str): Cursor of the last object of the previous page
+            low: Smallest value of the attribute to return (None: no bound)
+            high: Largest value of the attribute to return (None: no bound)
+            descending (bool): Return the largest values first
+            within (Selection): Only return the selected objects; all when None
+
+        Returns:
+            tuple: ``(objects, next_cursor)``; next_cursor is None on the
+            last page
+
+        Raises:
+            ValueError: If the attribute has no SortedIndex or the cursor
+                is malformed
+        """
+        index = self._sorted_index(attr_name)
+        position = decode_key_cursor(after, attr_name) if after else None
+        if within is not None:
+            entries = self._page_within(within, index, low, high, position, limit + 1, descending)
+        else:
+            entries = index.range(low, high, position, limit + 1, descending)
+        objects = self._resolve(entry_id for _, entry_id in entries[:limit])
+        next_cursor = None
+        if objects and len(entries) > limit:
+            # Resume after the last entry read, even if its object was deleted since
+            next_cursor = encode_key_cursor(attr_name, *entries[limit - 1])
+        return objects, next_cursor
+
+    def select_range(self, bitmap_attr, attr_name, low=None, high=None):
+        """
+        Select the objects whose value of a sorted attribute lies in a range.
+
+        Args:
+            bitmap_attr (str): Attribute with the BitmapIndex to select with,
+                so the result combines with select() results using ``&``
+            attr_name (str): Attribute with a SortedIndex
+            low: Smallest value to select (None: no bound)
+            high: Largest value to select (None: no bound)
+
+        Returns:
+            Selection: The objects in the range
+
+        Raises:
+            ValueError: If either attribute lacks the index
+        """
+        bitmap_index = self._bitmap_index(bitmap_attr)
+        entries = self._sorted_index(attr_name).range(low, high)
+        return bitmap_index.selection_of(obj_id for _, obj_id in entries)
+
+    def histogram(self, attr_name, edges, low=None, high=None, within=None):
+        """
+        Count the objects per bucket of values of a sorted attribute.
+
+        Args:
+            attr_name (str): Attribute with a SortedIndex
+            edges (list): Ascending lower edges of the buckets (see
+                SortedIndex.histogram)
+            low: Only count values from this one up
+            high: Only count values up to this one
+            within (Selection): Only count the selected objects; all when None
+
+        Returns:
+            list: Number of objects per bucket
+
+        Raises:
+            ValueError: If the attribute has no SortedIndex
+        """
+        index = self._sorted_index(attr_name)
+        if within is None:
+            return index.histogram(edges, low, high)
+        # Visit whichever is smaller: the selection or the range
+        if len(within) < index.count(low, high):
+            values = [
+                value
+                for value in map(index.key, self._resolve(within.ids()))
+                if (low is None or value >= low) and (high is None or value <= high)
+            ]
+        else:
+            values = [value for value, obj_id in index.range(low, high) if obj_id in within]
+        counts = [0] * len(edges)
+        for value in values:
+            bucket = bisect_right(edges, value) - 1
+            if bucket >= 0:
+                counts[bucket] += 1
+        return counts
+
+    def _sorted_index(self, attr_name):
+        """
+        Return the sorted index of an attribute.
+
+        Raises:
+            ValueError: If the attribute has no SortedIndex
+        """
+        index = self._indexes.get(attr_name)
+        if not isinstance(index, SortedIndex):
+            raise ValueError(f"Repository has no sorted index on '{attr_name}'")
+        self.load_all()
+        return index
+
     def update(self, obj_id, data):
         """
         Update an object with new data.
@@ -54,14 +459,35 @@ class InMemoryRepository:
 
         Returns:
             The updated object if found, None otherwise
+
+        Raises:
+            ValueError: If the new values are invalid or violate a unique
+                index; the object is then left unchanged
         """
-        obj = self.get(obj_id)
-        if obj:
-            for key, value in data.items():
-                if hasattr(obj, key):
-                    setattr(obj, key, value)
+        with self._lock:
+            obj = self.get(obj_id)
+            if obj:
+                obj._apply({key: value for key, value in data.items() if hasattr(obj, key)})
         return obj
 
+    def update_many(self, updates):
+        """
+        Update several objects.
+
+        Args:
+            updates (dict): Maps object IDs to dictionaries of attributes
+
+        Returns:
+            list: The updated objects (IDs that do not exist are skipped)
+        """
+        updated = []
+        with self._lock:
+            for obj_id, data in updates.items():
+                obj = self.update(obj_id, data)
+                if obj:
+                    updated.append(obj)
+        return updated
+
     def delete(self, obj_id):
         """
         Delete an object from the repository.
@@ -72,10 +498,56 @@ class InMemoryRepository:
         Returns:
             True if the object was deleted, False otherwise
         """
-        if obj_id in self._storage:
-            del self._storage[obj_id]
+        with self._lock:
+            if self.source is not None:
+                self._get(obj_id)
+            obj = self._storage.pop(obj_id, None)
+            if obj is None:
+                return False
+            for index in self._indexes.values():
+                index.remove(obj_id)
+            obj._repository = None
+            if self.journal is not None:
+                self.journal.record_delete(obj)
             return True
-        return False
+
+    def delete_many(self, obj_ids):
+        """
+        Delete several objects from the repository.
+
+        Args:
+            obj_ids (list): Unique identifiers of the objects to delete
+
+        Returns:
+            int: Number of objects deleted
+        """
+        with self._lock:
+            return sum(1 for obj_id in list(obj_ids) if self.delete(obj_id))
+
+    def _resolve(self, obj_ids):
+        """
+        Map IDs read from an index to the stored objects.
+
+        IDs of objects deleted since the index was read are skipped.
+
+        Returns:
+            list: The objects still stored
+        """
+        get = self._storage.get if self.source is None else self._get
+        return [obj for obj in map(get, obj_ids) if obj is not None]
+
+    def _lookup(self, index, attr_value):
+        """
+        Return the IDs of the objects an index maps a value to, including
+        those still held by the source only.
+        """
+        source = self.source
+        if source is None:
+            return index.lookup(attr_value)
+        if not source.indexed(index.name):
+            source.load_all()
+            return index.lookup(attr_value)
+        return source.lookup(index.name, attr_value, index.lookup(attr_value))
 
     def get_by_attribute(self, attr_name, attr_value):
         """
@@ -88,7 +560,165 @@ class InMemoryRepository:
         Returns:
             The first object that matches, None otherwise
         """
-        for obj in self._storage.values():
+        index = self._indexes.get(attr_name)
+        if index is not None:
+            objects = self._resolve(self._lookup(index, attr_value))
+            return objects[0] if objects else None
+        self.load_all()
+        for obj in list(self._storage.values()):
             if hasattr(obj, attr_name) and getattr(obj, attr_name) == attr_value:
                 return obj
         return None
+
+    def get_all_by_attribute(self, attr_name, attr_value):
+        """
+        Retrieve all objects matching a specific attribute value.
+
+        Args:
+            attr_name: The name of the attribute to search by
+            attr_value: The value to match
+
+        Returns:
+            List of matching objects
+        """
+        index = self._indexes.get(attr_name)
+        if index is not None:
+            return self._resolve(self._lookup(index, attr_value))
+        self.load_all()
+        return [
+            obj for obj in list(self._storage.values())
+            if hasattr(obj, attr_name) and getattr(obj, attr_name) == attr_value
+        ]
+
+    def _spatial_index(self):
+        """
+        Return the repository's spatial index.
+
+        Raises:
+            ValueError: If no GridIndex named 'location' was declared
+        """
+        index = self._indexes.get('location')
+        if index is None:
+            raise ValueError("Repository has no spatial index")
+        self.load_all()
+        return index
+
+    def get_within_box(self, min_lat, min_lon, max_lat, max_lon, within=None):
+        """
+        Retrieve the objects located inside a bounding box.
+
+        A box with ``min_lon > max_lon`` wraps around the antimeridian.
+        ``within`` optionally restricts the results to a Selection.
+
+        Returns:
+            List of matching objects
+        """
+        index = self._spatial_index()
+        return self._resolve(
+            obj_id
+            for box in split_box(min_lat, min_lon, max_lat, max_lon)
+            for obj_id in index.within_box(*box)
+            if within is None or obj_id in within
+        )
+
+    def get_within_radius(self, lat, lon, radius_km, within=None):
+        """
+        Retrieve the objects within a distance of a point, nearest first.
+
+        ``within`` optionally restricts the results to a Selection.
+
+        Returns:
+            List of ``(object, distance_km)`` tuples
+        """
+        matches = self._spatial_index().within_radius(lat, lon, radius_km)
+        if within is not None:
+            matches = [match for match in matches if match[1] in within]
+        return self._resolve_matches(matches)
+
+    def get_nearest(self, lat, lon, k, within=None):
+        """
+        Retrieve the ``k`` objects nearest to a point.
+
+        ``within`` optionally restricts the candidates to a Selection.
+
+        Returns:
+            List of ``(object, distance_km)`` tuples, nearest first
+        """
+        return self._resolve_matches(self._spatial_index().nearest(lat, lon, k, within))
+
+    def search_text(self, query, limit, within=None):
+        """
+        Retrieve the objects best matching a full-text query.
+
+        Args:
+            query (str): The query text
+            limit (int): Maximum number of objects to return
+            within (Selection): Only rank the selected objects; all when None
+
+        Returns:
+            List of ``(object, score)`` tuples, best first
+
+        Raises:
+            ValueError: If no TextIndex named 'text' was declared
+        """
+        index = self._indexes.get('text')
+        if index is None:
+            raise ValueError("Repository has no text index")
+        self.load_all()
+        return self._resolve_matches(index.search(query, limit, within))
+
+    def select(self, attr_name, all_of=(), any_of=(), none_of=()):
+        """
+        Select the objects by the values of a multi-valued attribute.
+
+        Args:
+            attr_name (str): Attribute with a BitmapIndex
+            all_of (iterable): Values every selected object holds
+            any_of (iterable): Values of which selected objects hold at
+                least one (ignored when empty)
+            none_of (iterable): Values no selected object holds
+
+        Returns:
+            Selection: The selected objects, usable as the ``within``
+            filter of get_page(), the spatial queries and search_text()
+
+        Raises:
+            ValueError: If the attribute has no BitmapIndex
+        """
+        index = self._bitmap_index(attr_name)
+        return index.select(all_of, any_of, none_of)
+
+    def facets(self, selection):
+        """
+        Count the selected objects holding each value of the selection's
+        attribute.
+
+        Args:
+            selection (Selection): Objects to count, from select()
+
+        Returns:
+            dict: Maps values to the number of selected objects holding them
+        """
+        return selection.index.facets(selection)
+
+    def _bitmap_index(self, attr_name):
+        """
+        Return the bitmap index of an attribute.
+
+        Raises:
+            ValueError: If the attribute has no BitmapIndex
+        """
+        index = self._indexes.get(attr_name)
+        if not isinstance(index, BitmapIndex):
+            raise ValueError(f"Repository has no bitmap index on '{attr_name}'")
+        self.load_all()
+        return index
+
+    def _resolve_matches(self, matches):
+        """Map ``(value, id)`` pairs to ``(object, value)``, skipping deleted objects."""
+        get = self._storage.get
+        return [
+            (obj, distance)
+            for obj, distance in ((get(obj_id), distance) for distance, obj_id in matches)
+            if obj is not None
+        ]
@@ -0,0 +1,378 @@
+"""
+Repository caching shared by the worker processes of a host.
+
+Each gunicorn worker builds its own ``facade``, so a per-process cache is
+held once per worker and a write in one worker leaves the others stale
+until their entries expire. Two building blocks address this:
+
+- ``SharedMemoryCache`` is a CachingRepository backend storing entries in a
+  fixed-size hash table in POSIX shared memory (``multiprocessing.
+  shared_memory``). Every worker maps the same segment: an entry is held
+  once per host, and an invalidation in one worker is seen by the others
+  on their next lookup. Lookups take no lock and make no system call:
+  values are decoded straight from the mapping and validated with a
+  per-slot sequence number (seqlock). Writers serialize on an ``flock``.
+- ``InvalidationBus`` broadcasts invalidations to the other processes over
+  Unix datagram sockets, for caches that stay private to each worker
+  (the default LRUCache backend).
+
+Both are set up per worker by ``init_repository_cache`` (the app factory
+runs in each worker unless gunicorn preloads the app). The shared table
+holds unpickled copies, so it only serves repositories that can re-attach
+them (SQLAlchemyRepository); the in-memory facade holds live objects and
+refuses it.
+"""
+import atexit
+import fcntl
+import hashlib
+import itertools
+import logging
+import os
+import pickle
+import socket
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager, suppress
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+from app.persistence.caching_repository import ABSENT, MISSING
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b'HBNBSHC1'
+# Segment header: magic, number of slots, slot size, generation
+_HEADER = struct.Struct('<8sIIQ')
+_GENERATION = struct.Struct('<Q')
+_GENERATION_OFFSET = 16
+_HEADER_SIZE = 64
+# Slot header: sequence number (odd while the slot is written), then the
+# expiry time, key hash, value and key lengths and kind of the entry,
+# followed by the key and value bytes
+_SEQUENCE = struct.Struct('<Q')
+_FIELDS = struct.Struct('<dQIHB')
+_SLOT = struct.Struct('<QdQIHB')
+_SLOT_HEADER_SIZE = 32
+
+# Slot kinds
+_EMPTY = 0
+_VALUE = 1
+_ABSENT = 2  # Cached miss
+
+
+def _key_hash(key):
+    """Hash a key consistently across processes (unlike ``hash()``)."""
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+
+
+class SharedMemoryCache:
+    """
+    Cache of one entity in a shared memory hash table.
+
+    Implements the LRUCache interface. The table has a fixed number of
+    slots; a key lives in one of ``probes`` consecutive slots from its
+    hash, and when all of them are taken the entry closest to expiring is
+    replaced. Values are pickled, and values larger than a slot are not
+    cached. Expiry times use the monotonic clock, which all processes of a
+    host share.
+
+    The segment outlives the processes using it, so that restarting a
+    worker keeps the cache; ``unlink()`` removes it.
+    """
+
+    def __init__(self, name, slots, slot_size=2048, probes=8, codec=pickle, clock=time.monotonic):
+        """
+        Create the segment, or map it if another process already did.
+
+        Args:
+            name (str): Name of the shared memory segment
+            slots (int): Number of entries the table can hold
+            slot_size (int): Bytes per entry, including a 32-byte header
+            probes (int): Slots a key can occupy
+            codec: Module with ``dumps`` and ``loads`` encoding values
+            clock (callable): Returns the current time in seconds
+
+        Raises:
+            ValueError: If the segment exists with another size or layout
+        """
+        if slots <= 0 or slot_size <= _SLOT_HEADER_SIZE:
+            raise ValueError("Shared cache needs at least one slot larger than its header")
+        self.name = name
+        self.maxsize = slots
+        self.slot_size = slot_size
+        self.probes = min(probes, slots)
+        self.codec = codec
+        self.clock = clock
+        self._capacity = slot_size - _SLOT_HEADER_SIZE
+        self._lock = threading.Lock()
+        self._lock_path = os.path.join(tempfile.gettempdir(), f'{name}.lock')
+        self._lock_file = None
+        self._lock_pid = None
+
+        with self._write_lock():
+            try:
+                shm = SharedMemory(name, create=True, size=_HEADER_SIZE + slots * slot_size)
+                _HEADER.pack_into(shm.buf, 0, _MAGIC, slots, slot_size, 0)
+            except FileExistsError:
+                shm = SharedMemory(name)
+            # The segment is shared by processes that come and go: do not let
+            # the resource tracker unlink it when this one exits
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        magic, table_slots, table_slot_size, _ = _HEADER.unpack_from(shm.buf, 0)
+        if (magic, table_slots, table_slot_size) != (_MAGIC, slots, slot_size):
+            shm.close()
+            raise ValueError(f"Shared memory segment {name} has another layout; unlink it first")
+        self._shm = shm
+        self._buf = shm.buf
+
+    def __len__(self):
+        """Return the number of live entries."""
+        now = self.clock()
+        count = 0
+        for offset in range(_HEADER_SIZE, len(self._buf), self.slot_size):
+            _, expires_at, _, _, _, kind = _SLOT.unpack_from(self._buf, offset)
+            count += kind != _EMPTY and expires_at > now
+        return count
+
+    @property
+    def generation(self):
+        """int: Number of removals so far, across all processes."""
+        return _GENERATION.unpack_from(self._buf, _GENERATION_OFFSET)[0]
+
+    @contextmanager
+    def _write_lock(self):
+        """Serialize writers of this process and of the others."""
+        with self._lock:
+            if self._lock_pid != os.getpid():
+                # Locks of a file opened before a fork are shared with the
+                # parent, so each process opens its own
+                self._lock_file = open(self._lock_path, 'ab')
+                self._lock_pid = os.getpid()
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _offsets(self, key_hash):
+        """Yield the offsets of the slots a key can occupy."""
+        first = key_hash % self.maxsize
+        for i in range(self.probes):
+            yield _HEADER_SIZE + (first + i) % self.maxsize * self.slot_size
+
+    def _holds(self, offset, key_hash, key):
+        """Return whether the slot at ``offset`` holds ``key``."""
+        _, _, slot_hash, _, key_len, kind = _SLOT.unpack_from(self._buf, offset)
+        start = offset + _SLOT_HEADER_SIZE
+        return kind != _EMPTY and slot_hash == key_hash and self._buf[start:start + key_len] == key
+
+    def _write(self, offset, fields, data=b''):
+        """Rewrite a slot, keeping its sequence number odd meanwhile."""
+        sequence = _SEQUENCE.unpack_from(self._buf, offset)[0]
+        _SEQUENCE.pack_into(self._buf, offset, sequence + 1)
+        if data:
+            start = offset + _SLOT_HEADER_SIZE
+            self._buf[start:start + len(data)] = data
+        _FIELDS.pack_into(self._buf, offset + _SEQUENCE.size, *fields)
+        _SEQUENCE.pack_into(self._buf, offset, sequence + 2)
+
+    def _bump_generation(self):
+        """Count a removal (callers hold the write lock)."""
+        _GENERATION.pack_into(self._buf, _GENERATION_OFFSET, self.generation + 1)
+
+    def get(self, key):
+        """
+        Return the value of a key.
+
+        Returns:
+            The value, or MISSING if the key is absent, expired or being
+            rewritten by another process
+        """
+        key = key.encode()
+        key_hash = _key_hash(key)
+        buf = self._buf
+        for offset in self._offsets(key_hash):
+            sequence, expires_at, slot_hash, value_len, key_len, kind = _SLOT.unpack_from(buf, offset)
+            if kind == _EMPTY or slot_hash != key_hash or sequence & 1:
+                continue
+            start = offset + _SLOT_HEADER_SIZE
+            if buf[start:start + key_len] != key:
+                continue
+            if expires_at <= self.clock():
+                return MISSING
+            if kind == _ABSENT:
+                value = ABSENT
+            else:
+                try:
+                    value = self.codec.loads(buf[start + key_len:start + key_len + value_len])
+                except Exception:
+                    return MISSING  # Torn read of a slot rewritten meanwhile
+            if _SEQUENCE.unpack_from(buf, offset)[0] != sequence:
+                return MISSING
+            return value
+        return MISSING
+
+    def set(self, key, value, ttl=None, generation=None):
+        """
+        Store a value, replacing the entry closest to expiring if the
+        key's slots are all taken.
+
+        Args:
+            key (str): The key
+            value: The value, or ABSENT; values too large for a slot are
+                not cached
+            ttl (float): Seconds until the entry expires (None: never)
+            generation (int): ``generation`` read before computing the
+                value; nothing is stored if a removal happened since
+
+        Raises:
+            ValueError: If the value cannot be pickled
+        """
+        key = key.encode()
+        if value is ABSENT:
+            kind, data = _ABSENT, b''
+        else:
+            try:
+                kind, data = _VALUE, self.codec.dumps(value)
+            except (TypeError, AttributeError, pickle.PicklingError) as e:
+                raise ValueError(f"Cannot store {type(value).__name__} in the shared cache: {e}") from e
+        if len(key) + len(data) > self._capacity:
+            return
+        key_hash = _key_hash(key)
+        with self._write_lock():
+            if generation is not None and generation != self.generation:
+                return
+            now = self.clock()
+            expires_at = float('inf') if ttl is None else now + ttl
+            target = free = oldest = None
+            for offset in self._offsets(key_hash):
+                if self._holds(offset, key_hash, key):
+                    target = offset
+                    break
+                _, slot_expires, _, _, _, slot_kind = _SLOT.unpack_from(self._buf, offset)
+                if free is None and (slot_kind == _EMPTY or slot_expires <= now):
+                    free = offset
+                if oldest is None or slot_expires < oldest[0]:
+                    oldest = (slot_expires, offset)
+            if target is None:
+                target = free if free is not None else oldest[1]
+            self._write(target, (expires_at, key_hash, len(data), len(key), kind), key + data)
+
+    def discard(self, key):
+        """Drop a key, if present."""
+        key = key.encode()
+        key_hash = _key_hash(key)
+        with self._write_lock():
+            self._bump_generation()
+            for offset in self._offsets(key_hash):
+                if self._holds(offset, key_hash, key):
+                    self._write(offset, (0.0, 0, 0, 0, _EMPTY))
+                    break
+
+    def clear(self):
+        """Drop every entry."""
+        with self._write_lock():
+            self._bump_generation()
+            for offset in range(_HEADER_SIZE, len(self._buf), self.slot_size):
+                if _SLOT.unpack_from(self._buf, offset)[5] != _EMPTY:
+                    self._write(offset, (0.0, 0, 0, 0, _EMPTY))
+
+    def close(self):
+        """Unmap the segment from this process."""
+        self._buf.release()
+        self._shm.close()
+
+    def unlink(self):
+        """Remove the segment (processes mapping it keep their mapping)."""
+        resource_tracker.register(self._shm._name, 'shared_memory')  # unlink() unregisters it
+        self._shm.unlink()
+        with suppress(FileNotFoundError):
+            os.unlink(self._lock_path)
+
+
+_bus_ids = itertools.count()
+
+
+class InvalidationBus:
+    """
+    Broadcast of cache invalidations between the processes of a host.
+
+    Every process binds a Unix datagram socket in a shared directory and
+    listens to it on a daemon thread; ``publish`` sends a datagram to every
+    other socket of the directory. Sockets left behind by processes that
+    exited are removed by the first publisher to find them dead.
+    """
+
+    def __init__(self, directory, handler, timeout=0.05):
+        """
+        Bind this process's socket and start listening.
+
+        Args:
+            directory (str): Directory holding the sockets of all processes
+            handler (callable): Called as ``handler(entity, obj_id)`` for
+                each invalidation received (``obj_id`` is None when every
+                entry of the entity was dropped)
+            timeout (float): Seconds to wait for a process whose queue is
+                full before giving up on it
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.handler = handler
+        self.path = os.path.join(directory, f'{os.getpid()}-{next(_bus_ids)}.sock')
+        self._receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._receiver.bind(self.path)
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.settimeout(timeout)
+        self._sender_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._listen, name='cache-invalidation', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def publish(self, entity, obj_id=None):
+        """
+        Tell the other processes to drop a cached entry.
+
+        Args:
+            entity (str): Entity name
+            obj_id (str): ID to drop; None drops every entry of the entity
+        """
+        message = f"{entity}\n{obj_id or ''}".encode()
+        with self._sender_lock:
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if path == self.path or not name.endswith('.sock'):
+                    continue
+                try:
+                    self._sender.sendto(message, path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    with suppress(OSError):
+                        os.unlink(path)  # Its process exited
+                except OSError as error:
+                    logger.warning("Could not send cache invalidation to %s: %s", path, error)
+
+    def _listen(self):
+        """Receive invalidations until the bus is closed."""
+        while True:
+            try:
+                message = self._receiver.recv(4096)
+            except OSError:
+                return
+            if not message:
+                return
+            entity, _, obj_id = message.decode().partition('\n')
+            try:
+                self.handler(entity, obj_id or None)
+            except Exception:
+                logger.exception("Cache invalidation of %s %s failed", entity, obj_id)
+
+    def close(self):
+        """Stop listening and remove this process's socket."""
+        with suppress(OSError):
+            os.unlink(self.path)
+        with suppress(OSError):
+            self._receiver.shutdown(socket.SHUT_RDWR)
+        self._receiver.close()
+        self._sender.close()
+        atexit.unregister(self.close)
@@ -1,22 +1,84 @@
 """
 SQLAlchemy repository implementation for database persistence.
 """
-from app.models.base import db
+from sqlalchemy import and_, inspect, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, selectinload
+from app.metrics import timed_methods
+from app.models.base import commit, db, unit_of_work
+from app.persistence.geo import MAX_DISTANCE_KM, haversine_km, radius_boxes, split_box
+from app.persistence.pagination import cursor_for, decode_cursor
 
 
+# Relationships to eager-load per endpoint, by model name. Each profile
+# lists relationship paths; many-to-one links are joined into the main
+# query and collections are fetched with one extra SELECT ... IN per path,
+# so a page costs a constant number of statements whatever its size.
+LOADING_PROFILES = {
+    'Place': {
+        'list': ('owner', 'amenities'),
+        'detail': ('owner', 'amenities'),
+        'reviews': ('reviews.user',),
+    },
+    'Review': {
+        'list': ('user',),
+        'detail': ('user',),
+    },
+}
+
+
+@timed_methods('repository', exclude=('transaction', 'iter_all'))
 class SQLAlchemyRepository:
     """
     Repository class for database operations using SQLAlchemy.
     """
 
-    def __init__(self, model):
+    def __init__(self, model, profiles=None):
         """
         Initialize the repository with a specific model.
 
         Args:
             model: SQLAlchemy model class
+            profiles (dict): Loading profiles mapping a name to relationship
+                paths such as ``'reviews.user'``; defaults to the model's
+                entry in LOADING_PROFILES
         """
         self.model = model
+        self.profiles = profiles if profiles is not None else LOADING_PROFILES.get(model.__name__, {})
+        self._options = {}
+
+    def _loader_options(self, profile):
+        """
+        Build (and memoize) the loader options of a loading profile.
+
+        Args:
+            profile (str): Profile name, or None for lazy loading
+
+        Returns:
+            list: SQLAlchemy loader options; empty for unknown profiles
+        """
+        if profile is None or profile not in self.profiles:
+            return []
+        if profile not in self._options:
+            options = []
+            for path in self.profiles[profile]:
+                option, model = None, self.model
+                for name in path.split('.'):
+                    relationship = inspect(model).relationships[name]
+                    loader = selectinload if relationship.uselist else joinedload
+                    attribute = getattr(model, name)
+                    if option is None:
+                        option = loader(attribute)
+                    else:
+                        option = getattr(option, loader.__name__)(attribute)
+                    model = relationship.mapper.class_
+                options.append(option)
+            self._options[profile] = options
+        return self._options[profile]
+
+    def _query(self, profile=None):
+        """Return a query on the model with a profile's loader options."""
+        return self.model.query.options(*self._loader_options(profile))
 
     def add(self, obj):
         """
@@ -26,29 +88,165 @@ class SQLAlchemyRepository:
             obj: Object to be stored
         """
         db.session.add(obj)
-        db.session.commit()
+        commit()
         return obj
 
-    def get(self, obj_id):
+    def add_if_absent(self, obj, attr_name):
+        """
+        Add an object unless another one already holds its attribute value.
+
+        The insert runs in a savepoint and relies on the column's unique
+        constraint, so concurrent callers cannot both succeed.
+
+        Args:
+            obj: Object to be stored
+            attr_name (str): The attribute whose value must be unused
+
+        Returns:
+            The object already holding the value, or None if ``obj`` was
+            added
+        """
+        value = getattr(obj, attr_name)
+        existing = self.get_by_attribute(attr_name, value)
+        if existing is not None:
+            return existing
+        try:
+            with db.session.begin_nested():
+                db.session.add(obj)
+        except IntegrityError:
+            return self.get_by_attribute(attr_name, value)
+        commit()
+        return None
+
+    def add_many(self, objs):
+        """
+        Add several objects in a single transaction.
+
+        The objects are flushed together, which lets SQLAlchemy batch the
+        INSERT statements (executemany / insertmanyvalues) instead of
+        issuing one round trip and one commit per row.
+
+        Args:
+            objs (list): Objects to be stored
+
+        Returns:
+            list: The stored objects
+        """
+        objs = list(objs)
+        with unit_of_work():
+            db.session.add_all(objs)
+        return objs
+
+    def transaction(self):
+        """
+        Open a unit of work: writes inside the block share one transaction.
+
+        Returns:
+            A context manager committing on success, rolling back on error
+        """
+        return unit_of_work()
+
+    def get(self, obj_id, profile=None):
         """
         Retrieve an object by its ID.
 
         Args:
             obj_id: The unique identifier of the object
+            profile (str): Loading profile naming relationships to eager-load
 
         Returns:
             The object if found, None otherwise
         """
-        return self.model.query.get(obj_id)
+        return db.session.get(self.model, obj_id, options=self._loader_options(profile))
 
-    def get_all(self):
+    def attach(self, obj):
+        """
+        Attach an object loaded by an earlier session (e.g. one held by a
+        CachingRepository) to the current session, without a query.
+
+        Args:
+            obj: Object loaded from this repository
+
+        Returns:
+            The session's instance of the object
+        """
+        return db.session.merge(obj, load=False)
+
+    def get_all(self, profile=None):
         """
         Retrieve all objects from the database.
 
+        Args:
+            profile (str): Loading profile naming relationships to eager-load
+
         Returns:
             List of all stored objects
         """
-        return self.model.query.all()
+        return self._query(profile).all()
+
+    def get_page(self, limit, after=None, profile=None):
+        """
+        Retrieve one page of objects ordered by ``(created_at, id)``.
+
+        Uses a keyset predicate rather than OFFSET, so every page costs the
+        same regardless of how deep into the collection it is.
+
+        Args:
+            limit (int): Maximum number of objects to return
+            after (str): Cursor of the last object of the previous page
+            profile (str): Loading profile naming relationships to eager-load
+
+        Returns:
+            tuple: ``(objects, next_cursor)``; next_cursor is None on the
+            last page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        query = self._query(profile).order_by(self.model.created_at, self.model.id)
+        if after:
+            created_at, obj_id = decode_cursor(after)
+            query = query.filter(or_(
+                self.model.created_at > created_at,
+                and_(self.model.created_at == created_at, self.model.id > obj_id)
+            ))
+        objects = query.limit(limit + 1).all()
+        next_cursor = cursor_for(objects[limit - 1]) if len(objects) > limit else None
+        return objects[:limit], next_cursor
+
+    def iter_all(self, chunk_size=1000, after=None, profile=None):
+        """
+        Iterate over all objects ordered by ``(created_at, id)``, one chunk
+        at a time.
+
+        Runs a single query whose rows are fetched ``chunk_size`` at a time
+        (``yield_per``) in a session of its own. The session only holds weak
+        references to unmodified objects, so memory use does not grow with
+        the collection as long as the caller lets go of each chunk. The
+        session is closed, and the objects detached, once the iteration ends.
+
+        Args:
+            chunk_size (int): Number of objects per chunk
+            after (str): Cursor to resume after, or None to start at the beginning
+            profile (str): Loading profile naming relationships to eager-load
+
+        Yields:
+            list: The objects of each chunk
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        statement = (select(self.model).options(*self._loader_options(profile))
+                     .order_by(self.model.created_at, self.model.id)
+                     .execution_options(yield_per=chunk_size))
+        if after:
+            created_at, obj_id = decode_cursor(after)
+            statement = statement.where(or_(
+                self.model.created_at > created_at,
+                and_(self.model.created_at == created_at, self.model.id > obj_id)
+            ))
+        with Session(db.engine) as session:
+            yield from session.scalars(statement).partitions()
 
     def update(self, obj_id, data):
         """
@@ -66,6 +264,22 @@ class SQLAlchemyRepository:
             obj.update(data)
         return obj
 
+    def update_many(self, updates):
+        """
+        Update several objects in a single transaction.
+
+        Args:
+            updates (dict): Maps object IDs to dictionaries of attributes
+
+        Returns:
+            list: The updated objects (IDs that do not exist are skipped)
+        """
+        with unit_of_work():
+            objs = self.model.query.filter(self.model.id.in_(list(updates))).all()
+            for obj in objs:
+                obj.update(updates[obj.id])
+        return objs
+
     def delete(self, obj_id):
         """
         Delete an object from the database.
@@ -79,10 +293,29 @@ class SQLAlchemyRepository:
         obj = self.get(obj_id)
         if obj:
             db.session.delete(obj)
-            db.session.commit()
+            commit()
             return True
         return False
 
+    def delete_many(self, obj_ids):
+        """
+        Delete several objects in a single transaction.
+
+        Objects are loaded with one query and deleted through the session so
+        ORM-level cascades still apply.
+
+        Args:
+            obj_ids (list): Unique identifiers of the objects to delete
+
+        Returns:
+            int: Number of objects deleted
+        """
+        with unit_of_work():
+            objs = self.model.query.filter(self.model.id.in_(list(obj_ids))).all()
+            for obj in objs:
+                db.session.delete(obj)
+        return len(objs)
+
     def get_by_attribute(self, attr_name, attr_value):
         """
         Retrieve an object by a specific attribute value.
@@ -95,3 +328,82 @@ class SQLAlchemyRepository:
             The first object that matches, None otherwise
         """
         return self.model.query.filter_by(**{attr_name: attr_value}).first()
+
+    def get_all_by_attribute(self, attr_name, attr_value):
+        """
+        Retrieve all objects matching a specific attribute value.
+
+        Args:
+            attr_name: The name of the attribute to search by
+            attr_value: The value to match
+
+        Returns:
+            List of matching objects
+        """
+        return self.model.query.filter_by(**{attr_name: attr_value}).all()
+
+    def _box_filter(self, boxes):
+        """
+        Build a bounding-box predicate the (latitude, longitude) index can serve.
+
+        Args:
+            boxes (list): ``(min_lat, min_lon, max_lat, max_lon)`` tuples
+        """
+        return or_(*[
+            and_(
+                self.model.latitude.between(min_lat, max_lat),
+                self.model.longitude.between(min_lon, max_lon)
+            )
+            for min_lat, min_lon, max_lat, max_lon in boxes
+        ])
+
+    def get_within_box(self, min_lat, min_lon, max_lat, max_lon):
+        """
+        Retrieve the objects located inside a bounding box.
+
+        A box with ``min_lon > max_lon`` wraps around the antimeridian.
+
+        Returns:
+            List of matching objects
+        """
+        boxes = split_box(min_lat, min_lon, max_lat, max_lon)
+        return self.model.query.filter(self._box_filter(boxes)).all()
+
+    def get_within_radius(self, lat, lon, radius_km):
+        """
+        Retrieve the objects within a distance of a point, nearest first.
+
+        The database prefilters on the enclosing bounding box; exact
+        distances are then checked in Python.
+
+        Returns:
+            List of ``(object, distance_km)`` tuples
+        """
+        candidates = self.model.query.filter(self._box_filter(radius_boxes(lat, lon, radius_km)))
+        matches = []
+        for obj in candidates:
+            distance = haversine_km(lat, lon, obj.latitude, obj.longitude)
+            if distance <= radius_km:
+                matches.append((obj, distance))
+        matches.sort(key=lambda match: match[1])
+        return matches
+
+    def get_nearest(self, lat, lon, k, radius_km=10.0):
+        """
+        Retrieve the ``k`` objects nearest to a point.
+
+        Args:
+            lat (float): Latitude of the point
+            lon (float): Longitude of the point
+            k (int): Number of objects to return
+            radius_km (float): Initial search radius, doubled until enough
+                objects are found
+
+        Returns:
+            List of ``(object, distance_km)`` tuples, nearest first
+        """
+        while True:
+            matches = self.get_within_radius(lat, lon, radius_km)
+            if len(matches) >= k or radius_km >= MAX_DISTANCE_KM:
+                return matches[:k]
+            radius_km = min(radius_km * 2, MAX_DISTANCE_KM)
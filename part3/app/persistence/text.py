@@ -0,0 +1,50 @@
+"""
+Text analysis and BM25 scoring helpers for full-text search.
+"""
+import math
+import re
+import unicodedata
+
+_WORD = re.compile(r'\w+')
+_COMBINING = re.compile(r'[\u0300-\u036f]')
+
+# BM25 parameters: term frequency saturation and document length normalization.
+# A term occurring ``count`` times in a document of ``length`` terms scores
+# idf * count * (K1 + 1) / (count + K1 * (1 - B + B * length / average length))
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text):
+    """
+    Split text into search terms.
+
+    Terms are case-folded words with their accents removed, so "Café" and
+    "cafe" match.
+
+    Args:
+        text (str): Text to split (None is treated as empty)
+
+    Returns:
+        list: The terms, in order of appearance
+    """
+    if not text:
+        return []
+    if text.isascii():
+        return _WORD.findall(text.lower())
+    return _WORD.findall(_COMBINING.sub('', unicodedata.normalize('NFKD', text.casefold())))
+
+
+def idf(documents, frequency):
+    """
+    Compute the BM25 inverse document frequency of a term.
+
+    Args:
+        documents (int): Number of documents in the collection
+        frequency (int): Number of documents containing the term
+
+    Returns:
+        float: The (always positive) weight of the term
+    """
+    return math.log(1.0 + (documents - frequency + 0.5) / (frequency + 0.5))
+
@@ -0,0 +1,77 @@
+"""
+Caching of serialized entity representations.
+"""
+import threading
+from collections import OrderedDict
+
+
+class SerializationCache:
+    """
+    Bounded LRU cache of ``to_dict()`` results.
+
+    Entries are keyed by entity ID and tagged with the entity's
+    ``serial_version``; any mutation of the entity (or of an entity nested
+    in its representation) changes that version, so stale entries are
+    simply rebuilt on their next use.
+    """
+
+    def __init__(self, maxsize=10000):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize (int): Maximum number of cached representations;
+                0 disables caching
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # id -> (version, dict)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Return the number of cached representations."""
+        return len(self._entries)
+
+    def serialize(self, entity, store=True):
+        """
+        Return the dictionary representation of an entity.
+
+        The returned dict is shared between callers and must not be mutated.
+
+        Args:
+            entity: Entity with ``id``, ``serial_version`` and ``to_dict()``
+            store (bool): Whether to cache a representation built on a miss;
+                one-off scans of a whole collection pass False so they do
+                not evict the hot entries
+
+        Returns:
+            dict: Dictionary representation of the entity
+        """
+        version = entity.serial_version
+        with self._lock:
+            entry = self._entries.get(entity.id)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(entity.id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        data = entity.to_dict()
+        if store and self.maxsize > 0:
+            with self._lock:
+                self._entries[entity.id] = (version, data)
+                self._entries.move_to_end(entity.id)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return data
+
+    def discard(self, entity_id):
+        """Drop the cached representation of an entity, if any."""
+        with self._lock:
+            self._entries.pop(entity_id, None)
+
+    def clear(self):
+        """Drop every cached representation."""
+        with self._lock:
+            self._entries.clear()
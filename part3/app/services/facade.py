@@ -2,13 +2,18 @@
 Facade pattern implementation for the HBnB application.
 Provides a simplified interface to the Business Logic layer.
 """
+import threading
+from app.metrics import timed_methods
 from app.persistence.repository import InMemoryRepository
+from app.persistence.indexes import BitmapIndex, GridIndex, HashIndex, SortedIndex, TextIndex
+from app.services.cache import SerializationCache
 from app.models.user import User
 from app.models.place import Place
 from app.models.review import Review
 from app.models.amenity import Amenity
 
 
+@timed_methods('facade', exclude=('serialize',))
 class HBnBFacade:
     """
     Facade class to manage interactions between the API and the business logic.
@@ -16,10 +21,130 @@ class HBnBFacade:
 
     def __init__(self):
         """Initialize the facade with repository instances for each entity."""
-        self.user_repo = InMemoryRepository()
-        self.place_repo = InMemoryRepository()
-        self.review_repo = InMemoryRepository()
-        self.amenity_repo = InMemoryRepository()
+        # One writer lock for every repository: units of work span several
+        # of them (e.g. a review also updates its place and author), and a
+        # single lock cannot deadlock. Reads never take it.
+        lock = threading.RLock()
+        self.user_repo = InMemoryRepository(indexes=[HashIndex('email', unique=True)], lock=lock)
+        # Full-text documents are places: title, description and the text
+        # of their reviews
+        place_text = TextIndex({'title': 3, 'description': 1})
+        self.place_repo = InMemoryRepository(indexes=[
+            HashIndex('owner_id'),
+            GridIndex(),
+            place_text,
+            BitmapIndex('amenity_ids'),
+            SortedIndex('price')
+        ], lock=lock)
+        self.review_repo = InMemoryRepository(indexes=[
+            HashIndex('place_id'),
+            HashIndex('user_id'),
+            place_text.linked({'text': 1}, 'place_id')
+        ], lock=lock)
+        self.amenity_repo = InMemoryRepository(indexes=[HashIndex('name', unique=True)], lock=lock)
+        self.serialization_cache = SerializationCache()
+
+    def serialize(self, entity, store=True):
+        """
+        Convert an entity to its dictionary representation.
+
+        Representations are cached until the entity changes.
+
+        Args:
+            entity: A User, Place, Review or Amenity
+            store (bool): Whether to cache the representation if it is not
+                cached yet
+
+        Returns:
+            dict: Dictionary representation of the entity (must not be mutated)
+        """
+        return self.serialization_cache.serialize(entity, store)
+
+    def _write_batch(self, repo, prepared, write, check=None, chunk_size=0, atomic=False):
+        """
+        Store the valid objects of a batch, in order.
+
+        Args:
+            repo (InMemoryRepository): Repository whose transaction covers
+                the writes
+            prepared (list): ``(object, None)`` for valid items and
+                ``(None, error message)`` for invalid ones
+            write (callable): Stores one object (and its links)
+            check (callable): Returns an error message for an object that
+                can no longer be stored (e.g. a unique value taken since it
+                was validated), or None; called under the writer lock
+            chunk_size (int): Objects stored per transaction; 0 stores
+                everything in one
+            atomic (bool): Store nothing unless every item is valid
+
+        Returns:
+            list: ``(object, None)`` or ``(None, error message)`` per item
+        """
+        results = list(prepared)
+        if atomic and any(error for _, error in results):
+            return [(None, error or "Not created: another item of the batch failed") for _, error in results]
+        pending = [index for index, (obj, _) in enumerate(results) if obj is not None]
+        size = len(pending) if atomic or chunk_size <= 0 else chunk_size
+        for start in range(0, len(pending), max(size, 1)):
+            chunk = pending[start:start + size]
+            with repo.transaction():
+                failed = {}
+                if check is not None:
+                    for index in chunk:
+                        error = check(results[index][0])
+                        if error:
+                            failed[index] = error
+                if atomic and failed:
+                    return [(None, failed.get(index, "Not created: another item of the batch failed"))
+                            for index in range(len(results))]
+                for index in chunk:
+                    if index in failed:
+                        results[index] = (None, failed[index])
+                    else:
+                        write(results[index][0])
+        return results
+
+    @staticmethod
+    def _prepare_batch(items, build):
+        """
+        Build the objects of a batch, collecting per-item errors.
+
+        Args:
+            items (list): Item dictionaries
+            build (callable): Builds and validates the object of one item,
+                raising ValueError (or KeyError for a missing field)
+
+        Returns:
+            list: ``(object, None)`` or ``(None, error message)`` per item
+        """
+        prepared = []
+        for item in items:
+            try:
+                prepared.append((build(item), None))
+            except KeyError as e:
+                prepared.append((None, f"Missing field {e}"))
+            except (TypeError, ValueError) as e:
+                prepared.append((None, str(e)))
+        return prepared
+
+    @staticmethod
+    def _invalidate(repo, *objs):
+        """
+        Drop the cached copies of objects mutated in place.
+
+        Models are updated in place rather than through ``repo.update``, so
+        a repository behind a read-through cache (see CachingRepository)
+        must be told which of its objects changed; other repositories have
+        nothing to drop.
+
+        Args:
+            repo: The repository holding the objects
+            objs: The mutated objects
+        """
+        invalidate = getattr(repo, 'invalidate', None)
+        if invalidate is not None:
+            for obj in objs:
+                invalidate(obj.id)
 
     # User methods
     def create_user(self, user_data):
@@ -35,7 +160,7 @@ class HBnBFacade:
         Raises:
             ValueError: If validation fails or email already exists
         """
-        # Check if email already exists
+        # Check if email already exists (before paying for the password hash)
         existing_user = self.user_repo.get_by_attribute('email', user_data['email'])
         if existing_user:
             raise ValueError("Email already registered")
@@ -48,9 +173,48 @@ class HBnBFacade:
             is_admin=user_data.get('is_admin', False)
         )
         user.validate()
-        self.user_repo.add(user)
+        # Another request may have registered the email in the meantime
+        if self.user_repo.add_if_absent(user, 'email') is not None:
+            raise ValueError("Email already registered")
         return user
 
+    def create_users(self, items, chunk_size=0, atomic=False):
+        """
+        Create several users.
+
+        Args:
+            items (list): Dictionaries of user attributes
+            chunk_size (int): Users stored per transaction (0: one transaction)
+            atomic (bool): Create nothing unless every item is valid
+
+        Returns:
+            list: ``(user, None)`` or ``(None, error message)`` per item
+        """
+        seen = set()
+
+        def build(user_data):
+            email = user_data['email']
+            if email in seen or self.user_repo.get_by_attribute('email', email):
+                raise ValueError("Email already registered")
+            user = User(
+                first_name=user_data['first_name'],
+                last_name=user_data['last_name'],
+                email=email,
+                password=user_data.get('password'),
+                is_admin=user_data.get('is_admin', False)
+            )
+            user.validate()
+            seen.add(email)
+            return user
+
+        def check(user):
+            if self.user_repo.get_by_attribute('email', user.email):
+                return "Email already registered"
+            return None
+
+        return self._write_batch(self.user_repo, self._prepare_batch(items, build), self.user_repo.add,
+                                 check, chunk_size, atomic)
+
     def get_user(self, user_id):
         """
         Retrieve a user by ID.
@@ -84,6 +248,23 @@ class HBnBFacade:
         """
         return self.user_repo.get_all()
 
+    def get_users_page(self, limit, after=None, profile='list'):
+        """
+        Retrieve one page of users ordered by creation time.
+
+        Args:
+            limit (int): Maximum number of users to return
+            after (str): Cursor returned with the previous page
+            profile (str): Loading profile for database-backed repositories
+
+        Returns:
+            tuple: (list of user objects, cursor of the next page or None)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        return self.user_repo.get_page(limit, after, profile)
+
     def update_user(self, user_id, user_data):
         """
         Update a user's information.
@@ -102,13 +283,19 @@ class HBnBFacade:
         if not user:
             return None
 
-        # Check if email is being updated and if it already exists
-        if 'email' in user_data and user_data['email'] != user.email:
-            existing_user = self.user_repo.get_by_attribute('email', user_data['email'])
-            if existing_user:
-                raise ValueError("Email already registered")
+        # Hash outside the transaction: its lock is shared by every
+        # repository, so holding it for a bcrypt round would stall all writes
+        password_hash = user.hash_password(user_data['password']) if 'password' in user_data else None
+
+        with self.user_repo.transaction():
+            # Check if email is being updated and if it already exists
+            if 'email' in user_data and user_data['email'] != user.email:
+                existing_user = self.user_repo.get_by_attribute('email', user_data['email'])
+                if existing_user:
+                    raise ValueError("Email already registered")
 
-        user.update(user_data)
+            user.update(user_data, password_hash)
+        self._invalidate(self.user_repo, user)
         return user
 
     # Amenity methods
@@ -132,9 +319,41 @@ class HBnBFacade:
 
         amenity = Amenity(name=amenity_data['name'])
         amenity.validate()
-        self.amenity_repo.add(amenity)
+        if self.amenity_repo.add_if_absent(amenity, 'name') is not None:
+            raise ValueError("Amenity name already exists")
         return amenity
 
+    def create_amenities(self, items, chunk_size=0, atomic=False):
+        """
+        Create several amenities.
+
+        Args:
+            items (list): Dictionaries of amenity attributes
+            chunk_size (int): Amenities stored per transaction (0: one transaction)
+            atomic (bool): Create nothing unless every item is valid
+
+        Returns:
+            list: ``(amenity, None)`` or ``(None, error message)`` per item
+        """
+        seen = set()
+
+        def build(amenity_data):
+            name = amenity_data['name']
+            if name in seen or self.amenity_repo.get_by_attribute('name', name):
+                raise ValueError("Amenity name already exists")
+            amenity = Amenity(name=name)
+            amenity.validate()
+            seen.add(name)
+            return amenity
+
+        def check(amenity):
+            if self.amenity_repo.get_by_attribute('name', amenity.name):
+                return "Amenity name already exists"
+            return None
+
+        return self._write_batch(self.amenity_repo, self._prepare_batch(items, build), self.amenity_repo.add,
+                                 check, chunk_size, atomic)
+
     def get_amenity(self, amenity_id):
         """
         Retrieve an amenity by ID.
@@ -156,6 +375,23 @@ class HBnBFacade:
         """
         return self.amenity_repo.get_all()
 
+    def get_amenities_page(self, limit, after=None, profile='list'):
+        """
+        Retrieve one page of amenities ordered by creation time.
+
+        Args:
+            limit (int): Maximum number of amenities to return
+            after (str): Cursor returned with the previous page
+            profile (str): Loading profile for database-backed repositories
+
+        Returns:
+            tuple: (list of amenity objects, cursor of the next page or None)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        return self.amenity_repo.get_page(limit, after, profile)
+
     def update_amenity(self, amenity_id, amenity_data):
         """
         Update an amenity's information.
@@ -174,13 +410,15 @@ class HBnBFacade:
         if not amenity:
             return None
 
-        # Check if name is being updated and if it already exists
-        if 'name' in amenity_data and amenity_data['name'] != amenity.name:
-            existing_amenity = self.amenity_repo.get_by_attribute('name', amenity_data['name'])
-            if existing_amenity:
-                raise ValueError("Amenity name already exists")
+        with self.amenity_repo.transaction():
+            # Check if name is being updated and if it already exists
+            if 'name' in amenity_data and amenity_data['name'] != amenity.name:
+                existing_amenity = self.amenity_repo.get_by_attribute('name', amenity_data['name'])
+                if existing_amenity:
+                    raise ValueError("Amenity name already exists")
 
-        amenity.update(amenity_data)
+            amenity.update(amenity_data)
+        self._invalidate(self.amenity_repo, amenity)
         return amenity
 
     # Place methods
@@ -211,28 +449,82 @@ class HBnBFacade:
         )
         place.validate()
 
-        # Add amenities if provided
-        if 'amenities' in place_data:
-            for amenity_id in place_data['amenities']:
-                amenity = self.get_amenity(amenity_id)
+        # Store the place, its amenities and the owner back-link together
+        with self.place_repo.transaction():
+            if 'amenities' in place_data:
+                for amenity_id in place_data['amenities']:
+                    amenity = self.get_amenity(amenity_id)
+                    if amenity:
+                        place.add_amenity(amenity)
+
+            self.place_repo.add(place)
+            owner.add_place(place)
+        self._invalidate(self.user_repo, owner)
+        return place
+
+    def create_places(self, items, chunk_size=0, atomic=False):
+        """
+        Create several places.
+
+        Owners and amenities are looked up once per distinct ID for the
+        whole batch.
+
+        Args:
+            items (list): Dictionaries of place attributes, validated against
+                the API's place model
+            chunk_size (int): Places stored per transaction (0: one transaction)
+            atomic (bool): Create nothing unless every item is valid
+
+        Returns:
+            list: ``(place, None)`` or ``(None, error message)`` per item
+        """
+        owner_ids, amenity_ids = set(), set()
+        for place_data in items:
+            owner_ids.add(place_data.get('owner_id'))
+            amenity_ids.update(place_data.get('amenities') or ())
+        owners = {owner_id: self.get_user(owner_id) for owner_id in owner_ids}
+        amenities = {amenity_id: self.get_amenity(amenity_id) for amenity_id in amenity_ids}
+
+        def build(place_data):
+            owner = owners.get(place_data['owner_id'])
+            if not owner:
+                raise ValueError("Owner not found")
+            place = Place(
+                title=place_data['title'],
+                description=place_data.get('description', ''),
+                price=place_data['price'],
+                latitude=place_data['latitude'],
+                longitude=place_data['longitude'],
+                owner=owner
+            )
+            place.validate()
+            for amenity_id in place_data.get('amenities') or ():
+                amenity = amenities.get(amenity_id)
                 if amenity:
                     place.add_amenity(amenity)
+            return place
 
-        self.place_repo.add(place)
-        owner.add_place(place)
-        return place
+        def write(place):
+            self.place_repo.add(place)
+            place.owner.add_place(place)
+            self._invalidate(self.user_repo, place.owner)
+
+        return self._write_batch(self.place_repo, self._prepare_batch(items, build), write,
+                                 chunk_size=chunk_size, atomic=atomic)
 
-    def get_place(self, place_id):
+    def get_place(self, place_id, profile=None):
         """
         Retrieve a place by ID.
 
         Args:
             place_id (str): The place's unique identifier
+            profile (str): Loading profile naming the related objects the
+                caller will read (see sqlalchemy_repository.LOADING_PROFILES)
 
         Returns:
             Place: The place object if found, None otherwise
         """
-        return self.place_repo.get(place_id)
+        return self.place_repo.get(place_id, profile)
 
     def get_all_places(self):
         """
@@ -243,6 +535,174 @@ class HBnBFacade:
         """
         return self.place_repo.get_all()
 
+    def get_places_page(self, limit, after=None, profile='list', selection=None):
+        """
+        Retrieve one page of places ordered by creation time.
+
+        Args:
+            limit (int): Maximum number of places to return
+            after (str): Cursor returned with the previous page
+            profile (str): Loading profile for database-backed repositories
+            selection (Selection): Only return these places (see select_places)
+
+        Returns:
+            tuple: (list of place objects, cursor of the next page or None)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        return self.place_repo.get_page(limit, after, profile, selection)
+
+    def get_places_by_price(self, limit, after=None, min_price=None, max_price=None, descending=False,
+                            selection=None):
+        """
+        Retrieve one page of places ordered by price.
+
+        Args:
+            limit (int): Maximum number of places to return
+            after (str): Cursor returned with the previous page
+            min_price (float): Lowest price to return (None: no bound)
+            max_price (float): Highest price to return (None: no bound)
+            descending (bool): Return the most expensive places first
+            selection (Selection): Only return these places (see select_places)
+
+        Returns:
+            tuple: (list of place objects, cursor of the next page or None)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        return self.place_repo.get_page_by('price', limit, after, min_price, max_price, descending, selection)
+
+    def select_places(self, amenities=(), any_amenities=(), exclude_amenities=(), min_price=None,
+                      max_price=None):
+        """
+        Select places by their amenities and price.
+
+        Args:
+            amenities (list): IDs of amenities the places must all have
+            any_amenities (list): IDs of amenities the places must have at
+                least one of
+            exclude_amenities (list): IDs of amenities the places must not have
+            min_price (float): Lowest price per night (None: no bound)
+            max_price (float): Highest price per night (None: no bound)
+
+        Returns:
+            Selection: The selected places, or None without any filter
+        """
+        priced = min_price is not None or max_price is not None
+        if not (amenities or any_amenities or exclude_amenities or priced):
+            return None
+        selection = self.place_repo.select('amenity_ids', amenities, any_amenities, exclude_amenities)
+        if priced:
+            selection &= self.place_repo.select_range('amenity_ids', 'price', min_price, max_price)
+        return selection
+
+    def get_price_histogram(self, edges, min_price=None, max_price=None, selection=None):
+        """
+        Count places per price bucket.
+
+        Args:
+            edges (list): Ascending lower edges of the buckets; the last
+                bucket has no upper edge
+            min_price (float): Only count places from this price up
+            max_price (float): Only count places up to this price
+            selection (Selection): Only count these places (see select_places)
+
+        Returns:
+            list: Number of places per bucket
+        """
+        return self.place_repo.histogram('price', edges, min_price, max_price, selection)
+
+    def get_place_facets(self, selection=None):
+        """
+        Count places per amenity.
+
+        Args:
+            selection (Selection): Places to count (see select_places); all
+                places when None
+
+        Returns:
+            dict: 'count' of selected places and 'amenities', a list of
+            (amenity, number of selected places having it) tuples, most
+            common first
+        """
+        if selection is None:
+            selection = self.place_repo.select('amenity_ids')
+        counts = self.place_repo.facets(selection)
+        amenities = [
+            (amenity, counts[amenity.id])
+            for amenity in map(self.get_amenity, counts)
+            if amenity is not None
+        ]
+        amenities.sort(key=lambda facet: (-facet[1], facet[0].name))
+        return {'count': len(selection), 'amenities': amenities}
+
+    def search_places_within_radius(self, latitude, longitude, radius_km, selection=None):
+        """
+        Retrieve the places within a distance of a point.
+
+        Args:
+            latitude (float): Latitude of the center
+            longitude (float): Longitude of the center
+            radius_km (float): Search radius in kilometers
+            selection (Selection): Only return these places (see select_places)
+
+        Returns:
+            list: (place, distance_km) tuples, nearest first
+        """
+        return self.place_repo.get_within_radius(latitude, longitude, radius_km, selection)
+
+    def search_places_in_box(self, min_lat, min_lon, max_lat, max_lon, selection=None):
+        """
+        Retrieve the places inside a bounding box.
+
+        Args:
+            min_lat (float): Southern edge
+            min_lon (float): Western edge (may exceed max_lon to wrap the antimeridian)
+            max_lat (float): Northern edge
+            max_lon (float): Eastern edge
+            selection (Selection): Only return these places (see select_places)
+
+        Returns:
+            list: List of place objects
+        """
+        return self.place_repo.get_within_box(min_lat, min_lon, max_lat, max_lon, selection)
+
+    def get_nearest_places(self, latitude, longitude, k, selection=None):
+        """
+        Retrieve the places nearest to a point.
+
+        Args:
+            latitude (float): Latitude of the point
+            longitude (float): Longitude of the point
+            k (int): Number of places to return
+            selection (Selection): Only return these places (see select_places)
+
+        Returns:
+            list: Up to k (place, distance_km) tuples, nearest first
+        """
+        return self.place_repo.get_nearest(latitude, longitude, k, selection)
+
+    def search_places_text(self, query, limit, selection=None):
+        """
+        Retrieve the places best matching a full-text query.
+
+        Titles, descriptions and the text of the places' reviews are
+        searched; the last word of the query also matches as a prefix.
+
+        Args:
+            query (str): The query text
+            limit (int): Maximum number of places to return
+            selection (Selection): Only return these places (see select_places)
+
+        Returns:
+            list: Up to limit (place, score) tuples, best first
+        """
+        # Reviews contribute their text to the places' documents
+        self.review_repo.load_all()
+        return self.place_repo.search_text(query, limit, selection)
+
     def update_place(self, place_id, place_data):
         """
         Update a place's information.
@@ -261,16 +721,19 @@ class HBnBFacade:
         if not place:
             return None
 
-        # Handle amenities update if provided
-        if 'amenities' in place_data:
-            place.amenities = []
-            for amenity_id in place_data['amenities']:
-                amenity = self.get_amenity(amenity_id)
-                if amenity:
-                    place.add_amenity(amenity)
-            del place_data['amenities']
-
-        place.update(place_data)
+        with self.place_repo.transaction():
+            amenity_ids = place_data.pop('amenities', None)
+            # Validated first, so an invalid update changes nothing
+            place.update(place_data)
+
+            # Handle amenities update if provided
+            if amenity_ids is not None:
+                place.amenities = []
+                for amenity_id in amenity_ids:
+                    amenity = self.get_amenity(amenity_id)
+                    if amenity:
+                        place.add_amenity(amenity)
+        self._invalidate(self.place_repo, place)
         return place
 
     # Review methods
@@ -303,22 +766,73 @@ class HBnBFacade:
         )
         review.validate()
 
-        self.review_repo.add(review)
-        place.add_review(review)
-        user.add_review(review)
+        # Store the review and its back-links on place and user together
+        with self.review_repo.transaction():
+            self.review_repo.add(review)
+            place.add_review(review)
+            user.add_review(review)
+        self._invalidate(self.place_repo, place)
+        self._invalidate(self.user_repo, user)
         return review
 
-    def get_review(self, review_id):
+    def create_reviews(self, items, chunk_size=0, atomic=False):
+        """
+        Create several reviews.
+
+        Places and authors are looked up once per distinct ID for the whole
+        batch.
+
+        Args:
+            items (list): Dictionaries of review attributes, validated against
+                the API's review model
+            chunk_size (int): Reviews stored per transaction (0: one transaction)
+            atomic (bool): Create nothing unless every item is valid
+
+        Returns:
+            list: ``(review, None)`` or ``(None, error message)`` per item
+        """
+        places = {place_id: self.get_place(place_id) for place_id in {item.get('place_id') for item in items}}
+        users = {user_id: self.get_user(user_id) for user_id in {item.get('user_id') for item in items}}
+
+        def build(review_data):
+            place = places.get(review_data['place_id'])
+            if not place:
+                raise ValueError("Place not found")
+            user = users.get(review_data['user_id'])
+            if not user:
+                raise ValueError("User not found")
+            review = Review(
+                text=review_data['text'],
+                rating=review_data['rating'],
+                place=place,
+                user=user
+            )
+            review.validate()
+            return review
+
+        def write(review):
+            self.review_repo.add(review)
+            review.place.add_review(review)
+            review.user.add_review(review)
+            self._invalidate(self.place_repo, review.place)
+            self._invalidate(self.user_repo, review.user)
+
+        return self._write_batch(self.review_repo, self._prepare_batch(items, build), write,
+                                 chunk_size=chunk_size, atomic=atomic)
+
+    def get_review(self, review_id, profile=None):
         """
         Retrieve a review by ID.
 
         Args:
             review_id (str): The review's unique identifier
+            profile (str): Loading profile naming the related objects the
+                caller will read (see sqlalchemy_repository.LOADING_PROFILES)
 
         Returns:
             Review: The review object if found, None otherwise
         """
-        return self.review_repo.get(review_id)
+        return self.review_repo.get(review_id, profile)
 
     def get_all_reviews(self):
         """
@@ -329,6 +843,23 @@ class HBnBFacade:
         """
         return self.review_repo.get_all()
 
+    def get_reviews_page(self, limit, after=None, profile='list'):
+        """
+        Retrieve one page of reviews ordered by creation time.
+
+        Args:
+            limit (int): Maximum number of reviews to return
+            after (str): Cursor returned with the previous page
+            profile (str): Loading profile for database-backed repositories
+
+        Returns:
+            tuple: (list of review objects, cursor of the next page or None)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        return self.review_repo.get_page(limit, after, profile)
+
     def get_reviews_by_place(self, place_id):
         """
         Retrieve all reviews for a specific place.
@@ -339,7 +870,7 @@ class HBnBFacade:
         Returns:
             list: List of review objects for the place
         """
-        place = self.get_place(place_id)
+        place = self.get_place(place_id, profile='reviews')
         if not place:
             return []
         return place.reviews
@@ -362,7 +893,13 @@ class HBnBFacade:
         if not review:
             return None
 
-        review.update(review_data)
+        with self.review_repo.transaction():
+            old_rating = review.rating
+            review.update(review_data)
+            if review.rating != old_rating:
+                review.place.change_review_rating(old_rating, review.rating)
+        self._invalidate(self.review_repo, review)
+        self._invalidate(self.place_repo, review.place)
         return review
 
     def delete_review(self, review_id):
@@ -375,14 +912,19 @@ class HBnBFacade:
         Returns:
             bool: True if deleted, False otherwise
         """
-        review = self.get_review(review_id)
-        if not review:
-            return False
-
-        # Remove from place and user
-        if review in review.place.reviews:
-            review.place.reviews.remove(review)
-        if review in review.user.reviews:
-            review.user.reviews.remove(review)
-
-        return self.review_repo.delete(review_id)
+        with self.review_repo.transaction():
+            # Looked up under the lock so concurrent deletes cannot both
+            # unlink the review
+            review = self.get_review(review_id)
+            if not review:
+                return False
+
+            # Remove from place (updating its rating aggregates) and user
+            review.place.remove_review(review)
+            if review in review.user.reviews:
+                review.user.reviews.remove(review)
+
+            self.serialization_cache.discard(review_id)
+            self._invalidate(self.place_repo, review.place)
+            self._invalidate(self.user_repo, review.user)
+            return self.review_repo.delete(review_id)
@@ -0,0 +1,5 @@
+"""
+Benchmarks for the HBnB application.
+
+Run from the part3 directory, e.g. ``python -m benchmarks.memory``.
+"""
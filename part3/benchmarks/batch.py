@@ -0,0 +1,99 @@
+"""
+Throughput of creating places one request at a time and in batches.
+
+Creates the same places through the full HTTP stack (Flask test client on
+the shared in-memory facade):
+
+    single   one POST /api/v1/places/ per place
+    batch    POST /api/v1/places/batch with ``--batch-size`` places per
+             request, as a JSON array and as NDJSON
+
+and reports places created per second. Results are printed as JSON.
+
+Usage:
+    python -m benchmarks.batch [--places N] [--batch-size N]
+"""
+import argparse
+import json
+import random
+import time
+
+from app import create_app
+from app.services import facade
+from benchmarks.data import generate, random_place
+
+USERS = 100
+
+
+def payloads(ids, count, seed):
+    """Build ``count`` place creation payloads."""
+    rng = random.Random(seed)
+    result = []
+    for i in range(count):
+        record = random_place(rng, i, rng.randrange(len(ids['users'])), len(ids['amenities']))
+        result.append({
+            **{key: record[key] for key in ('title', 'description', 'price', 'latitude', 'longitude')},
+            'owner_id': ids['users'][record['owner']],
+            'amenities': [ids['amenities'][j] for j in record['amenities']],
+        })
+    return result
+
+
+def throughput(send, items):
+    """
+    Send ``items`` and measure the creation rate.
+
+    Returns:
+        dict: Places created per second
+    """
+    started = time.perf_counter()
+    send(items)
+    elapsed = time.perf_counter() - started
+    return {'places': len(items), 'seconds': elapsed, 'places_per_second': len(items) / elapsed}
+
+
+def run(places, batch_size, seed):
+    """Run the benchmark and return the results."""
+    app = create_app('testing')
+    client = app.test_client()
+    dataset = generate(users=USERS, places=0, reviews=0, seed=seed)
+    ids = {
+        'amenities': [facade.create_amenity({'name': name}).id for name in dataset['amenities']],
+        'users': [facade.create_user(dict(record)).id for record in dataset['users']],
+    }
+
+    def single(items):
+        for item in items:
+            assert client.post('/api/v1/places/', json=item).status_code == 201
+
+    def batches(items, ndjson=False):
+        for start in range(0, len(items), batch_size):
+            chunk = items[start:start + batch_size]
+            if ndjson:
+                body = '\n'.join(json.dumps(item) for item in chunk)
+                response = client.post('/api/v1/places/batch', data=body, content_type='application/x-ndjson')
+            else:
+                response = client.post('/api/v1/places/batch', json=chunk)
+            assert response.status_code == 201, response.get_json()
+
+    return {
+        'batch_size': batch_size,
+        'chunk_size': app.config['BATCH_CHUNK_SIZE'],
+        'single': throughput(single, payloads(ids, places, seed)),
+        'batch_json': throughput(batches, payloads(ids, places, seed + 1)),
+        'batch_ndjson': throughput(lambda items: batches(items, ndjson=True), payloads(ids, places, seed + 2)),
+    }
+
+
+def main():
+    """Parse arguments, run the benchmark and print JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--places', type=int, default=5000, help='Places created per mode')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Places per batch request')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the data set')
+    args = parser.parse_args()
+    print(json.dumps(run(args.places, args.batch_size, args.seed), indent=2))
+
+
+if __name__ == '__main__':
+    main()
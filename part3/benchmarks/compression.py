@@ -0,0 +1,58 @@
+"""
+Size and latency of place listings with and without response compression.
+
+Fills the shared facade with places, then times ``GET /api/v1/places/``
+for one page (FAST_JSON on) sent:
+
+    identity     uncompressed
+    gzip         compressed on every request (compression cache disabled)
+    gzip_cached  compressed once, then served from the compression cache
+    br / br_cached  the same with brotli, when the brotli package is installed
+
+and reports the body size of each. Results are printed as JSON.
+
+Usage:
+    python -m benchmarks.compression [--places N] [--limit N] [--repeat R]
+"""
+import argparse
+import json
+
+from app import create_app
+from app.compression import available_encodings
+from benchmarks.encoding import populate, time_requests
+
+
+def run(places, limit, repeat):
+    """Run the benchmark and return the results."""
+    app = create_app('testing')
+    app.config.update(FAST_JSON=True, PAGE_SIZE_MAX=limit)
+    populate(places)
+    client = app.test_client()
+    url = f'/api/v1/places/?limit={limit}'
+    cache = app.extensions['compression_cache']
+    max_bytes = cache.max_bytes
+
+    results = {'places': places, 'limit': limit, 'repeat': repeat,
+               'identity': time_requests(client, url, repeat, {'Accept-Encoding': 'identity'})}
+    for encoding in available_encodings():
+        headers = {'Accept-Encoding': encoding}
+        cache.max_bytes = 0
+        results[encoding] = time_requests(client, url, repeat, headers)
+        cache.max_bytes = max_bytes
+        results[f'{encoding}_cached'] = time_requests(client, url, repeat, headers)
+        results[f'{encoding}_ratio'] = results['identity']['bytes'] / results[encoding]['bytes']
+    return results
+
+
+def main():
+    """Parse arguments, run the benchmark and print JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--places', type=int, default=5000, help='Number of places created')
+    parser.add_argument('--limit', type=int, default=1000, help='Places per page')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed requests per mode')
+    args = parser.parse_args()
+    print(json.dumps(run(args.places, args.limit, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""
+Synthetic, reproducible data sets for the HBnB benchmarks.
+
+``generate`` builds plain dictionaries (no application objects), so the same
+data set can be loaded into any backend:
+
+* users with unique e-mails and a shared password;
+* places clustered around a handful of cities with a Gaussian spread (plus
+  some scattered worldwide), log-normal prices and a few amenities each;
+* amenities read from ``seed_data.sql``;
+* reviews whose places and authors follow a Zipf-like popularity skew and
+  whose ratings lean towards 4 and 5, with at most one review per user and
+  place and no owner reviewing their own place;
+* descriptions and review texts drawn from WORDS with a Zipf-like word
+  frequency, as in natural text.
+
+The same seed always yields the same data set.
+"""
+import random
+import re
+from itertools import accumulate
+from pathlib import Path
+
+SEED_FILE = Path(__file__).resolve().parent.parent / 'seed_data.sql'
+
+PASSWORD = 'benchmark-password'
+
+# (latitude, longitude) of the cities places cluster around
+CITIES = (
+    (48.8566, 2.3522), (40.7128, -74.0060), (35.6762, 139.6503),
+    (-33.8688, 151.2093), (51.5074, -0.1278), (-22.9068, -43.1729),
+    (34.0522, -118.2437), (41.3851, 2.1734), (1.3521, 103.8198),
+    (-34.6037, -58.3816), (25.2048, 55.2708), (64.1466, -21.9426),
+)
+CITY_SPREAD_DEG = 0.25
+SCATTERED_FRACTION = 0.1
+
+# Relative frequency of ratings 1 to 5
+RATING_WEIGHTS = (0.04, 0.06, 0.15, 0.35, 0.40)
+ZIPF_EXPONENT = 1.1
+
+# Vocabulary of descriptions and reviews, most frequent first
+WORDS = (
+    'the a and with of to in is great place stay room clean view host nice '
+    'close beach city center quiet comfortable bed kitchen location walk '
+    'pool sea garden balcony bright spacious cozy modern apartment house '
+    'friendly helpful easy parking wifi breakfast restaurant shops metro '
+    'station park old town river lake mountain forest village terrace '
+    'rooftop sunset sunrise family kids couple business trip weekend '
+    'holiday recommend again perfect lovely beautiful amazing small large '
+    'noisy street night bathroom shower towels linen coffee wine bar '
+    'market museum historic loft studio villa cabin chalet cottage barn '
+    'farm vineyard harbour island dunes cliff surf ski hiking bike lift '
+    'elevator stairs heating air conditioning fireplace sauna hot tub '
+    'gym desk workspace fast quiet dark cool warm sunny airy rustic'
+).split()
+DESCRIPTION_WORDS = 20
+REVIEW_WORDS = 30
+
+
+def seed_amenities(path=SEED_FILE):
+    """
+    Read the amenity names inserted by the seed script.
+
+    Args:
+        path (Path): SQL seed file
+
+    Returns:
+        list: Amenity names, in file order
+    """
+    sql = Path(path).read_text()
+    block = re.search(r'INSERT INTO amenities[^;]*;', sql, re.S)
+    if block is None:
+        raise ValueError(f"No amenities found in {path}")
+    return re.findall(r"\(\s*'[^']*'\s*,\s*'([^']*)'", block.group(0))
+
+
+def zipf_weights(count, exponent=ZIPF_EXPONENT):
+    """Return Zipf-like weights for ``count`` ranked items."""
+    return [1.0 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+_WORD_WEIGHTS = list(accumulate(zipf_weights(len(WORDS))))
+
+
+def random_location(rng):
+    """Draw a (latitude, longitude) pair, usually near one of the CITIES."""
+    if rng.random() < SCATTERED_FRACTION:
+        return rng.uniform(-60.0, 70.0), rng.uniform(-180.0, 180.0)
+    lat, lon = rng.choice(CITIES)
+    lat = min(90.0, max(-90.0, rng.gauss(lat, CITY_SPREAD_DEG)))
+    lon = (rng.gauss(lon, CITY_SPREAD_DEG) + 180.0) % 360.0 - 180.0
+    return lat, lon
+
+
+def random_text(rng, length):
+    """Draw a text of ``length`` words from WORDS."""
+    return ' '.join(rng.choices(WORDS, cum_weights=_WORD_WEIGHTS, k=length))
+
+
+def random_place(rng, index, owner, amenity_count):
+    """
+    Build one place record.
+
+    Args:
+        rng (Random): Random source
+        index (int): Sequence number, used in the title
+        owner (int): Index of the owning user
+        amenity_count (int): Number of available amenities
+
+    Returns:
+        dict: Place attributes, with ``owner`` and ``amenities`` as indexes
+    """
+    lat, lon = random_location(rng)
+    return {
+        'title': f'Place {index}',
+        'description': random_text(rng, DESCRIPTION_WORDS),
+        'price': round(min(5000.0, max(10.0, rng.lognormvariate(4.5, 0.6))), 2),
+        'latitude': lat,
+        'longitude': lon,
+        'owner': owner,
+        'amenities': sorted(rng.sample(range(amenity_count), rng.randint(0, min(5, amenity_count)))),
+    }
+
+
+def generate(users=1000, places=5000, reviews=20000, seed=0):
+    """
+    Generate a synthetic data set.
+
+    Args:
+        users (int): Number of users
+        places (int): Number of places
+        reviews (int): Target number of reviews; fewer are produced when
+            there are not enough distinct (user, place) pairs
+        seed (int): Random seed
+
+    Returns:
+        dict: ``users``, ``amenities``, ``places`` and ``reviews`` lists;
+        places and reviews refer to users, places and amenities by index
+    """
+    if users < 2 and reviews:
+        raise ValueError("Reviews need at least two users")
+    rng = random.Random(seed)
+    amenities = seed_amenities()
+
+    user_records = [
+        {'first_name': 'User', 'last_name': str(i), 'email': f'user{i}@bench.example.com', 'password': PASSWORD}
+        for i in range(users)
+    ]
+    place_records = [
+        random_place(rng, i, rng.randrange(users), len(amenities))
+        for i in range(places)
+    ]
+
+    # Popular places and prolific reviewers are spread randomly over the ranks
+    place_ranks = list(range(places))
+    user_ranks = list(range(users))
+    rng.shuffle(place_ranks)
+    rng.shuffle(user_ranks)
+    place_weights = list(accumulate(zipf_weights(places)))
+    user_weights = list(accumulate(zipf_weights(users)))
+
+    review_records, seen = [], set()
+    attempts = 0
+    while len(review_records) < reviews and attempts < reviews * 20 and places:
+        batch = reviews - len(review_records)
+        attempts += batch
+        pairs = zip(rng.choices(user_ranks, cum_weights=user_weights, k=batch),
+                    rng.choices(place_ranks, cum_weights=place_weights, k=batch))
+        for user, place in pairs:
+            if user == place_records[place]['owner'] or (user, place) in seen:
+                continue
+            seen.add((user, place))
+            review_records.append({
+                'text': random_text(rng, REVIEW_WORDS),
+                'rating': rng.choices((1, 2, 3, 4, 5), RATING_WEIGHTS)[0],
+                'user': user,
+                'place': place,
+            })
+
+    return {
+        'seed': seed,
+        'users': user_records,
+        'amenities': amenities,
+        'places': place_records,
+        'reviews': review_records,
+    }
+
+
+def load_facade(facade, dataset):
+    """
+    Load a data set through the HBnB facade.
+
+    Args:
+        facade (HBnBFacade): Facade to populate
+        dataset (dict): Data set from generate()
+
+    Returns:
+        dict: IDs of the created ``users``, ``amenities``, ``places`` and
+        ``reviews``, in data set order
+    """
+    amenities = [facade.create_amenity({'name': name}).id for name in dataset['amenities']]
+    users = [facade.create_user(dict(record)).id for record in dataset['users']]
+    places = [
+        facade.create_place({
+            **{key: record[key] for key in ('title', 'description', 'price', 'latitude', 'longitude')},
+            'owner_id': users[record['owner']],
+            'amenities': [amenities[i] for i in record['amenities']],
+        }).id
+        for record in dataset['places']
+    ]
+    reviews = [
+        facade.create_review({
+            'text': record['text'],
+            'rating': record['rating'],
+            'user_id': users[record['user']],
+            'place_id': places[record['place']],
+        }).id
+        for record in dataset['reviews']
+    ]
+    return {'users': users, 'amenities': amenities, 'places': places, 'reviews': reviews}
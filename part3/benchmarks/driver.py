@@ -0,0 +1,384 @@
+"""
+Load-test driver: create/list/get/login/review workloads per backend.
+
+Generates a synthetic data set (see benchmarks.data), loads it into each
+requested backend, then runs every workload for a fixed number of
+operations and reports throughput and p50/p95/p99 latency as JSON.
+
+Backends:
+    api     Full HTTP stack (routing, validation, marshalling) on the shared
+            in-memory facade, through the Flask test client or, with
+            ``--wsgi``, a local WSGI server over real sockets
+    memory  The facade and InMemoryRepository, called directly
+    sqlite  SQLAlchemyRepository on a SQLite database file, called the way
+            the facade calls its repositories
+
+The API is wired to the in-memory facade, so the SQLite backend is measured
+at the same layer as ``memory``; compare those two for storage cost and
+``api`` against ``memory`` for the HTTP overhead.
+
+Pass ``--baseline`` with the JSON output of an earlier run to flag
+workloads whose throughput dropped or whose p95 latency grew by more than
+``--tolerance``; the exit status is 1 when any regressed.
+
+Usage:
+    python -m benchmarks.driver [--backends api,memory,sqlite]
+        [--workloads create,list,get,login,review] [--operations N]
+        [--users N] [--places N] [--reviews N] [--seed S] [--wsgi]
+        [--baseline FILE] [--tolerance F] [--output FILE]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from itertools import accumulate
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from app import create_app
+from app.services import facade
+from benchmarks.data import PASSWORD, generate, load_facade, random_place, zipf_weights
+from benchmarks.login import percentile
+
+BACKENDS = ('api', 'memory', 'sqlite')
+WORKLOADS = ('create', 'list', 'get', 'login', 'review')
+PAGE_SIZE = 100
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Keep-alive request handler without per-request logging."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class WSGIClient:
+    """Minimal HTTP client for a local WSGI server, over one keep-alive connection."""
+
+    class Response:
+        """Status code, headers and body of a response."""
+
+        def __init__(self, status_code, headers, body):
+            self.status_code = status_code
+            self.headers = headers
+            self.body = body
+
+    def __init__(self, app):
+        """Serve ``app`` on an ephemeral local port in a background thread."""
+        self._server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietRequestHandler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        self._connection = http.client.HTTPConnection('127.0.0.1', self._server.port)
+
+    def _request(self, method, path, body=None):
+        """Send one request and read the whole response."""
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        self._connection.request(method, path, body=body, headers=headers)
+        response = self._connection.getresponse()
+        return self.Response(response.status, response.headers, response.read())
+
+    def get(self, path):
+        """Send a GET request."""
+        return self._request('GET', path)
+
+    def post(self, path, **kwargs):
+        """Send a POST request with the ``json`` keyword argument as body."""
+        return self._request('POST', path, body=json.dumps(kwargs['json']))
+
+    def close(self):
+        """Stop the server."""
+        self._connection.close()
+        self._server.shutdown()
+
+
+class ApiTarget:
+    """Runs the workloads through HTTP requests."""
+
+    def __init__(self, client):
+        self.client = client
+        self._cursor = None
+
+    def _expect(self, response, status):
+        if response.status_code != status:
+            raise RuntimeError(f'HTTP {response.status_code}')
+        return response
+
+    def create(self, payload):
+        self._expect(self.client.post('/api/v1/places/', json=payload), 201)
+
+    def list(self):
+        url = f'/api/v1/places/?limit={PAGE_SIZE}'
+        if self._cursor:
+            url += f'&after={self._cursor}'
+        response = self._expect(self.client.get(url), 200)
+        self._cursor = response.headers.get('X-Next-Cursor')
+
+    def get(self, place_id):
+        self._expect(self.client.get(f'/api/v1/places/{place_id}'), 200)
+
+    def login(self, email, password):
+        self._expect(self.client.post('/api/v1/auth/login', json={'email': email, 'password': password}), 200)
+
+    def review(self, payload):
+        self._expect(self.client.post('/api/v1/reviews/', json=payload), 201)
+
+
+class StoreTarget:
+    """Runs the workloads against a facade-like store, one app context per operation."""
+
+    def __init__(self, app, store, check_password):
+        """
+        Args:
+            app (Flask): Application providing the per-operation context
+            store: HBnBFacade or benchmarks.sql_backend.SQLStore
+            check_password (callable): ``(user, password) -> bool``
+        """
+        self.app = app
+        self.store = store
+        self.check_password = check_password
+        self._cursor = None
+
+    def create(self, payload):
+        with self.app.app_context():
+            self.store.serialize(self.store.create_place(payload))
+
+    def list(self):
+        with self.app.app_context():
+            places, self._cursor = self.store.get_places_page(PAGE_SIZE, self._cursor)
+            [self.store.serialize(place) for place in places]
+
+    def get(self, place_id):
+        with self.app.app_context():
+            self.store.serialize(self.store.get_place(place_id, 'detail'))
+
+    def login(self, email, password):
+        with self.app.app_context():
+            user = self.store.get_user_by_email(email)
+            if not user or not self.check_password(user, password):
+                raise RuntimeError('Login failed')
+
+    def review(self, payload):
+        with self.app.app_context():
+            self.store.serialize(self.store.create_review(payload))
+
+
+def plan(dataset, ids, operations, seed):
+    """
+    Draw the arguments of every operation ahead of the timed runs.
+
+    Place reads follow the same popularity skew as reviews; new reviews use
+    (user, place) pairs not reviewed yet.
+
+    Returns:
+        dict: Workload name to list of argument tuples
+    """
+    rng = random.Random(seed + 1)
+    users, places, amenities = ids['users'], ids['places'], ids['amenities']
+    owners = [record['owner'] for record in dataset['places']]
+    reviewed = {(record['user'], record['place']) for record in dataset['reviews']}
+
+    creates = []
+    for i in range(operations):
+        record = random_place(rng, len(places) + i, rng.randrange(len(users)), len(amenities))
+        creates.append(({
+            **{key: record[key] for key in ('title', 'description', 'price', 'latitude', 'longitude')},
+            'owner_id': users[record['owner']],
+            'amenities': [amenities[j] for j in record['amenities']],
+        },))
+
+    weights = list(accumulate(zipf_weights(len(places))))
+    ranked = rng.sample(places, len(places))
+    gets = [(place_id,) for place_id in rng.choices(ranked, cum_weights=weights, k=operations)]
+
+    logins = [(f'user{rng.randrange(len(users))}@bench.example.com', PASSWORD) for _ in range(operations)]
+
+    reviews = []
+    while len(reviews) < operations and len(reviewed) < len(users) * len(places):
+        user, place = rng.randrange(len(users)), rng.randrange(len(places))
+        if user == owners[place] or (user, place) in reviewed:
+            continue
+        reviewed.add((user, place))
+        reviews.append(({
+            'text': 'Benchmark review',
+            'rating': rng.randint(1, 5),
+            'user_id': users[user],
+            'place_id': places[place],
+        },))
+
+    return {'create': creates, 'list': [()] * operations, 'get': gets, 'login': logins, 'review': reviews}
+
+
+def run_workload(target, name, calls, warmup):
+    """
+    Time every call of one workload.
+
+    Returns:
+        dict: Operation and error counts, throughput and latency percentiles
+    """
+    operation = getattr(target, name)
+    for args in calls[:warmup]:
+        operation(*args)
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for args in calls[warmup:]:
+        start = time.perf_counter()
+        try:
+            operation(*args)
+        except Exception:
+            errors += 1
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+    elapsed = time.perf_counter() - started
+    return {
+        'operations': len(latencies),
+        'errors': errors,
+        'ops_per_second': len(latencies) / elapsed if elapsed else None,
+        'latency_ms_p50': percentile(latencies, 0.50),
+        'latency_ms_p95': percentile(latencies, 0.95),
+        'latency_ms_p99': percentile(latencies, 0.99),
+        'latency_ms_mean': statistics.mean(latencies) if latencies else None,
+    }
+
+
+def sqlite_target(dataset, database):
+    """
+    Build a StoreTarget on SQLAlchemyRepository and load the data set.
+
+    Returns:
+        tuple: (target, ids of the loaded data set, load seconds)
+    """
+    from app.models.base import db
+    from benchmarks.sql_backend import SQLStore
+
+    app = create_app('testing')
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{database}'
+    db.init_app(app)
+    with app.app_context():
+        store = SQLStore()
+        started = time.perf_counter()
+        ids = store.load(dataset)
+        loaded = time.perf_counter() - started
+    return StoreTarget(app, store, store.verify_password), ids, loaded
+
+
+def run(backends, workloads, operations, warmup, dataset, wsgi=False, database=None):
+    """Run every workload on every backend and return the results."""
+    results = {
+        'python': sys.version.split()[0],
+        'dataset': {
+            'seed': dataset['seed'],
+            'users': len(dataset['users']),
+            'places': len(dataset['places']),
+            'reviews': len(dataset['reviews']),
+        },
+        'operations': operations,
+        'warmup': warmup,
+        'backends': {},
+    }
+    app, facade_ids, facade_load = None, None, None
+    for backend in backends:
+        client = None
+        if backend in ('api', 'memory'):
+            if app is None:
+                app = create_app('testing')
+                started = time.perf_counter()
+                facade_ids = load_facade(facade, dataset)
+                facade_load = time.perf_counter() - started
+            ids, loaded = facade_ids, facade_load
+            if backend == 'api':
+                client = WSGIClient(app) if wsgi else app.test_client()
+                target = ApiTarget(client)
+            else:
+                target = StoreTarget(app, facade, lambda user, password: user.verify_password(password))
+        else:
+            target, ids, loaded = sqlite_target(dataset, database)
+
+        calls = plan(dataset, ids, operations + warmup, dataset['seed'])
+        results['backends'][backend] = {
+            'load_seconds': loaded,
+            'workloads': {name: run_workload(target, name, calls[name], warmup) for name in workloads},
+        }
+        if isinstance(client, WSGIClient):
+            client.close()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    List the workloads that regressed against a baseline run.
+
+    Returns:
+        list: One description per regression
+    """
+    regressions = []
+    for backend, current in results['backends'].items():
+        previous = baseline.get('backends', {}).get(backend)
+        if previous is None:
+            continue
+        for name, stats in current['workloads'].items():
+            before = previous['workloads'].get(name)
+            if not before or not stats['operations'] or not before['operations']:
+                continue
+            if stats['ops_per_second'] < before['ops_per_second'] * (1 - tolerance):
+                regressions.append(f'{backend}/{name}: throughput {before["ops_per_second"]:.1f} '
+                                   f'-> {stats["ops_per_second"]:.1f} ops/s')
+            if stats['latency_ms_p95'] > before['latency_ms_p95'] * (1 + tolerance):
+                regressions.append(f'{backend}/{name}: p95 {before["latency_ms_p95"]:.3f} '
+                                   f'-> {stats["latency_ms_p95"]:.3f} ms')
+    return regressions
+
+
+def main():
+    """Parse arguments, run the benchmark and print JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--backends', default=','.join(BACKENDS), help='Comma-separated backends')
+    parser.add_argument('--workloads', default=','.join(WORKLOADS), help='Comma-separated workloads')
+    parser.add_argument('--operations', type=int, default=1000, help='Timed operations per workload')
+    parser.add_argument('--warmup', type=int, default=50, help='Untimed operations per workload')
+    parser.add_argument('--users', type=int, default=1000, help='Users in the data set')
+    parser.add_argument('--places', type=int, default=5000, help='Places in the data set')
+    parser.add_argument('--reviews', type=int, default=20000, help='Reviews in the data set')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--wsgi', action='store_true', help='Serve the api backend over a local WSGI server')
+    parser.add_argument('--database', help='SQLite file for the sqlite backend (default: temporary)')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='Allowed relative regression')
+    parser.add_argument('--output', help='Also write the results to this file')
+    args = parser.parse_args()
+
+    backends = args.backends.split(',')
+    workloads = args.workloads.split(',')
+    for value, allowed in ((backends, BACKENDS), (workloads, WORKLOADS)):
+        unknown = set(value) - set(allowed)
+        if unknown:
+            parser.error(f'unknown value(s): {", ".join(sorted(unknown))}')
+
+    dataset = generate(args.users, args.places, args.reviews, args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        database = args.database or os.path.join(directory, 'bench.db')
+        results = run(backends, workloads, args.operations, args.warmup, dataset, args.wsgi, database)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            results['regressions'] = compare(results, json.load(baseline), args.tolerance)
+        status = 1 if results['regressions'] else 0
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    print(output)
+    sys.exit(status)
+
+
+if __name__ == '__main__':
+    main()
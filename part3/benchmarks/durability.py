@@ -0,0 +1,180 @@
+"""
+Write throughput of the durable in-memory backend against SQLite.
+
+Creates places from several client threads against:
+
+    memory   the facade on InMemoryRepository, without durability
+    wal      the same facade journaled by DurableStore, each operation
+             waiting until its log records are durable (as requests do)
+    sqlite   SQLAlchemyRepository on a SQLite file, one commit per operation
+
+then measures how long restoring the durable store takes from its log alone
+and from a snapshot (which is mapped and decoded lazily, so the time until
+every entity has been decoded is reported separately). Results are printed
+as JSON.
+
+Usage:
+    python -m benchmarks.durability [--operations N] [--levels 1,4,16]
+        [--no-fsync] [--commit-delay-ms MS]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+
+from app import create_app
+from app.models.base import db
+from app.persistence.durability import DurableStore
+from app.services.facade import HBnBFacade
+from benchmarks.data import generate, random_place
+from benchmarks.login import percentile
+from benchmarks.sql_backend import SQLStore
+
+USERS = 100
+
+
+def payloads(dataset, ids, count, seed):
+    """Build ``count`` place creation payloads."""
+    rng = random.Random(seed)
+    result = []
+    for i in range(count):
+        record = random_place(rng, i, rng.randrange(len(ids['users'])), len(ids['amenities']))
+        result.append({
+            **{key: record[key] for key in ('title', 'description', 'price', 'latitude', 'longitude')},
+            'owner_id': ids['users'][record['owner']],
+            'amenities': [ids['amenities'][j] for j in record['amenities']],
+        })
+    return result
+
+
+def run_threads(operation, items, concurrency):
+    """
+    Apply ``operation`` to every item from ``concurrency`` threads.
+
+    Returns:
+        dict: Throughput and latency percentiles
+    """
+    latencies = []
+    lock = threading.Lock()
+    chunks = [items[i::concurrency] for i in range(concurrency)]
+
+    def worker(chunk):
+        local = []
+        for item in chunk:
+            start = time.perf_counter()
+            operation(item)
+            local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        'concurrency': concurrency,
+        'ops_per_second': len(latencies) / elapsed,
+        'latency_ms_p50': percentile(latencies, 0.50),
+        'latency_ms_p99': percentile(latencies, 0.99),
+        'latency_ms_mean': statistics.mean(latencies),
+    }
+
+
+def memory_backend(dataset, directory=None, fsync=True, commit_delay=0.0):
+    """
+    Build a facade, journaled when ``directory`` is given, and load users.
+
+    Returns:
+        tuple: (facade, store or None, ids)
+    """
+    facade = HBnBFacade()
+    store = None
+    if directory is not None:
+        store = DurableStore(facade, directory, fsync=fsync, commit_delay=commit_delay,
+                             snapshot_interval=0, snapshot_wal_bytes=0)
+        store.open()
+    ids = {
+        'amenities': [facade.create_amenity({'name': name}).id for name in dataset['amenities']],
+        'users': [facade.create_user(dict(record)).id for record in dataset['users']],
+    }
+    return facade, store, ids
+
+
+def run(operations, levels, fsync, commit_delay):
+    """Run the benchmark and return the results."""
+    create_app('testing')  # Configures cheap bcrypt hashing for the users
+    dataset = generate(users=USERS, places=0, reviews=0)
+    results = {'operations': operations, 'fsync': fsync, 'commit_delay_ms': commit_delay * 1000,
+               'memory': [], 'wal': [], 'sqlite': []}
+    workdir = tempfile.mkdtemp(prefix='hbnb-durability-')
+    try:
+        for level in levels:
+            facade, _, ids = memory_backend(dataset)
+            items = payloads(dataset, ids, operations, level)
+            results['memory'].append(run_threads(facade.create_place, items, level))
+
+            directory = os.path.join(workdir, f'wal-{level}')
+            facade, store, ids = memory_backend(dataset, directory, fsync, commit_delay)
+            items = payloads(dataset, ids, operations, level)
+
+            def durable_create(payload, facade=facade, store=store):
+                facade.create_place(payload)
+                store.wait_durable()
+            results['wal'].append(run_threads(durable_create, items, level))
+            store.close()
+
+            sql_app = create_app('testing')
+            sql_app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(workdir, f"sqlite-{level}.db")}'
+            db.init_app(sql_app)
+            with sql_app.app_context():
+                sql_store = SQLStore()
+                ids = sql_store.load(dataset)
+            items = payloads(dataset, ids, operations, level)
+
+            def sql_create(payload, sql_app=sql_app, sql_store=sql_store):
+                with sql_app.app_context():
+                    sql_store.create_place(payload)
+            results['sqlite'].append(run_threads(sql_create, items, level))
+
+        # Restore the largest journaled store from its log, then from a snapshot
+        directory = os.path.join(workdir, f'wal-{levels[-1]}')
+        restore = {}
+        for source in ('log', 'snapshot'):
+            store = DurableStore(HBnBFacade(), directory, snapshot_interval=0, snapshot_wal_bytes=0)
+            started = time.perf_counter()
+            restored = store.open()
+            restore[source] = {'entities': restored, 'seconds': time.perf_counter() - started}
+            if source == 'log':
+                store.snapshot()
+            else:
+                store.loader.warm()
+                restore[source]['warm_seconds'] = time.perf_counter() - started
+            store.close()
+        results['restore'] = restore
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def main():
+    """Parse arguments, run the benchmark and print JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--operations', type=int, default=5000, help='Places created per run')
+    parser.add_argument('--levels', default='1,4,16', help='Comma-separated writer thread counts')
+    parser.add_argument('--no-fsync', action='store_true', help='Write the log without fsync')
+    parser.add_argument('--commit-delay-ms', type=float, default=0.0, help='Group commit delay')
+    args = parser.parse_args()
+    levels = [int(level) for level in args.levels.split(',')]
+    print(json.dumps(run(args.operations, levels, not args.no_fsync, args.commit_delay_ms / 1000), indent=2))
+
+
+if __name__ == '__main__':
+    main()
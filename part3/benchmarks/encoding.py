@@ -0,0 +1,98 @@
+"""
+Latency and CPU cost of list responses: flask_restx marshal vs FAST_JSON.
+
+Fills the shared facade with places (each with an owner and amenities),
+then times ``GET /api/v1/places/`` for a single page holding all of them
+with FAST_JSON off and on, and revalidated with ``If-None-Match`` (a 304
+that skips serialization entirely). Results are printed as JSON.
+
+Usage:
+    python -m benchmarks.encoding [--places N] [--repeat R]
+"""
+import argparse
+import json
+import statistics
+import time
+
+from app import create_app
+from app.services import facade
+
+
+def populate(count):
+    """Create ``count`` places spread over a few owners and amenities."""
+    owners = [
+        facade.create_user({'first_name': 'Owner', 'last_name': str(i), 'email': f'owner{i}@example.com'})
+        for i in range(100)
+    ]
+    amenities = [facade.create_amenity({'name': f'Amenity {i}'}) for i in range(10)]
+    for i in range(count):
+        facade.create_place({
+            'title': f'Place {i}',
+            'description': 'A benchmark place',
+            'price': 50.0 + i % 200,
+            'latitude': -60.0 + (i * 7) % 120,
+            'longitude': -170.0 + (i * 13) % 340,
+            'owner_id': owners[i % len(owners)].id,
+            'amenities': [amenity.id for amenity in amenities[:i % 4]]
+        })
+
+
+def time_requests(client, url, repeat, headers=None, status=200):
+    """
+    Issue the same request several times.
+
+    Args:
+        client: Flask test client
+        url (str): URL requested
+        repeat (int): Number of timed requests
+        headers (dict): Request headers
+        status (int): Expected response status
+
+    Returns:
+        dict: Mean/median wall-clock and CPU milliseconds per request
+    """
+    client.get(url)  # warm the serialization cache
+    wall, cpu = [], []
+    for _ in range(repeat):
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        response = client.get(url, headers=headers)
+        wall.append((time.perf_counter() - start_wall) * 1000)
+        cpu.append((time.process_time() - start_cpu) * 1000)
+        assert response.status_code == status
+    return {
+        'wall_ms_mean': statistics.mean(wall),
+        'wall_ms_median': statistics.median(wall),
+        'cpu_ms_mean': statistics.mean(cpu),
+        'bytes': len(response.data)
+    }
+
+
+def run(places, repeat):
+    """Run the benchmark and return the results."""
+    app = create_app('testing')
+    app.config['PAGE_SIZE_MAX'] = places
+    populate(places)
+    client = app.test_client()
+    url = f'/api/v1/places/?limit={places}'
+
+    results = {'places': places, 'repeat': repeat}
+    for fast in (False, True):
+        app.config['FAST_JSON'] = fast
+        results['fast_json' if fast else 'marshal'] = time_requests(client, url, repeat)
+    results['speedup'] = results['marshal']['wall_ms_mean'] / results['fast_json']['wall_ms_mean']
+    etag = client.get(url).headers['ETag']
+    results['not_modified'] = time_requests(client, url, repeat, {'If-None-Match': etag}, status=304)
+    return results
+
+
+def main():
+    """Parse arguments, run the benchmark and print JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--places', type=int, default=10000, help='Number of places listed')
+    parser.add_argument('--repeat', type=int, default=10, help='Timed requests per mode')
+    args = parser.parse_args()
+    print(json.dumps(run(args.places, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
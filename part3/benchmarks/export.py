@@ -0,0 +1,152 @@
+"""
+Time to first byte, duration and peak memory of full collection exports.
+
+Fills the shared facade with places, then fetches all of them through
+``GET /api/v1/places/`` (FAST_JSON on, uncompressed):
+
+    json     as one JSON page holding the whole collection
+    ndjson   streamed as NDJSON (Accept: application/x-ndjson)
+
+With ``--sql``, also loads a generated data set into SQLite and reads every
+place through SQLAlchemyRepository:
+
+    sql_get_all    get_all, then serialization of the list
+    sql_iter_all   iter_all (yield_per), serializing chunk by chunk
+
+Peak memory is the tracemalloc peak of a separate run of each mode, so
+tracing does not distort the timings. Results are printed as JSON.
+
+Usage:
+    python -m benchmarks.export [--places N] [--repeat R] [--sql] [--chunk-size N]
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from app import create_app
+from benchmarks.encoding import populate
+
+
+def peak_memory(func):
+    """
+    Run a function under tracemalloc.
+
+    Returns:
+        float: Peak traced memory, in MiB
+    """
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+
+
+def fetch(client, url, headers):
+    """
+    Fetch a response chunk by chunk.
+
+    Returns:
+        tuple: (seconds to the first chunk, seconds to the last, body bytes)
+    """
+    started = time.perf_counter()
+    response = client.get(url, headers=headers, buffered=False)
+    try:
+        chunks = iter(response.response)
+        size = len(next(chunks, b''))
+        first = time.perf_counter() - started
+        for chunk in chunks:
+            size += len(chunk)
+        return first, time.perf_counter() - started, size
+    finally:
+        response.close()
+
+
+def time_export(client, url, headers, repeat):
+    """Time repeated exports and measure the peak memory of one."""
+    runs = [fetch(client, url, headers) for _ in range(repeat)]
+    return {
+        'ttfb_ms': statistics.median(run[0] for run in runs) * 1000,
+        'total_ms': statistics.median(run[1] for run in runs) * 1000,
+        'bytes': runs[0][2],
+        'peak_mib': peak_memory(lambda: fetch(client, url, headers)),
+    }
+
+
+def time_scan(scan, repeat):
+    """Time repeated scans and measure the peak memory of one."""
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        count = scan()
+        durations.append(time.perf_counter() - started)
+    return {'items': count, 'total_ms': statistics.median(durations) * 1000, 'peak_mib': peak_memory(scan)}
+
+
+def run_sql(places, chunk_size, repeat):
+    """Compare get_all and iter_all on SQLite."""
+    from app.models.base import db
+    from benchmarks.data import generate
+    from benchmarks.sql_backend import SQLStore
+
+    dataset = generate(users=max(places // 5, 1), places=places, reviews=0)
+    with tempfile.TemporaryDirectory() as workdir:
+        app = create_app('testing')
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(workdir, "export.db")}'
+        db.init_app(app)
+        with app.app_context():
+            store = SQLStore()
+            store.load(dataset)
+            repo = store.place_repo
+
+            def get_all():
+                rows = [place.to_dict() for place in repo.get_all('list')]
+                db.session.remove()
+                return len(rows)
+
+            def iter_all():
+                count = 0
+                for chunk in repo.iter_all(chunk_size, profile='list'):
+                    count += len([place.to_dict() for place in chunk])
+                return count
+
+            results = {'sql_get_all': time_scan(get_all, repeat), 'sql_iter_all': time_scan(iter_all, repeat)}
+            db.engine.dispose()
+    return results
+
+
+def run(places, repeat, chunk_size, sql=False):
+    """Run the benchmark and return the results."""
+    app = create_app('testing')
+    app.config.update(FAST_JSON=True, PAGE_SIZE_MAX=places, NDJSON_CHUNK_SIZE=chunk_size)
+    populate(places)
+    client = app.test_client()
+    identity = {'Accept-Encoding': 'identity'}
+
+    results = {
+        'places': places, 'repeat': repeat, 'chunk_size': chunk_size,
+        'json': time_export(client, f'/api/v1/places/?limit={places}', identity, repeat),
+        'ndjson': time_export(client, '/api/v1/places/', dict(identity, Accept='application/x-ndjson'), repeat),
+    }
+    if sql:
+        results.update(run_sql(places, chunk_size, repeat))
+    return results
+
+
+def main():
+    """Parse arguments, run the benchmark and print JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--places', type=int, default=20000, help='Number of places created')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed exports per mode')
+    parser.add_argument('--chunk-size', type=int, default=500, help='Items per NDJSON chunk or SQL partition')
+    parser.add_argument('--sql', action='store_true', help='Also compare get_all and iter_all on SQLite')
+    args = parser.parse_args()
+    print(json.dumps(run(args.places, args.repeat, args.chunk_size, args.sql), indent=2))
+
+
+if __name__ == '__main__':
+    main()
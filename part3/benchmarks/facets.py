@@ -0,0 +1,104 @@
+"""
+Latency of amenity and price filters and facet counts over the indexes.
+
+Loads a synthetic data set into the facade, then measures, for random
+filters combining required (AND), alternative (OR) and excluded (NOT)
+amenities:
+
+    select   computing the matching places from the bitmaps
+    facets   counting the matching places per amenity
+    page     fetching the first page of matching places
+    scan     the same filter evaluated by scanning every place, as the
+             listing had to before the index existed
+
+and, for random price ranges, on the sorted price index:
+
+    price_page       the first page of the range, cheapest first
+    price_histogram  counting the places of the range per price bucket
+    price_scan       the same range sorted by scanning every place
+
+Results are printed as JSON.
+
+Usage:
+    python -m benchmarks.facets [--places N] [--queries N]
+"""
+import argparse
+import json
+import random
+
+from app import create_app
+from app.services.facade import HBnBFacade
+from benchmarks.data import generate, load_facade
+from benchmarks.search import measure
+
+PAGE_SIZE = 20
+PRICE_EDGES = [0, 50, 100, 150, 200, 300, 500, 1000]
+
+
+def filters(rng, amenity_ids, count):
+    """Build ``count`` random (all_of, any_of, none_of) amenity filters."""
+    result = []
+    for _ in range(count):
+        chosen = rng.sample(amenity_ids, min(len(amenity_ids), 4))
+        result.append((chosen[:1], chosen[1:3] if rng.random() < 0.5 else [], chosen[3:]))
+    return result
+
+
+def scan(facade, all_of, any_of, none_of):
+    """Evaluate a filter by visiting every place."""
+    matches = []
+    for place in facade.get_all_places():
+        held = set(place.amenity_ids)
+        if (held.issuperset(all_of) and (not any_of or not held.isdisjoint(any_of))
+                and held.isdisjoint(none_of)):
+            matches.append(place)
+    return matches
+
+
+def price_ranges(rng, count):
+    """Build ``count`` random (min_price, max_price) ranges."""
+    result = []
+    for _ in range(count):
+        low = rng.uniform(20, 300)
+        result.append((low, low * rng.uniform(1.2, 3.0)))
+    return result
+
+
+def run(users, places, count, seed):
+    """Run the benchmark and return the results."""
+    create_app('testing')  # Configures cheap bcrypt hashing for the users
+    dataset = generate(users=users, places=places, reviews=0, seed=seed)
+    facade = HBnBFacade()
+    ids = load_facade(facade, dataset)
+    items = filters(random.Random(seed), ids['amenities'], count)
+    selections = [facade.select_places(*item) for item in items]
+    ranges = price_ranges(random.Random(seed), count)
+    return {
+        'places': places,
+        'amenities': len(ids['amenities']),
+        'mean_matches': sum(map(len, selections)) / max(len(selections), 1),
+        'select': measure(lambda item: facade.select_places(*item), items),
+        'facets': measure(facade.get_place_facets, selections),
+        'page': measure(lambda selection: facade.get_places_page(PAGE_SIZE, selection=selection), selections),
+        'scan': measure(lambda item: scan(facade, *item), items),
+        'price_page': measure(lambda bounds: facade.get_places_by_price(PAGE_SIZE, None, *bounds), ranges),
+        'price_histogram': measure(lambda bounds: facade.get_price_histogram(PRICE_EDGES, *bounds), ranges),
+        'price_scan': measure(lambda bounds: sorted(
+            (place for place in facade.get_all_places() if bounds[0] <= place.price <= bounds[1]),
+            key=lambda place: place.price)[:PAGE_SIZE], ranges),
+    }
+
+
+def main():
+    """Parse arguments, run the benchmark and print JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000, help='Number of users')
+    parser.add_argument('--places', type=int, default=100000, help='Number of places')
+    parser.add_argument('--queries', type=int, default=200, help='Filters measured')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the data set')
+    args = parser.parse_args()
+    print(json.dumps(run(args.users, args.places, args.queries, args.seed), indent=2))
+
+
+if __name__ == '__main__':
+    main()
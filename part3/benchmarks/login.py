@@ -0,0 +1,107 @@
+"""
+Login throughput under concurrency with the bounded bcrypt pool.
+
+Registers one user, then for each concurrency level runs that many client
+threads issuing ``POST /api/v1/auth/login`` for a fixed duration. Reports
+successful logins per second, fast-rejected (503) requests and latency
+percentiles as JSON.
+
+Usage:
+    python -m benchmarks.login [--levels 1,2,4,8,16] [--duration S] [--rounds R]
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+
+from app import create_app
+from app.models.password_hashing import bcrypt, password_pool
+from app.services import facade
+
+EMAIL = 'login-bench@example.com'
+PASSWORD = 'benchmark-password'
+
+
+def percentile(values, fraction):
+    """Return the value below which ``fraction`` of the values fall."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_level(app, concurrency, duration):
+    """
+    Hammer the login endpoint from ``concurrency`` threads.
+
+    Returns:
+        dict: Throughput, rejection count and latency percentiles
+    """
+    latencies, statuses = [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = client.post('/api/v1/auth/login', json={'email': EMAIL, 'password': PASSWORD})
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                statuses.append(response.status_code)
+                if response.status_code == 200:
+                    latencies.append(elapsed)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        'concurrency': concurrency,
+        'logins_per_second': statuses.count(200) / elapsed,
+        'rejected_503': statuses.count(503),
+        'errors': len([s for s in statuses if s not in (200, 503)]),
+        'latency_ms_p50': percentile(latencies, 0.50),
+        'latency_ms_p95': percentile(latencies, 0.95),
+        'latency_ms_mean': statistics.mean(latencies) if latencies else None,
+    }
+
+
+def run(levels, duration, rounds, workers, pending):
+    """Run every concurrency level and return the results."""
+    app = create_app('testing')
+    app.config['BCRYPT_LOG_ROUNDS'] = rounds
+    bcrypt.init_app(app)
+    password_pool.configure(workers, pending)
+    if not facade.get_user_by_email(EMAIL):
+        facade.create_user({'first_name': 'Login', 'last_name': 'Bench', 'email': EMAIL, 'password': PASSWORD})
+
+    return {
+        'bcrypt_rounds': rounds,
+        'pool_workers': workers,
+        'pool_max_pending': pending,
+        'duration_s': duration,
+        'levels': [run_level(app, level, duration) for level in levels]
+    }
+
+
+def main():
+    """Parse arguments, run the benchmark and print JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--levels', default='1,2,4,8,16', help='Comma-separated client thread counts')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per level')
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt cost factor')
+    parser.add_argument('--workers', type=int, default=password_pool.max_workers, help='Hashing pool workers')
+    parser.add_argument('--pending', type=int, default=password_pool.max_pending, help='Hashing pool queue depth')
+    args = parser.parse_args()
+    levels = [int(level) for level in args.levels.split(',')]
+    print(json.dumps(run(levels, args.duration, args.rounds, args.workers, args.pending), indent=2))
+
+
+if __name__ == '__main__':
+    main()
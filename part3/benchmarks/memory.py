@@ -0,0 +1,67 @@
+"""
+Memory footprint of the domain entities.
+
+Reports the average number of bytes allocated per User, Place, Review and
+Amenity (including their attribute values) as JSON.
+
+Usage:
+    python -m benchmarks.memory [--count N]
+"""
+import argparse
+import json
+import tracemalloc
+
+from app.models import Amenity, Place, Review, User
+
+
+def measure(factory, count):
+    """
+    Measure the average allocation of one entity.
+
+    Args:
+        factory (callable): Builds one entity from its index
+        count (int): Number of entities to build
+
+    Returns:
+        float: Bytes allocated per entity
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entities = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Exclude the list holding the entities
+    overhead = entities.__sizeof__()
+    return (after - before - overhead) / count
+
+
+def run(count):
+    """Measure every entity type and return the results."""
+    owner = User('Owner', 'Benchmark', 'owner@example.com')
+    place = Place('Place', 'A place', 100.0, 10.0, 10.0, owner)
+
+    return {
+        'count': count,
+        'bytes_per_entity': {
+            'User': measure(
+                lambda i: User('First', 'Last', f'user{i}@example.com'), count),
+            'Place': measure(
+                lambda i: Place(f'Place {i}', 'A description', 100.0, 10.0, 20.0, owner), count),
+            'Review': measure(
+                lambda i: Review(f'Review {i}', 1 + i % 5, place, owner), count),
+            'Amenity': measure(
+                lambda i: Amenity(f'Amenity {i}'), count),
+        }
+    }
+
+
+def main():
+    """Parse arguments, run the benchmark and print JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=100000, help='Entities per type')
+    args = parser.parse_args()
+    print(json.dumps(run(args.count), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Latency of full-text search and of keeping its index up to date.
+
+Loads a synthetic data set into the facade, then measures:
+
+    update   creating, updating and deleting reviews and updating places,
+             which re-index their text (per operation, index maintenance
+             included)
+    query    GET /api/v1/places/search?q= through the facade, for one-,
+             two- and three-word queries and partially typed last words
+
+Results are printed as JSON.
+
+Usage:
+    python -m benchmarks.search [--places N] [--reviews N] [--queries N]
+"""
+import argparse
+import json
+import random
+import time
+
+from app import create_app
+from app.services.facade import HBnBFacade
+from benchmarks.data import WORDS, generate, load_facade, random_text
+from benchmarks.login import percentile
+
+LIMIT = 20
+
+
+def measure(operation, items):
+    """
+    Apply ``operation`` to every item.
+
+    Returns:
+        dict: Latency percentiles, in milliseconds
+    """
+    latencies = []
+    for item in items:
+        start = time.perf_counter()
+        operation(item)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        'operations': len(latencies),
+        'latency_ms_p50': percentile(latencies, 0.50),
+        'latency_ms_p99': percentile(latencies, 0.99),
+    }
+
+
+def queries(rng, count, words):
+    """Build ``count`` queries of ``words`` words, the last one possibly truncated."""
+    result = []
+    for _ in range(count):
+        terms = rng.sample(WORDS, words)
+        if rng.random() < 0.5 and len(terms[-1]) > 3:
+            terms[-1] = terms[-1][:rng.randint(2, len(terms[-1]) - 1)]
+        result.append(' '.join(terms))
+    return result
+
+
+def run(users, places, reviews, count, seed):
+    """Run the benchmark and return the results."""
+    create_app('testing')  # Configures cheap bcrypt hashing for the users
+    dataset = generate(users=users, places=places, reviews=reviews, seed=seed)
+    facade = HBnBFacade()
+    started = time.perf_counter()
+    ids = load_facade(facade, dataset)
+    results = {'places': places, 'reviews': len(ids['reviews']), 'load_seconds': time.perf_counter() - started}
+    rng = random.Random(seed)
+
+    created = []
+
+    def create_review(i):
+        place_id = ids['places'][rng.randrange(len(ids['places']))]
+        user_id = ids['users'][rng.randrange(len(ids['users']))]
+        created.append(facade.create_review({
+            'text': random_text(rng, 30), 'rating': rng.randint(1, 5), 'place_id': place_id, 'user_id': user_id,
+        }).id)
+
+    results['update'] = {
+        'create_review': measure(create_review, range(count)),
+        'update_review': measure(
+            lambda review_id: facade.update_review(review_id, {'text': random_text(rng, 30)}), created),
+        'update_place': measure(
+            lambda place_id: facade.update_place(place_id, {'description': random_text(rng, 20)}),
+            rng.sample(ids['places'], min(count, len(ids['places'])))),
+        'delete_review': measure(facade.delete_review, created),
+    }
+    results['query'] = {
+        f'{words}_words': measure(lambda query: facade.search_places_text(query, LIMIT), queries(rng, count, words))
+        for words in (1, 2, 3)
+    }
+    return results
+
+
+def main():
+    """Parse arguments, run the benchmark and print JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=10000, help='Number of users')
+    parser.add_argument('--places', type=int, default=20000, help='Number of places')
+    parser.add_argument('--reviews', type=int, default=200000, help='Number of reviews')
+    parser.add_argument('--queries', type=int, default=200, help='Operations measured per kind')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the data set')
+    args = parser.parse_args()
+    print(json.dumps(run(args.users, args.places, args.reviews, args.queries, args.seed), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Latency of the shared memory repository cache and of cross-process invalidation.
+
+Caches representative place records (plain dicts of the size of a pickled
+place) and measures:
+
+    local_set     storing an entry in a per-process LRUCache
+    shared_set    storing an entry in a SharedMemoryCache (encoding included)
+    local_hit     a lookup served by the LRUCache
+    shared_hit    a lookup served by the SharedMemoryCache (decoding included)
+    broadcast     time from publishing an invalidation on an InvalidationBus
+                  to its delivery in another process
+    shared_seen   time from discarding an entry in one process to another
+                  process missing it in the shared table
+
+Results are printed as JSON.
+
+Usage:
+    python -m benchmarks.shared_cache [--entries N] [--lookups N]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from app.persistence.caching_repository import MISSING, LRUCache
+from app.persistence.shared_cache import InvalidationBus, SharedMemoryCache
+from benchmarks.search import measure, percentile
+
+SLOT_SIZE = 2048
+
+
+def record(i):
+    """Build a dict standing in for a cached place."""
+    return {'id': f'place-{i}', 'title': f'Place {i}', 'description': 'x' * 400, 'price': 100.0 + i,
+            'latitude': 48.85, 'longitude': 2.35, 'owner_id': f'user-{i % 100}', 'amenities': ['wifi', 'pool']}
+
+
+def _echo(directory, ready, deliveries):
+    """Child process: report the arrival time of every invalidation received."""
+    InvalidationBus(directory, lambda entity, obj_id: deliveries.put(time.perf_counter()))
+    ready.set()
+    time.sleep(3600)
+
+
+def _watch(name, entries, slot_size, ready, keys, seen):
+    """Child process: report when each key of ``keys`` disappears from the shared table."""
+    cache = SharedMemoryCache(name, entries, slot_size)
+    ready.set()
+    while True:
+        key = keys.get()
+        while cache.get(key) is not MISSING:
+            pass
+        seen.put(time.perf_counter())
+
+
+def propagation(send, arrivals, count):
+    """
+    Measure how long changes take to reach another process.
+
+    Args:
+        send (callable): Makes change ``i`` and returns when it started
+        arrivals (Queue): Times at which the other process saw each change
+        count (int): Number of changes
+
+    Returns:
+        dict: Latency percentiles, in milliseconds
+    """
+    latencies = []
+    for i in range(count):
+        started = send(i)
+        latencies.append((arrivals.get() - started) * 1000)
+    return {'operations': count, 'latency_ms_p50': percentile(latencies, 0.50),
+            'latency_ms_p99': percentile(latencies, 0.99)}
+
+
+def run(entries, lookups, seed):
+    """Run the benchmark and return the results."""
+    rng = random.Random(seed)
+    keys = [f'place-{i}' for i in range(entries)]
+    probes = [rng.choice(keys) for _ in range(lookups)]
+    local = LRUCache(entries)
+    shared = SharedMemoryCache(f'hbnb-bench-{os.getpid()}', entries, SLOT_SIZE)
+    context = multiprocessing.get_context('fork')
+    children = []
+    try:
+        results = {
+            'entries': entries,
+            'local_set': measure(lambda i: local.set(keys[i], record(i)), range(entries)),
+            'shared_set': measure(lambda i: shared.set(keys[i], record(i)), range(entries)),
+            'local_hit': measure(local.get, probes),
+            'shared_hit': measure(shared.get, probes),
+        }
+
+        directory = tempfile.mkdtemp()
+        bus = InvalidationBus(directory, lambda entity, obj_id: None)
+        ready, deliveries = context.Event(), context.Queue()
+        children.append(context.Process(target=_echo, args=(directory, ready, deliveries), daemon=True))
+        children[-1].start()
+        ready.wait()
+
+        def publish(i):
+            started = time.perf_counter()
+            bus.publish('Place', keys[i])
+            return started
+
+        results['broadcast'] = propagation(publish, deliveries, min(lookups, 1000))
+        bus.close()
+
+        ready, watched, seen = context.Event(), context.Queue(), context.Queue()
+        children.append(context.Process(target=_watch, args=(shared.name, entries, SLOT_SIZE, ready, watched, seen),
+                                        daemon=True))
+        children[-1].start()
+        ready.wait()
+
+        def discard(i):
+            watched.put(keys[i])
+            time.sleep(0.001)  # Let the watcher start polling the entry
+            started = time.perf_counter()
+            shared.discard(keys[i])
+            return started
+
+        results['shared_seen'] = propagation(discard, seen, min(lookups, 200))
+        return results
+    finally:
+        for child in children:
+            child.terminate()
+        shared.unlink()
+        shared.close()
+
+
+def main():
+    """Parse arguments, run the benchmark and print JSON results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=20000, help='Cached entries')
+    parser.add_argument('--lookups', type=int, default=20000, help='Lookups measured')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the lookups')
+    args = parser.parse_args()
+    print(json.dumps(run(args.entries, args.lookups, args.seed), indent=2))
+
+
+if __name__ == '__main__':
+    main()
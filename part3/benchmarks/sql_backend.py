@@ -0,0 +1,260 @@
+"""
+SQLAlchemy backend for the HBnB benchmarks.
+
+The application's domain classes are plain in-memory objects, so this module
+maps tables mirroring ``database_schema.sql`` onto ``BaseModel`` subclasses
+(named like the domain classes so LOADING_PROFILES applies to them) and
+drives them through SQLAlchemyRepository, performing the same steps as the
+facade does for each operation.
+"""
+from app.models.base import BaseModel, db, unit_of_work
+from app.models.password_hashing import password_pool
+from app.persistence.sqlalchemy_repository import SQLAlchemyRepository
+
+place_amenity = db.Table(
+    'place_amenity',
+    db.Column('place_id', db.String(36), db.ForeignKey('places.id'), primary_key=True),
+    db.Column('amenity_id', db.String(36), db.ForeignKey('amenities.id'), primary_key=True),
+)
+
+
+class User(BaseModel):
+    """User row."""
+
+    __tablename__ = 'users'
+
+    first_name = db.Column(db.String(50), nullable=False)
+    last_name = db.Column(db.String(50), nullable=False)
+    email = db.Column(db.String(120), nullable=False, unique=True, index=True)
+    password = db.Column(db.String(128), nullable=False)
+    is_admin = db.Column(db.Boolean, default=False)
+
+    def to_dict(self):
+        """Serialize like app.models.user.User.to_dict."""
+        return {
+            'id': self.id,
+            'first_name': self.first_name,
+            'last_name': self.last_name,
+            'email': self.email,
+            'is_admin': self.is_admin,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+
+class Amenity(BaseModel):
+    """Amenity row."""
+
+    __tablename__ = 'amenities'
+
+    name = db.Column(db.String(50), nullable=False, unique=True)
+
+    def to_dict(self):
+        """Serialize like app.models.amenity.Amenity.to_dict."""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+
+class Place(BaseModel):
+    """Place row, with the denormalized rating aggregates."""
+
+    __tablename__ = 'places'
+
+    title = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text)
+    price = db.Column(db.Float, nullable=False)
+    latitude = db.Column(db.Float, nullable=False, index=True)
+    longitude = db.Column(db.Float, nullable=False)
+    owner_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    rating_1_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_2_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_3_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_4_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_5_count = db.Column(db.Integer, nullable=False, default=0)
+
+    owner = db.relationship('User')
+    amenities = db.relationship('Amenity', secondary=place_amenity)
+    reviews = db.relationship('Review', back_populates='place')
+
+    def add_rating(self, rating):
+        """Fold one new review rating into the aggregates."""
+        self.review_count = (self.review_count or 0) + 1
+        self.rating_sum = (self.rating_sum or 0) + rating
+        column = f'rating_{rating}_count'
+        setattr(self, column, (getattr(self, column) or 0) + 1)
+
+    def to_dict(self):
+        """Serialize like app.models.place.Place.to_dict."""
+        histogram = [getattr(self, f'rating_{i}_count') or 0 for i in range(1, 6)]
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'price': self.price,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'owner_id': self.owner_id,
+            'owner': {
+                'id': self.owner.id,
+                'first_name': self.owner.first_name,
+                'last_name': self.owner.last_name,
+                'email': self.owner.email
+            },
+            'amenities': [amenity.to_dict() for amenity in self.amenities],
+            'review_count': self.review_count,
+            'rating_sum': self.rating_sum,
+            'average_rating': self.rating_sum / self.review_count if self.review_count else None,
+            'rating_histogram': histogram,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+
+class Review(BaseModel):
+    """Review row."""
+
+    __tablename__ = 'reviews'
+    __table_args__ = (db.UniqueConstraint('user_id', 'place_id'),)
+
+    text = db.Column(db.Text, nullable=False)
+    rating = db.Column(db.Integer, nullable=False)
+    place_id = db.Column(db.String(36), db.ForeignKey('places.id'), nullable=False, index=True)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
+
+    place = db.relationship('Place', back_populates='reviews')
+    user = db.relationship('User')
+
+    def to_dict(self):
+        """Serialize like app.models.review.Review.to_dict."""
+        return {
+            'id': self.id,
+            'text': self.text,
+            'rating': self.rating,
+            'place_id': self.place_id,
+            'user_id': self.user_id,
+            'user': {
+                'id': self.user.id,
+                'first_name': self.user.first_name,
+                'last_name': self.user.last_name,
+                'email': self.user.email
+            },
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+
+class SQLStore:
+    """
+    Facade-like operations over SQLAlchemyRepository, for the benchmarks.
+
+    Must be used inside an application context of an app on which ``db``
+    has been initialized.
+    """
+
+    def __init__(self):
+        """Create the repositories and the tables."""
+        self.user_repo = SQLAlchemyRepository(User)
+        self.amenity_repo = SQLAlchemyRepository(Amenity)
+        self.place_repo = SQLAlchemyRepository(Place)
+        self.review_repo = SQLAlchemyRepository(Review)
+        db.create_all()
+
+    def load(self, dataset):
+        """
+        Load a data set from benchmarks.data.generate.
+
+        Every user shares the data set's password, so it is hashed once.
+
+        Returns:
+            dict: IDs of the created ``users``, ``amenities``, ``places``
+            and ``reviews``, in data set order
+        """
+        hashes = {}
+        with unit_of_work():
+            amenities = [Amenity(name=name) for name in dataset['amenities']]
+            self.amenity_repo.add_many(amenities)
+            users = []
+            for record in dataset['users']:
+                if record['password'] not in hashes:
+                    hashes[record['password']] = password_pool.hash(record['password'])
+                users.append(User(first_name=record['first_name'], last_name=record['last_name'],
+                                  email=record['email'], password=hashes[record['password']]))
+            self.user_repo.add_many(users)
+            places = [
+                Place(title=record['title'], description=record['description'], price=record['price'],
+                      latitude=record['latitude'], longitude=record['longitude'],
+                      owner=users[record['owner']],
+                      amenities=[amenities[i] for i in record['amenities']])
+                for record in dataset['places']
+            ]
+            self.place_repo.add_many(places)
+            reviews = []
+            for record in dataset['reviews']:
+                place = places[record['place']]
+                place.add_rating(record['rating'])
+                reviews.append(Review(text=record['text'], rating=record['rating'],
+                                      place=place, user=users[record['user']]))
+            self.review_repo.add_many(reviews)
+            # Read the generated IDs before the commit expires every row
+            db.session.flush()
+            ids = {
+                'users': [user.id for user in users],
+                'amenities': [amenity.id for amenity in amenities],
+                'places': [place.id for place in places],
+                'reviews': [review.id for review in reviews],
+            }
+        db.session.expunge_all()
+        return ids
+
+    def create_place(self, place_data):
+        """Create a place, as HBnBFacade.create_place does."""
+        owner = self.user_repo.get(place_data['owner_id'])
+        if not owner:
+            raise ValueError("Owner not found")
+        amenities = [self.amenity_repo.get(amenity_id) for amenity_id in place_data.get('amenities', ())]
+        place = Place(title=place_data['title'], description=place_data.get('description', ''),
+                      price=place_data['price'], latitude=place_data['latitude'],
+                      longitude=place_data['longitude'], owner=owner,
+                      amenities=[amenity for amenity in amenities if amenity])
+        self.place_repo.add(place)
+        return place
+
+    def get_places_page(self, limit, after=None, profile='list'):
+        """Retrieve one page of places, as HBnBFacade.get_places_page does."""
+        return self.place_repo.get_page(limit, after, profile)
+
+    def get_place(self, place_id, profile=None):
+        """Retrieve a place by ID."""
+        return self.place_repo.get(place_id, profile)
+
+    def get_user_by_email(self, email):
+        """Retrieve a user by email."""
+        return self.user_repo.get_by_attribute('email', email)
+
+    def verify_password(self, user, password):
+        """Check a user's password."""
+        return password_pool.verify(user.password, password)
+
+    def create_review(self, review_data):
+        """Create a review and update its place's aggregates in one transaction."""
+        with self.review_repo.transaction():
+            place = self.place_repo.get(review_data['place_id'])
+            if not place:
+                raise ValueError("Place not found")
+            user = self.user_repo.get(review_data['user_id'])
+            if not user:
+                raise ValueError("User not found")
+            review = Review(text=review_data['text'], rating=review_data['rating'], place=place, user=user)
+            place.add_rating(review.rating)
+            self.review_repo.add(review)
+        return review
+
+    def serialize(self, obj):
+        """Return an object's dictionary representation."""
+        return obj.to_dict()
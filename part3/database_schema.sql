@@ -23,6 +23,14 @@ CREATE TABLE IF NOT EXISTS places (
     latitude FLOAT NOT NULL CHECK (latitude >= -90.0 AND latitude <= 90.0),
     longitude FLOAT NOT NULL CHECK (longitude >= -180.0 AND longitude <= 180.0),
     owner_id VARCHAR(36) NOT NULL,
+    -- Denormalized rating aggregates, maintained on review create/update/delete
+    review_count INTEGER NOT NULL DEFAULT 0,
+    rating_sum INTEGER NOT NULL DEFAULT 0,
+    rating_1_count INTEGER NOT NULL DEFAULT 0,
+    rating_2_count INTEGER NOT NULL DEFAULT 0,
+    rating_3_count INTEGER NOT NULL DEFAULT 0,
+    rating_4_count INTEGER NOT NULL DEFAULT 0,
+    rating_5_count INTEGER NOT NULL DEFAULT 0,
     created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (owner_id) REFERENCES users(id) ON DELETE CASCADE,
@@ -0,0 +1,22 @@
+"""
+Fixtures shared by the API tests.
+"""
+import pytest
+
+from app import create_app
+from app.services import facade as shared_facade
+from app.services.facade import HBnBFacade
+
+
+@pytest.fixture
+def facade(monkeypatch):
+    """The facade used by the API, emptied for the duration of a test."""
+    for name, value in vars(HBnBFacade()).items():
+        monkeypatch.setattr(shared_facade, name, value)
+    return shared_facade
+
+
+@pytest.fixture
+def client(facade):
+    """Test client of an app serving the emptied facade."""
+    return create_app('testing').test_client()
@@ -0,0 +1,125 @@
+"""
+Tests for the amenity filters and facet counts of places.
+"""
+import itertools
+import random
+
+import pytest
+
+NAMES = ['WiFi', 'Pool', 'Sauna', 'Parking']
+
+
+@pytest.fixture
+def catalog(facade):
+    """Amenities and places holding random subsets of them."""
+    owner = facade.create_user({'first_name': 'Ada', 'last_name': 'Lovelace', 'email': 'ada@example.com'})
+    amenities = [facade.create_amenity({'name': name}).id for name in NAMES]
+    rng = random.Random(3)
+    places = [
+        facade.create_place({'title': f'Place {i}', 'description': '', 'price': float(rng.randrange(20, 600)),
+                             'latitude': 0.0, 'longitude': 0.0, 'owner_id': owner.id,
+                             'amenities': rng.sample(amenities, rng.randint(0, len(amenities)))})
+        for i in range(80)
+    ]
+    return amenities, places
+
+
+def subsets(amenities, size=3):
+    """Every subset of the first amenities, the empty one included."""
+    return [list(combination) for count in range(size + 1)
+            for combination in itertools.combinations(amenities[:size], count)]
+
+
+def expected_ids(places, all_of=(), any_of=(), none_of=()):
+    """Filter places by brute force, in creation order."""
+    return [
+        place.id for place in places
+        if set(all_of) <= set(place.amenity_ids)
+        and (not any_of or set(any_of) & set(place.amenity_ids))
+        and not set(none_of) & set(place.amenity_ids)
+    ]
+
+
+def listed(facade, selection):
+    """Collect every page of the places within a selection."""
+    ids, after = [], None
+    while True:
+        page, after = facade.get_places_page(9, after, selection=selection)
+        ids += [place.id for place in page]
+        if after is None:
+            return ids
+
+
+def test_every_filter_combination(facade, catalog):
+    """All, any and exclude filters, alone and combined, select what a scan would."""
+    amenities, places = catalog
+    for all_of, any_of, none_of in itertools.product(subsets(amenities), repeat=3):
+        selection = facade.select_places(all_of, any_of, none_of)
+        expected = expected_ids(places, all_of, any_of, none_of)
+        if selection is None:
+            assert not (all_of or any_of or none_of)
+            continue
+        assert listed(facade, selection) == expected, (all_of, any_of, none_of)
+        assert len(selection) == len(expected)
+
+
+def test_filters_through_the_api(client, catalog):
+    """The listing endpoint applies comma-separated filters to every page."""
+    amenities, places = catalog
+    query = f'amenities={amenities[0]}&any_amenities={amenities[1]},{amenities[2]}&exclude_amenities={amenities[3]}'
+    ids, url = [], f'/api/v1/places/?limit=5&{query}'
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        ids += [place['id'] for place in response.get_json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        url = f'/api/v1/places/?limit=5&{query}&after={cursor}' if cursor else None
+    assert ids == expected_ids(places, [amenities[0]], amenities[1:3], [amenities[3]])
+
+
+def facets(client, query=''):
+    """Fetch the facets of the places matching a query."""
+    response = client.get(f'/api/v1/places/facets?{query}')
+    assert response.status_code == 200
+    data = response.get_json()
+    return data['count'], {facet['id']: facet['count'] for facet in data['amenities']}, data
+
+
+def expected_facets(facade, ids):
+    """Count places per amenity by brute force."""
+    counts = {}
+    for place_id in ids:
+        for amenity_id in facade.get_place(place_id).amenity_ids:
+            counts[amenity_id] = counts.get(amenity_id, 0) + 1
+    return len(ids), counts
+
+
+def test_facet_counts(client, facade, catalog):
+    """Facets count the matching places per amenity, most common first."""
+    amenities, places = catalog
+    count, counts, data = facets(client)
+    assert (count, counts) == expected_facets(facade, [place.id for place in places])
+    assert [facet['count'] for facet in data['amenities']] == sorted(counts.values(), reverse=True)
+    assert sum(bucket['count'] for bucket in data['price']) == len(places)
+
+    count, counts, _ = facets(client, f'exclude_amenities={amenities[0]}&max_price=300')
+    matching = [place.id for place in places if amenities[0] not in place.amenity_ids and place.price <= 300]
+    assert (count, counts) == expected_facets(facade, matching)
+    assert amenities[0] not in counts
+
+
+def test_facets_follow_amenity_changes(client, facade, catalog):
+    """Changing a place's amenities or renaming an amenity updates the facets."""
+    amenities, places = catalog
+    for place in places[:10]:
+        facade.update_place(place.id, {'amenities': [amenities[3]]})
+    count, counts, _ = facets(client)
+    assert (count, counts) == expected_facets(facade, [place.id for place in places])
+
+    facade.update_amenity(amenities[3], {'name': 'Garage'})
+    _, _, data = facets(client)
+    assert {facet['id']: facet['name'] for facet in data['amenities']}[amenities[3]] == 'Garage'
+
+    assert listed(facade, facade.select_places([amenities[3]])) == expected_ids(places, [amenities[3]])
+    assert (listed(facade, facade.select_places(exclude_amenities=[amenities[3]]))
+            == expected_ids(places, none_of=[amenities[3]]))
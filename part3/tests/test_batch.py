@@ -0,0 +1,76 @@
+"""
+Tests for the batch creation endpoints.
+"""
+import json
+
+
+def user(i, **fields):
+    """A valid user item."""
+    return dict({'first_name': 'User', 'last_name': str(i), 'email': f'user{i}@example.com',
+                 'password': 'secret123'}, **fields)
+
+
+def test_all_created(client, facade):
+    """A fully valid batch is a 201 and stores every user with a hashed password."""
+    response = client.post('/api/v1/users/batch', json=[user(i) for i in range(3)])
+    assert response.status_code == 201
+    result = response.get_json()
+    assert (result['created'], result['failed']) == (3, 0)
+    assert [item['status'] for item in result['items']] == [201] * 3
+    created = facade.get_user(result['items'][1]['id'])
+    assert created.email == 'user1@example.com'
+    assert created.verify_password('secret123')
+
+
+def test_partly_created(client, facade):
+    """Invalid and duplicate items fail on their own with a 207."""
+    facade.create_amenity({'name': 'WiFi'})
+    response = client.post('/api/v1/amenities/batch', json=[
+        {'name': 'Pool'}, {'name': 'WiFi'}, {'colour': 'blue'}, {'name': 'Pool'}, {'name': 'Sauna'}
+    ])
+    assert response.status_code == 207
+    result = response.get_json()
+    assert (result['created'], result['failed']) == (2, 3)
+    assert [item['status'] for item in result['items']] == [201, 400, 400, 400, 201]
+    assert 'errors' in result['items'][2]
+    assert sorted(amenity.name for amenity in facade.get_all_amenities()) == ['Pool', 'Sauna', 'WiFi']
+
+
+def test_nothing_created(client, facade):
+    """A batch whose items all fail is a 400 reporting each of them."""
+    response = client.post('/api/v1/users/batch', json=[user(1, email='not an email'), {'first_name': 'Ada'}])
+    assert response.status_code == 400
+    assert [item['status'] for item in response.get_json()['items']] == [400, 400]
+    assert facade.get_all_users() == []
+
+
+def test_atomic_batch_creates_nothing_on_failure(client, facade):
+    """An atomic batch with one bad item stores none of the others."""
+    response = client.post('/api/v1/amenities/batch?atomic=true', json=[{'name': 'Pool'}, {'name': ''}])
+    assert response.status_code == 400
+    assert facade.get_all_amenities() == []
+
+
+def test_ndjson_body(client, facade):
+    """NDJSON lines are items; lines that are not JSON fail on their own."""
+    body = '\n'.join([json.dumps({'name': 'Pool'}), '{not json', '', json.dumps({'name': 'Sauna'})])
+    response = client.post('/api/v1/amenities/batch', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 207
+    assert [item['status'] for item in response.get_json()['items']] == [201, 400, 201]
+
+
+def test_malformed_or_empty_body(client):
+    """A body that is not an array, or an empty batch, is a 400."""
+    assert client.post('/api/v1/amenities/batch', json={'name': 'Pool'}).status_code == 400
+    assert client.post('/api/v1/amenities/batch', json=[]).status_code == 400
+
+
+def test_oversized_batches(client, facade):
+    """Batches above BATCH_MAX_ITEMS, or BATCH_MAX_USERS for users, are a 413."""
+    client.application.config.update(BATCH_MAX_ITEMS=5, BATCH_MAX_USERS=2)
+    assert client.post('/api/v1/amenities/batch', json=[{'name': str(i)} for i in range(6)]).status_code == 413
+    assert client.post('/api/v1/amenities/batch', json=[{'name': str(i)} for i in range(5)]).status_code == 201
+
+    assert client.post('/api/v1/users/batch', json=[user(i) for i in range(3)]).status_code == 413
+    assert facade.get_all_users() == []
+    assert client.post('/api/v1/users/batch', json=[user(i) for i in range(2)]).status_code == 201
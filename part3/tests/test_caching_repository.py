@@ -0,0 +1,51 @@
+"""
+Tests for the read-through repository cache.
+"""
+import pytest
+
+import config
+from app import create_app
+from app.persistence.caching_repository import FACADE_REPOSITORIES, MISSING
+from app.services import facade
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Test client of an app whose facade repositories are cached."""
+    monkeypatch.setattr(config.Config, 'REPOSITORY_CACHE_ENABLED', True)
+    monkeypatch.setattr(config.Config, 'REPOSITORY_CACHE_BACKEND', 'local')
+    monkeypatch.setattr(config.Config, 'REPOSITORY_CACHE_BROADCAST_DIR', None)
+    repositories = {attr: getattr(facade, attr) for attr in FACADE_REPOSITORIES.values()}
+    yield create_app('testing').test_client()
+    for attr, repository in repositories.items():
+        setattr(facade, attr, repository)
+
+
+def test_put_then_get_serves_the_update(client):
+    """An update drops the cached entity, so the next GET reads the new values."""
+    owner = client.post('/api/v1/users/', json={
+        'first_name': 'Grace', 'last_name': 'Hopper', 'email': 'grace.cache@example.com', 'password': 'cobol1959'
+    }).get_json()
+    place = client.post('/api/v1/places/', json={
+        'title': 'Harbor view', 'description': 'Quiet', 'price': 120.0, 'latitude': 40.7,
+        'longitude': -74.0, 'owner_id': owner['id'], 'amenities': []
+    }).get_json()
+    assert client.get(f"/api/v1/places/{place['id']}").get_json()['title'] == 'Harbor view'
+    assert facade.place_repo.cache.get(place['id']) is not MISSING
+
+    response = client.put(f"/api/v1/places/{place['id']}", json={
+        'title': 'Harbor loft', 'description': 'Quiet', 'price': 150.0, 'latitude': 40.7,
+        'longitude': -74.0, 'owner_id': owner['id'], 'amenities': []
+    })
+    assert response.status_code == 200
+    assert facade.place_repo.cache.get(place['id']) is MISSING
+
+    updated = client.get(f"/api/v1/places/{place['id']}").get_json()
+    assert (updated['title'], updated['price']) == ('Harbor loft', 150.0)
+
+    response = client.put(f"/api/v1/users/{owner['id']}", json={
+        'first_name': 'Grace', 'last_name': 'Murray', 'email': 'grace.cache@example.com', 'password': 'cobol1959'
+    })
+    assert response.status_code == 200
+    assert facade.user_repo.cache.get(owner['id']) is MISSING
+    assert client.get(f"/api/v1/users/{owner['id']}").get_json()['last_name'] == 'Murray'
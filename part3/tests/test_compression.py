@@ -0,0 +1,127 @@
+"""
+Tests for response compression and the cache of compressed responses.
+"""
+import gzip
+
+import pytest
+
+import config
+from app import create_app
+from app.compression import CompressionCache
+
+GZIP = {'Accept-Encoding': 'gzip'}
+
+
+@pytest.fixture
+def places(facade):
+    """Enough places for a listing well above COMPRESSION_MIN_SIZE."""
+    owner = facade.create_user({'first_name': 'Ada', 'last_name': 'Lovelace', 'email': 'ada@example.com'})
+    return [facade.create_place({'title': f'Place {i}', 'description': 'Quiet and bright', 'price': 80.0,
+                                 'latitude': 48.85, 'longitude': 2.35, 'owner_id': owner.id, 'amenities': []})
+            for i in range(20)]
+
+
+@pytest.fixture
+def serialized(monkeypatch, facade):
+    """Count the entities serialized by the API."""
+    calls = []
+    serialize = facade.serialize
+
+    def counting(entity, store=True):
+        calls.append(entity.id)
+        return serialize(entity, store)
+
+    monkeypatch.setattr(facade, 'serialize', counting)
+    return calls
+
+
+def test_small_bodies_are_sent_as_they_are(client, places):
+    """Bodies under COMPRESSION_MIN_SIZE are not compressed, but still vary on Accept-Encoding."""
+    response = client.get(f'/api/v1/places/{places[0].id}', headers=GZIP)
+    assert len(response.data) < client.application.config['COMPRESSION_MIN_SIZE']
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert not response.headers['ETag'].endswith('-gzip"')
+
+
+def test_large_bodies_are_compressed(client, places):
+    """Listings above the threshold are gzipped and decompress to the identity body."""
+    identity = client.get('/api/v1/places/', headers={'Accept-Encoding': 'identity'})
+    response = client.get('/api/v1/places/', headers=GZIP)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert int(response.headers['Content-Length']) == len(response.data) < len(identity.data)
+    assert gzip.decompress(response.data) == identity.data
+    assert set(response.headers['Vary'].split(', ')) == {'Accept', 'Accept-Encoding'}
+
+
+@pytest.mark.parametrize('accept', ['identity', 'gzip;q=0', 'compress', ''])
+def test_unaccepted_encodings(client, places, accept):
+    """Clients that do not accept gzip get the identity body."""
+    response = client.get('/api/v1/places/', headers={'Accept-Encoding': accept})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json()
+
+
+def test_large_bodies_are_streamed(client, places):
+    """Bodies of COMPRESSION_STREAM_SIZE and more are compressed while sent, without a length."""
+    client.application.config['COMPRESSION_STREAM_SIZE'] = 2048
+    identity = client.get('/api/v1/places/', headers={'Accept-Encoding': 'identity'})
+    response = client.get('/api/v1/places/', headers=GZIP)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert gzip.decompress(response.data) == identity.data
+
+
+def test_compression_can_be_disabled(monkeypatch, facade, places):
+    """With COMPRESSION_ENABLED off, nothing is compressed."""
+    monkeypatch.setattr(config.Config, 'COMPRESSION_ENABLED', False)
+    client = create_app('testing').test_client()
+    assert 'Content-Encoding' not in client.get('/api/v1/places/', headers=GZIP).headers
+
+
+def test_cache_hits_skip_serialization(client, facade, places, serialized):
+    """A repeated request is answered from the cache until the representation changes."""
+    first = client.get('/api/v1/places/', headers=GZIP)
+    assert len(serialized) == len(places)
+    cache = client.application.extensions['compression_cache']
+    assert len(cache) == 1
+
+    del serialized[:]
+    second = client.get('/api/v1/places/', headers=GZIP)
+    assert serialized == []
+    assert second.data == first.data
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert second.headers['Content-Type'] == first.headers['Content-Type']
+    assert second.headers['Vary'] == first.headers['Vary']
+    assert second.headers['Content-Length'] == str(len(first.data))
+
+    facade.update_place(places[0].id, {'title': 'Penthouse'})
+    third = client.get('/api/v1/places/', headers=GZIP)
+    assert serialized
+    assert third.headers['ETag'] != first.headers['ETag']
+    assert b'Penthouse' in gzip.decompress(third.data)
+
+
+def test_identity_requests_are_not_cached(client, places, serialized):
+    """Only compressed bodies are cached."""
+    for _ in range(2):
+        client.get('/api/v1/places/', headers={'Accept-Encoding': 'identity'})
+    assert len(serialized) == 2 * len(places)
+    assert len(client.application.extensions['compression_cache']) == 0
+
+
+def test_cache_is_bounded_by_size():
+    """The least recently used bodies are evicted to stay under max_bytes."""
+    cache = CompressionCache(10)
+    cache.set('a', b'1234')
+    cache.set('b', b'5678')
+    cache.get('a')
+    cache.set('c', b'90ab')
+    assert (cache.get('a'), cache.get('b')) == ((b'1234', ()), None)
+    assert cache.size == 8
+    cache.set('huge', b'x' * 11)
+    assert cache.get('huge') is None
+
+    disabled = CompressionCache(0)
+    disabled.set('a', b'1')
+    assert len(disabled) == 0
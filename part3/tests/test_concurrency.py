@@ -0,0 +1,146 @@
+"""
+Tests for lock-free reads running concurrently with writes.
+"""
+import random
+import sys
+import threading
+
+import pytest
+
+from app.persistence.indexes import GridIndex, HashIndex, SortedIndex
+
+WRITES = 300
+
+
+@pytest.fixture(autouse=True)
+def frequent_switches():
+    """Switch threads often, so that reads interleave with writes mid-update."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def run_threads(writers, readers):
+    """
+    Run writers to completion while readers loop, and collect every exception.
+
+    Returns:
+        list: Exceptions raised by any thread
+    """
+    errors = []
+    done = threading.Event()
+
+    def guard(func, loop):
+        try:
+            while True:
+                func()
+                if not loop or done.is_set():
+                    return
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=guard, args=(func, False)) for func in writers]
+    threads += [threading.Thread(target=guard, args=(func, True)) for func in readers]
+    for thread in threads:
+        thread.start()
+    for thread in threads[:len(writers)]:
+        thread.join()
+    done.set()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def assert_indexes_consistent(repo):
+    """Check that every equality, ordered and spatial index matches the stored objects."""
+    objects = {obj.id: obj for obj in repo.get_all()}
+    for index in repo._indexes.values():
+        if not isinstance(index, (HashIndex, SortedIndex, GridIndex)):
+            continue
+        assert index._keys == {obj_id: index.key(obj) for obj_id, obj in objects.items()}
+        if isinstance(index, SortedIndex):
+            assert index._entries == sorted((value, obj_id) for obj_id, value in index._keys.items())
+        if isinstance(index, HashIndex):
+            for obj_id, value in index._keys.items():
+                assert obj_id in index.lookup(value)
+
+
+def test_reads_during_writes(facade):
+    """Paging, lookups and searches never fail and the indexes end up consistent."""
+    owner = facade.create_user({'first_name': 'Ada', 'last_name': 'Lovelace', 'email': 'owner@example.com'})
+    guest = facade.create_user({'first_name': 'Alan', 'last_name': 'Turing', 'email': 'guest@example.com'})
+    amenities = [facade.create_amenity({'name': name}).id for name in ('WiFi', 'Pool', 'Sauna')]
+    places = []
+
+    def write_places():
+        rng = random.Random(1)
+        for i in range(WRITES):
+            if not places or rng.random() < 0.4:
+                places.append(facade.create_place({
+                    'title': f'cottage {i}', 'description': 'quiet', 'price': rng.uniform(10, 500),
+                    'latitude': rng.uniform(-60, 60), 'longitude': rng.uniform(-180, 180),
+                    'owner_id': owner.id, 'amenities': rng.sample(amenities, rng.randint(0, 3))
+                }))
+            else:
+                facade.update_place(rng.choice(places).id, {
+                    'title': f'loft {i}', 'price': rng.uniform(10, 500),
+                    'latitude': rng.uniform(-60, 60), 'longitude': rng.uniform(-180, 180),
+                    'amenities': rng.sample(amenities, rng.randint(0, 3))
+                })
+
+    def write_reviews():
+        rng = random.Random(2)
+        reviews = []
+        for i in range(WRITES):
+            if reviews and rng.random() < 0.3:
+                facade.delete_review(reviews.pop(rng.randrange(len(reviews))).id)
+            elif places:
+                reviews.append(facade.create_review({'text': f'stay {i}', 'rating': rng.randint(1, 5),
+                                                     'user_id': guest.id, 'place_id': rng.choice(places).id}))
+
+    def write_users():
+        for i in range(WRITES):
+            facade.update_user(guest.id, {'first_name': 'Alan', 'last_name': 'Turing', 'email': f'guest{i}@example.com'})
+            facade.create_user({'first_name': 'Grace', 'last_name': 'Hopper', 'email': f'grace{i}@example.com'})
+
+    def walk_places():
+        after, seen = None, []
+        while True:
+            page, after = facade.get_places_page(7, after)
+            seen += [(place.created_at, place.id) for place in page]
+            if after is None:
+                break
+        assert seen == sorted(set(seen))
+
+    def walk_prices():
+        after = None
+        while True:
+            _, after = facade.get_places_by_price(7, after, min_price=100, descending=True,
+                                                  selection=facade.select_places(any_amenities=amenities[:2]))
+            if after is None:
+                break
+
+    def look_up():
+        user = facade.get_user_by_email(guest.email)
+        assert user is None or user.id == guest.id
+        for place in facade.place_repo.get_all_by_attribute('owner_id', owner.id):
+            assert place.owner_id == owner.id
+
+    def search():
+        facade.search_places_text('loft stay', 10)
+        facade.get_nearest_places(0.0, 0.0, 5)
+        facade.search_places_within_radius(10.0, 10.0, 2000)
+        facade.search_places_in_box(-30, 170, 30, -170)
+        facade.get_place_facets()
+
+    errors = run_threads([write_places, write_reviews, write_users], [walk_places, walk_prices, look_up, search])
+    assert errors == []
+
+    for repo in (facade.user_repo, facade.place_repo, facade.review_repo, facade.amenity_repo):
+        assert_indexes_consistent(repo)
+    assert facade.get_user_by_email(f'guest{WRITES - 1}@example.com') is guest
+    for place in places:
+        reviews = facade.get_reviews_by_place(place.id)
+        assert place.review_count == len(reviews)
+        assert place.rating_sum == sum(review.rating for review in reviews)
@@ -0,0 +1,114 @@
+"""
+Tests for conditional GET: ETag, Last-Modified and 304 responses.
+"""
+import time
+from types import SimpleNamespace
+
+import pytest
+from werkzeug.http import http_date
+
+from app.api.v1 import conditional
+
+IDENTITY = {'Accept-Encoding': 'identity'}
+
+
+@pytest.fixture
+def later(monkeypatch):
+    """Move the validators' clock ahead, so that new entities get a Last-Modified date."""
+    now = time.time() + 10
+    monkeypatch.setattr(conditional, 'time', SimpleNamespace(time=lambda: now))
+    return now
+
+
+@pytest.fixture
+def place(facade):
+    """A place with an owner."""
+    owner = facade.create_user({'first_name': 'Ada', 'last_name': 'Lovelace', 'email': 'ada@example.com'})
+    return facade.create_place({'title': 'Loft', 'description': 'Bright ' * 200, 'price': 80.0,
+                                'latitude': 48.85, 'longitude': 2.35, 'owner_id': owner.id, 'amenities': []})
+
+
+def get(client, url, **headers):
+    """GET a URL without compression unless asked for."""
+    return client.get(url, headers=dict(IDENTITY, **headers))
+
+
+def test_entity_validators(client, place, later):
+    """An entity carries a strong ETag and the date of its last change."""
+    response = get(client, f'/api/v1/places/{place.id}')
+    assert response.status_code == 200
+    assert response.headers['ETag'] == f'"{place.serial_version:x}"'
+    assert response.headers['Last-Modified'] == http_date(place.serial_version // conditional.US_PER_SECOND)
+
+
+def test_recent_changes_get_no_date(client, place):
+    """A change within the current second is not dated, since a later one could share the date."""
+    assert 'Last-Modified' not in get(client, f'/api/v1/places/{place.id}').headers
+
+
+def test_if_none_match(client, place):
+    """A matching ETag, weak or in any encoding's form, gets an empty 304."""
+    url = f'/api/v1/places/{place.id}'
+    etag = get(client, url).headers['ETag']
+    for value in (etag, f'W/{etag}', etag[:-1] + '-gzip"', f'"other", {etag}', '*'):
+        response = get(client, url, **{'If-None-Match': value})
+        assert response.status_code == 304, value
+        assert response.data == b''
+        assert response.headers['ETag'] == etag
+    assert get(client, url, **{'If-None-Match': '"other"'}).status_code == 200
+    assert get(client, url, **{'If-None-Match': etag[:-1] + '-br-gzip"'}).status_code == 200
+
+
+def test_if_modified_since(client, place, later):
+    """Without If-None-Match, the date decides; If-None-Match takes precedence."""
+    url = f'/api/v1/places/{place.id}'
+    modified = get(client, url).headers['Last-Modified']
+    assert get(client, url, **{'If-Modified-Since': modified}).status_code == 304
+    assert get(client, url, **{'If-Modified-Since': http_date(later)}).status_code == 304
+    assert get(client, url, **{'If-Modified-Since': http_date(0)}).status_code == 200
+    assert get(client, url, **{'If-Modified-Since': modified, 'If-None-Match': '"other"'}).status_code == 200
+
+
+def test_changes_invalidate_the_etag(client, facade, place):
+    """Updating the entity or an entity nested in it changes the ETag."""
+    url = f'/api/v1/places/{place.id}'
+    etag = get(client, url).headers['ETag']
+    facade.update_user(place.owner.id, {'first_name': 'Augusta', 'last_name': 'King', 'email': 'ada@example.com'})
+    response = get(client, url, **{'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['owner']['last_name'] == 'King'
+    assert response.headers['ETag'] != etag
+
+
+def test_field_masks_are_separate_representations(client, place):
+    """A field mask gets its own ETag."""
+    url = f'/api/v1/places/{place.id}'
+    etag = get(client, url).headers['ETag']
+    masked = get(client, url, **{'X-Fields': 'id,title'})
+    assert masked.headers['ETag'] != etag
+    assert get(client, url, **{'X-Fields': 'id,title', 'If-None-Match': etag}).status_code == 200
+    assert get(client, url, **{'X-Fields': 'id,title', 'If-None-Match': masked.headers['ETag']}).status_code == 304
+
+
+def test_collection_pages(client, facade, place):
+    """Pages have an ETag but no date, and change when one of their items does."""
+    response = get(client, '/api/v1/places/')
+    etag = response.headers['ETag']
+    assert 'Last-Modified' not in response.headers
+    assert get(client, '/api/v1/places/', **{'If-None-Match': etag}).status_code == 304
+
+    facade.update_place(place.id, {'title': 'Penthouse'})
+    response = get(client, '/api/v1/places/', **{'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_compressed_etag_round_trip(client, place):
+    """A gzip response's ETag, sent back, gets a 304."""
+    url = f'/api/v1/places/{place.id}'
+    response = get(client, url, **{'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    etag = response.headers['ETag']
+    assert etag == f'"{place.serial_version:x}-gzip"'
+    assert get(client, url, **{'Accept-Encoding': 'gzip', 'If-None-Match': etag}).status_code == 304
+    assert get(client, url, **{'If-None-Match': etag}).status_code == 304
@@ -0,0 +1,108 @@
+"""
+Tests for the write-ahead log of the in-memory repositories.
+"""
+import pytest
+
+from app.persistence.durability import DurableStore
+from app.services.facade import HBnBFacade
+
+
+def open_store(directory):
+    """Open a durable facade on a directory."""
+    facade = HBnBFacade()
+    store = DurableStore(facade, str(directory), fsync=False, snapshot_interval=0, snapshot_wal_bytes=0)
+    store.open()
+    return facade, store
+
+
+def state(facade):
+    """Every entity's representation, by repository, including the place rating aggregates."""
+    return {
+        name: {obj.id: obj.to_dict() for obj in getattr(facade, name).get_all()}
+        for name in ('user_repo', 'amenity_repo', 'place_repo', 'review_repo')
+    }
+
+
+def write_history(facade):
+    """Create, update and delete entities of every kind."""
+    owner = facade.create_user({'first_name': 'Ada', 'last_name': 'Lovelace', 'email': 'ada@example.com'})
+    guest = facade.create_user({'first_name': 'Alan', 'last_name': 'Turing', 'email': 'alan@example.com'})
+    wifi = facade.create_amenity({'name': 'WiFi'})
+    pool = facade.create_amenity({'name': 'Pool'})
+    place = facade.create_place({'title': 'Loft', 'description': 'Bright', 'price': 80.0, 'latitude': 48.85,
+                                 'longitude': 2.35, 'owner_id': owner.id, 'amenities': [wifi.id]})
+    reviews = [facade.create_review({'text': text, 'rating': rating, 'user_id': guest.id, 'place_id': place.id})
+               for text, rating in (('Great', 5), ('Noisy', 2), ('Fine', 4))]
+    facade.update_place(place.id, {'title': 'Sunny loft', 'price': 95.0, 'amenities': [wifi.id, pool.id]})
+    facade.update_review(reviews[1].id, {'text': 'A bit noisy', 'rating': 3})
+    facade.delete_review(reviews[2].id)
+    facade.update_user(guest.id, {'first_name': 'Alan', 'last_name': 'Turing', 'email': 'turing@example.com'})
+    facade.update_amenity(pool.id, {'name': 'Heated pool'})
+    return place
+
+
+def test_rejected_update_is_not_journaled(tmp_path):
+    """An update that fails validation leaves nothing in the log."""
+    facade, store = open_store(tmp_path)
+    owner = facade.create_user({'first_name': 'Ada', 'last_name': 'Lovelace', 'email': 'ada@example.com'})
+    place = facade.create_place({'title': 'Loft', 'description': 'Bright', 'price': 80.0, 'latitude': 48.85,
+                                 'longitude': 2.35, 'owner_id': owner.id, 'amenities': []})
+    store.wait_durable()
+    last_lsn = store.wal.last_lsn
+
+    with pytest.raises(ValueError):
+        facade.update_place(place.id, {'title': 'Loft', 'price': -1.0, 'latitude': 48.85, 'longitude': 2.35})
+    with pytest.raises(ValueError):
+        facade.update_user(owner.id, {'first_name': 'Ada', 'last_name': 'Lovelace', 'email': 'not an email'})
+
+    assert store.wal.last_lsn == last_lsn
+    assert place.price == 80.0
+    store.close()
+
+    facade, store = open_store(tmp_path)
+    assert facade.get_place(place.id).price == 80.0
+    assert facade.get_user(owner.id).email == 'ada@example.com'
+    store.close()
+
+
+def test_restart_restores_the_same_state(tmp_path):
+    """Reopening the log rebuilds every entity, index and rating aggregate."""
+    facade, store = open_store(tmp_path)
+    place = write_history(facade)
+    expected = state(facade)
+    store.close()
+
+    facade, store = open_store(tmp_path)
+    assert state(facade) == expected
+    restored = facade.get_place(place.id)
+    assert (restored.review_count, restored.rating_sum) == (2, 8)
+    assert list(restored.to_dict()['rating_histogram']) == [0, 0, 1, 0, 1]
+    assert facade.get_user_by_email('turing@example.com').last_name == 'Turing'
+    assert facade.get_user_by_email('alan@example.com') is None
+    assert [match.id for match, _ in facade.search_places_text('sunny', 5)] == [place.id]
+    assert [match.id for match, _ in facade.get_nearest_places(48.85, 2.35, 1)] == [place.id]
+    store.close()
+
+
+def test_torn_tail_is_discarded(tmp_path, caplog):
+    """A partly written last record is dropped and the log stays writable."""
+    facade, store = open_store(tmp_path)
+    place = write_history(facade)
+    expected = state(facade)
+    store.close()
+
+    wal = max(tmp_path.glob('wal-*.log'))
+    with open(wal, 'ab') as f:
+        f.write(b'\x10\x00\x00\x00garbage')
+
+    facade, store = open_store(tmp_path)
+    assert 'Discarding torn records' in caplog.text
+    assert state(facade) == expected
+    facade.update_place(place.id, {'title': 'Loft after the crash'})
+    expected = state(facade)
+    store.close()
+
+    facade, store = open_store(tmp_path)
+    assert state(facade) == expected
+    assert facade.get_place(place.id).title == 'Loft after the crash'
+    store.close()
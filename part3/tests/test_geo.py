@@ -0,0 +1,99 @@
+"""
+Tests for the radius, bounding box and nearest-neighbour place searches.
+"""
+import random
+
+import pytest
+
+from app.persistence.geo import haversine_km
+
+CITIES = [(48.85, 2.35), (51.51, -0.13), (40.71, -74.0), (-33.87, 151.21), (64.15, -21.94)]
+
+
+@pytest.fixture
+def places(facade):
+    """Places scattered around a few cities, on both sides of the antimeridian and near the pole."""
+    owner = facade.create_user({'first_name': 'Ada', 'last_name': 'Lovelace', 'email': 'ada@example.com'})
+    rng = random.Random(7)
+    points = [(lat + rng.uniform(-2, 2), lon + rng.uniform(-2, 2)) for lat, lon in CITIES for _ in range(40)]
+    points += [(rng.uniform(-20, 20), rng.choice([-1, 1]) * rng.uniform(178, 180)) for _ in range(40)]
+    points += [(rng.uniform(88, 90), rng.uniform(-180, 180)) for _ in range(20)]
+    return [
+        facade.create_place({'title': f'Place {i}', 'description': '', 'price': 100.0, 'latitude': lat,
+                             'longitude': lon, 'owner_id': owner.id, 'amenities': []})
+        for i, (lat, lon) in enumerate(points)
+    ]
+
+
+def distances(places, lat, lon):
+    """Brute-force distances from a point to every place, nearest first."""
+    return sorted((haversine_km(lat, lon, place.latitude, place.longitude), place.id) for place in places)
+
+
+@pytest.mark.parametrize('lat, lon, radius_km', [
+    (48.85, 2.35, 150), (40.71, -74.0, 400), (0.0, 179.9, 500), (89.5, 0.0, 300), (0.0, 0.0, 100)
+])
+def test_radius_matches_brute_force(facade, places, lat, lon, radius_km):
+    """The radius search returns exactly the places in range, nearest first."""
+    matches = facade.search_places_within_radius(lat, lon, radius_km)
+    expected = [(distance, place_id) for distance, place_id in distances(places, lat, lon) if distance <= radius_km]
+    assert [place.id for place, _ in matches] == [place_id for _, place_id in expected]
+    assert [distance for _, distance in matches] == pytest.approx([distance for distance, _ in expected])
+
+
+@pytest.mark.parametrize('lat, lon, k', [(48.85, 2.35, 10), (-33.87, 151.21, 1), (0.0, -179.5, 25), (10.0, 80.0, 5)])
+def test_nearest_matches_brute_force(facade, places, lat, lon, k):
+    """The k-nearest search returns the k closest places, nearest first."""
+    matches = facade.get_nearest_places(lat, lon, k)
+    expected = distances(places, lat, lon)[:k]
+    assert [place.id for place, _ in matches] == [place_id for _, place_id in expected]
+    assert [distance for _, distance in matches] == pytest.approx([distance for distance, _ in expected])
+
+
+@pytest.mark.parametrize('box', [(47.0, 0.0, 50.0, 4.0), (-20.0, 179.0, 20.0, -179.0), (88.5, -180.0, 90.0, 180.0)])
+def test_box_matches_brute_force(facade, places, box):
+    """The box search returns the places inside, wrapping the antimeridian when min_lon > max_lon."""
+    min_lat, min_lon, max_lat, max_lon = box
+
+    def inside(place):
+        if not min_lat <= place.latitude <= max_lat:
+            return False
+        if min_lon <= max_lon:
+            return min_lon <= place.longitude <= max_lon
+        return place.longitude >= min_lon or place.longitude <= max_lon
+
+    found = {place.id for place in facade.search_places_in_box(*box)}
+    assert found == {place.id for place in places if inside(place)}
+    assert found
+
+
+def test_moved_place_is_found_at_its_new_location(facade, places):
+    """Updating the coordinates moves a place in the spatial index."""
+    place = places[0]
+    facade.update_place(place.id, {'latitude': -45.0, 'longitude': 170.0})
+    assert [match.id for match, _ in facade.get_nearest_places(-45.0, 170.0, 1)] == [place.id]
+    assert place.id not in {match.id for match, _ in facade.search_places_within_radius(48.85, 2.35, 500)}
+
+
+def test_search_endpoint(client, places):
+    """The search endpoint reports distances and honours the limit."""
+    response = client.get('/api/v1/places/search?lat=48.85&lon=2.35&radius_km=300&limit=5')
+    assert response.status_code == 200
+    found = response.get_json()
+    assert len(found) == 5
+    assert [place['distance_km'] for place in found] == sorted(place['distance_km'] for place in found)
+
+    nearest = client.get('/api/v1/places/search?lat=48.85&lon=2.35&k=5').get_json()
+    assert [place['id'] for place in nearest] == [place['id'] for place in found]
+
+
+@pytest.mark.parametrize('query', [
+    'lat=48.85&lon=2.35&radius_km=0',
+    'lat=91&lon=2.35&radius_km=10',
+    'lat=48.85&lon=2.35&k=0',
+    'min_lat=50&min_lon=0&max_lat=40&max_lon=4',
+    'min_lat=40&min_lon=0',
+])
+def test_search_rejects_bad_parameters(client, query):
+    """Invalid coordinates, radii, counts and boxes are a 400."""
+    assert client.get(f'/api/v1/places/search?{query}').status_code == 400
@@ -0,0 +1,100 @@
+"""
+Tests for lazily decoded, memory-mapped snapshots.
+"""
+import pytest
+
+from app.persistence.indexes import GridIndex, HashIndex, SortedIndex
+from app.persistence.mapped_snapshot import MappedSnapshot, SnapshotLoader, write_snapshot
+from app.persistence.records import KINDS, snapshot_state
+from app.services.facade import HBnBFacade
+from benchmarks.data import generate, load_facade
+
+
+def repositories(facade):
+    """Map each entity kind to the facade's repository."""
+    return {'User': facade.user_repo, 'Amenity': facade.amenity_repo,
+            'Place': facade.place_repo, 'Review': facade.review_repo}
+
+
+@pytest.fixture(scope='module')
+def snapshot_path(tmp_path_factory):
+    """A snapshot of a generated data set, with the facade it was taken from."""
+    dataset = generate(users=40, places=150, reviews=600, seed=5)
+    # Password hashing would dominate the test's run time
+    for record in dataset['users']:
+        del record['password']
+    facade = HBnBFacade()
+    load_facade(facade, dataset)
+    path = str(tmp_path_factory.mktemp('snapshot') / 'snapshot.map')
+    write_snapshot(path, 1, {kind: [snapshot_state(obj) for obj in repositories(facade)[kind].get_all()]
+                             for kind in KINDS})
+    return path
+
+
+@pytest.fixture
+def lazy(snapshot_path):
+    """A facade reading the snapshot on demand."""
+    facade = HBnBFacade()
+    loader = SnapshotLoader(MappedSnapshot(snapshot_path), repositories(facade))
+    yield facade
+    loader.snapshot.close()
+
+
+@pytest.fixture
+def eager(snapshot_path):
+    """A facade holding every entity of the snapshot."""
+    facade = HBnBFacade()
+    loader = SnapshotLoader(MappedSnapshot(snapshot_path), repositories(facade))
+    loader.warm()
+    yield facade
+    loader.snapshot.close()
+
+
+def walk(fetch_page):
+    """Collect the IDs of every page of a collection."""
+    ids, after = [], None
+    while True:
+        page, after = fetch_page(13, after)
+        ids += [obj.id for obj in page]
+        if after is None:
+            return ids
+
+
+def test_lookups_decode_only_what_they_need(lazy, eager):
+    """Lookups by ID, email and place match the eager restore without decoding everything."""
+    place = eager.place_repo.get_all()[17]
+    user = eager.user_repo.get_all()[3]
+
+    assert lazy.get_place(place.id).to_dict() == place.to_dict()
+    assert lazy.get_user_by_email(user.email).to_dict() == user.to_dict()
+    assert ([review.to_dict() for review in lazy.get_reviews_by_place(place.id)]
+            == [review.to_dict() for review in eager.get_reviews_by_place(place.id)])
+    assert lazy.get_place('missing') is None
+    assert lazy.get_user_by_email('nobody@example.com') is None
+    assert len(lazy.place_repo.get_loaded()) < len(eager.place_repo.get_all())
+
+
+def test_pages_match_the_eager_restore(lazy, eager):
+    """Keyset pages over the snapshot list the same entities in the same order."""
+    for name in ('get_users_page', 'get_places_page', 'get_reviews_page', 'get_amenities_page'):
+        assert walk(getattr(lazy, name)) == walk(getattr(eager, name))
+
+
+def test_indexes_match_the_eager_restore(lazy, eager):
+    """Once materialized, every entity and index equals the eager restore's."""
+    lazy.get_nearest_places(0.0, 0.0, 1)
+    for kind, repository in repositories(lazy).items():
+        expected = repositories(eager)[kind]
+        assert ({obj.id: obj.to_dict() for obj in repository.get_all()}
+                == {obj.id: obj.to_dict() for obj in expected.get_all()})
+        for name, index in repository._indexes.items():
+            if isinstance(index, (HashIndex, SortedIndex, GridIndex)):
+                assert index._keys == expected._indexes[name]._keys
+
+    word = eager.place_repo.get_all()[0].title.split()[0]
+    assert ([(place.id, score) for place, score in lazy.search_places_text(word, 20)]
+            == [(place.id, score) for place, score in eager.search_places_text(word, 20)])
+    facets, expected = lazy.get_place_facets(), eager.get_place_facets()
+    assert facets['count'] == expected['count']
+    assert ([(amenity.id, count) for amenity, count in facets['amenities']]
+            == [(amenity.id, count) for amenity, count in expected['amenities']])
@@ -0,0 +1,101 @@
+"""
+Tests for NDJSON streaming of whole collections.
+"""
+import gzip
+import json
+
+import pytest
+
+NDJSON = {'Accept': 'application/x-ndjson', 'Accept-Encoding': 'identity'}
+
+
+@pytest.fixture
+def places(facade):
+    """Places, half of them with an amenity."""
+    owner = facade.create_user({'first_name': 'Ada', 'last_name': 'Lovelace', 'email': 'ada@example.com'})
+    wifi = facade.create_amenity({'name': 'WiFi'})
+    return [facade.create_place({'title': f'Place {i}', 'description': 'Quiet', 'price': 50.0 + i, 'latitude': 0.0,
+                                 'longitude': 0.0, 'owner_id': owner.id, 'amenities': [wifi.id] if i % 2 else []})
+            for i in range(10)]
+
+
+def lines(data):
+    """Decode an NDJSON body."""
+    return [json.loads(line) for line in data.decode('utf-8').splitlines()]
+
+
+def test_streams_the_whole_collection(client, places):
+    """Every item is sent, oldest first, as the JSON listing would send it; limit is ignored."""
+    response = client.get('/api/v1/places/?limit=2', headers=NDJSON)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert 'Accept' in response.headers['Vary']
+    assert 'X-Next-Cursor' not in response.headers
+    listing = client.get('/api/v1/places/?limit=100', headers={'Accept-Encoding': 'identity'}).get_json()
+    assert lines(response.data) == listing
+    assert [item['id'] for item in listing] == [place.id for place in places]
+
+
+def test_sent_in_chunks(client, places):
+    """Items are fetched and encoded NDJSON_CHUNK_SIZE at a time."""
+    client.application.config['NDJSON_CHUNK_SIZE'] = 3
+    response = client.get('/api/v1/places/', headers=NDJSON, buffered=False)
+    blocks = list(response.response)
+    response.close()
+    assert [len(block.splitlines()) for block in blocks] == [3, 3, 3, 1]
+
+
+def test_resumes_after_a_cursor_and_applies_filters(client, facade, places):
+    """The after cursor and the filters of the listing apply to the stream."""
+    cursor = client.get('/api/v1/places/?limit=4').headers['X-Next-Cursor']
+    response = client.get(f'/api/v1/places/?after={cursor}', headers=NDJSON)
+    assert [item['id'] for item in lines(response.data)] == [place.id for place in places[4:]]
+
+    wifi = facade.get_all_amenities()[0].id
+    response = client.get(f'/api/v1/places/?amenities={wifi}&sort=-price', headers=NDJSON)
+    expected = sorted((place for place in places if wifi in place.amenity_ids), key=lambda place: -place.price)
+    assert [item['id'] for item in lines(response.data)] == [place.id for place in expected]
+
+
+def test_bad_cursor_is_reported_before_streaming(client, places):
+    """A malformed cursor is a 400 JSON error, not a broken stream."""
+    response = client.get('/api/v1/places/?after=not-a-cursor', headers=NDJSON)
+    assert response.status_code == 400
+    assert response.mimetype == 'application/json'
+
+
+def test_field_mask(client, places):
+    """A field mask selects the fields of every line."""
+    response = client.get('/api/v1/places/', headers=dict(NDJSON, **{'X-Fields': 'id,title'}))
+    assert lines(response.data)[0] == {'id': places[0].id, 'title': 'Place 0'}
+
+
+def test_json_is_preferred_when_ranked_higher(client, places):
+    """NDJSON is only sent when the client prefers it."""
+    response = client.get('/api/v1/places/', headers={'Accept': 'application/json, application/x-ndjson;q=0.5'})
+    assert response.mimetype == 'application/json'
+
+
+def test_export_does_not_fill_the_serialization_cache(client, facade, places):
+    """Streamed items are serialized without being cached."""
+    facade.serialization_cache.clear()
+    client.get('/api/v1/places/', headers=NDJSON)
+    assert len(facade.serialization_cache) == 0
+
+
+def test_place_reviews(client, facade, places):
+    """The reviews of a place can be streamed too."""
+    guest = facade.create_user({'first_name': 'Alan', 'last_name': 'Turing', 'email': 'alan@example.com'})
+    reviews = [facade.create_review({'text': f'Stay {i}', 'rating': 4, 'user_id': guest.id,
+                                     'place_id': places[0].id}) for i in range(3)]
+    response = client.get(f'/api/v1/places/{places[0].id}/reviews', headers=NDJSON)
+    assert response.mimetype == 'application/x-ndjson'
+    assert [item['id'] for item in lines(response.data)] == [review.id for review in reviews]
+
+
+def test_compressed_stream(client, places):
+    """A gzipped stream decompresses to the identity lines."""
+    identity = client.get('/api/v1/places/', headers=NDJSON)
+    response = client.get('/api/v1/places/', headers=dict(NDJSON, **{'Accept-Encoding': 'gzip'}))
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data) == identity.data
@@ -0,0 +1,99 @@
+"""
+Tests for keyset pagination of the collection endpoints.
+"""
+import base64
+import json
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from app.persistence.pagination import decode_cursor, encode_cursor
+
+
+def create_amenities(client, count, prefix='Amenity'):
+    """Create amenities through the API and return their IDs, in order."""
+    return [client.post('/api/v1/amenities/', json={'name': f'{prefix} {i}'}).get_json()['id']
+            for i in range(count)]
+
+
+def raw_cursor(fields):
+    """Encode arbitrary cursor fields the way encode_cursor does."""
+    return base64.urlsafe_b64encode(json.dumps(fields).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def walk(client, url):
+    """Follow the X-Next-Cursor headers of a collection to its end."""
+    ids, pages = [], 0
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        ids += [item['id'] for item in response.get_json()]
+        pages += 1
+        cursor = response.headers.get('X-Next-Cursor')
+        url = f'/api/v1/amenities/?limit=2&after={cursor}' if cursor else None
+    return ids, pages
+
+
+def test_cursor_round_trip():
+    """A cursor decodes to the timestamp and ID it was built from."""
+    created_at = datetime(2024, 2, 29, 12, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(created_at, 'abc')) == (created_at, 'abc')
+
+
+def test_pages_cover_the_collection_in_creation_order(client):
+    """Walking the cursors visits every item once, oldest first."""
+    ids = create_amenities(client, 5)
+    assert walk(client, '/api/v1/amenities/?limit=2') == (ids, 3)
+
+
+def test_next_page_headers(client):
+    """The next page is announced in X-Next-Cursor and in a Link header."""
+    create_amenities(client, 3)
+    response = client.get('/api/v1/amenities/?limit=2')
+    cursor = response.headers['X-Next-Cursor']
+
+    link, rel = response.headers['Link'].split('; ')
+    assert rel == 'rel="next"'
+    url = urlsplit(link.strip('<>'))
+    assert url.path == '/api/v1/amenities/'
+    assert parse_qs(url.query) == {'limit': ['2'], 'after': [cursor]}
+
+    last = client.get(f'/api/v1/amenities/?limit=2&after={cursor}')
+    assert len(last.get_json()) == 1
+    assert 'X-Next-Cursor' not in last.headers
+    assert 'Link' not in last.headers
+
+
+def test_pages_are_stable_under_writes(client, facade):
+    """Items deleted or added between pages neither repeat nor skip others."""
+    ids = create_amenities(client, 4)
+    first = client.get('/api/v1/amenities/?limit=2')
+    facade.amenity_repo.delete(ids[0])
+    added = create_amenities(client, 1, prefix='Late')
+
+    rest, _ = walk(client, f"/api/v1/amenities/?limit=2&after={first.headers['X-Next-Cursor']}")
+    assert rest == ids[2:] + added
+
+
+def test_limit_is_capped(client):
+    """Page sizes above PAGE_SIZE_MAX are reduced to it."""
+    client.application.config['PAGE_SIZE_MAX'] = 2
+    create_amenities(client, 3)
+    assert len(client.get('/api/v1/amenities/?limit=50').get_json()) == 2
+
+
+@pytest.mark.parametrize('cursor', [
+    'not-a-cursor',
+    encode_cursor(datetime(2024, 1, 1, tzinfo=timezone.utc), 'abc'),
+    raw_cursor(['2024-01-01T00:00:00', 1]),
+])
+def test_malformed_cursors_are_rejected(client, cursor):
+    """Bad cursors, aware timestamps and non-string IDs are a 400."""
+    create_amenities(client, 1)
+    assert client.get(f'/api/v1/amenities/?after={cursor}').status_code == 400
+
+
+def test_non_positive_limit_is_rejected(client):
+    """A zero limit is a 400."""
+    assert client.get('/api/v1/amenities/?limit=0').status_code == 400
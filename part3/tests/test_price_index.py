@@ -0,0 +1,94 @@
+"""
+Tests for price-ordered listings and price ranges.
+"""
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from app.persistence.pagination import encode_cursor, encode_key_cursor
+
+PRICES = [120.0, 80.0, 80.0, 200.0, 80.0, 50.0, 120.0, 300.0, 80.0, 99.99, 100.0, 150.0]
+
+
+@pytest.fixture
+def places(facade):
+    """Places with many equal prices."""
+    owner = facade.create_user({'first_name': 'Ada', 'last_name': 'Lovelace', 'email': 'ada@example.com'})
+    return [
+        facade.create_place({'title': f'Place {i}', 'description': '', 'price': price, 'latitude': 0.0,
+                             'longitude': 0.0, 'owner_id': owner.id, 'amenities': []})
+        for i, price in enumerate(PRICES)
+    ]
+
+
+def walk(client, query, limit=2):
+    """Follow the cursors of a price-ordered listing, returning the IDs of every page."""
+    ids, url = [], f'/api/v1/places/?limit={limit}&{query}'
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.get_json()
+        ids += [place['id'] for place in response.get_json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        url = f'/api/v1/places/?limit={limit}&{query}&after={cursor}' if cursor else None
+    return ids
+
+
+def ordered(places, descending=False, low=None, high=None):
+    """Order places by (price, id), the way the price index does, within a range."""
+    selected = [place for place in places
+                if (low is None or place.price >= low) and (high is None or place.price <= high)]
+    return [place.id for place in sorted(selected, key=lambda place: (place.price, place.id), reverse=descending)]
+
+
+@pytest.mark.parametrize('sort', ['price', '-price'])
+@pytest.mark.parametrize('limit', [1, 2, 3, 5, 20])
+def test_equal_prices_are_paged_once_each(client, places, sort, limit):
+    """Pages split within runs of equal prices without repeating or skipping places."""
+    assert walk(client, f'sort={sort}', limit) == ordered(places, descending=sort == '-price')
+
+
+@pytest.mark.parametrize('low, high', [(80, 120), (80.01, None), (None, 99.99), (100, 100), (301, None), (0, 1000)])
+def test_price_bounds_are_inclusive(client, places, low, high):
+    """min_price and max_price keep the places priced exactly at the bounds."""
+    bounds = '&'.join(f'{name}={value}' for name, value in (('min_price', low), ('max_price', high))
+                      if value is not None)
+    for sort in ('price', '-price', 'created_at'):
+        ids = walk(client, f'sort={sort}&{bounds}')
+        if sort == 'created_at':
+            assert sorted(ids) == sorted(ordered(places, low=low, high=high))
+        else:
+            assert ids == ordered(places, sort == '-price', low, high)
+
+
+def test_updated_price_moves_the_place(client, facade, places):
+    """Changing a price re-orders the place."""
+    facade.update_place(places[0].id, {'price': 10.0})
+    assert walk(client, 'sort=price')[0] == places[0].id
+    assert walk(client, 'sort=price&min_price=100') == ordered(places, low=100)
+
+
+def test_inverted_range_is_rejected(client, places):
+    """min_price above max_price is a 400."""
+    assert client.get('/api/v1/places/?sort=price&min_price=200&max_price=100').status_code == 400
+
+
+def raw_cursor(fields):
+    """Encode arbitrary cursor fields the way encode_key_cursor does."""
+    return base64.urlsafe_b64encode(json.dumps(fields).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+@pytest.mark.parametrize('cursor', [
+    'not-a-cursor',
+    encode_cursor(datetime(2024, 1, 1), 'abc'),
+    encode_key_cursor('title', 80.0, 'abc'),
+    raw_cursor(['price', '80', 'abc']),
+    raw_cursor(['price', True, 'abc']),
+    raw_cursor(['price', None, 'abc']),
+    raw_cursor(['price', 80.0, 7]),
+    raw_cursor(['price', 80.0]),
+])
+def test_bad_price_cursors_are_rejected(client, places, cursor):
+    """Malformed cursors and cursors of other orderings are a 400."""
+    assert client.get(f'/api/v1/places/?sort=price&after={cursor}').status_code == 400
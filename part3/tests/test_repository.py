@@ -0,0 +1,84 @@
+"""
+Tests for the secondary indexes of the in-memory repositories.
+"""
+import pytest
+
+from app.models.user import User
+from app.persistence.indexes import HashIndex
+from app.persistence.repository import InMemoryRepository
+
+
+@pytest.fixture
+def repo():
+    """A user repository with a unique email index."""
+    return InMemoryRepository(indexes=[HashIndex('email', unique=True)])
+
+
+def new_user(repo, email):
+    """Add a user with an email to a repository."""
+    user = User('Ada', 'Lovelace', email)
+    repo.add(user)
+    return user
+
+
+def assert_emails(repo, expected):
+    """Check that the index and the stored users agree on every email."""
+    index = repo._indexes['email']
+    for user in repo.get_all():
+        assert index.lookup(user.email) == [user.id]
+        assert repo.get_by_attribute('email', user.email) is user
+    assert {user.email: user.id for user in repo.get_all()} == expected
+
+
+def test_add_update_delete_keep_lookups_consistent(repo):
+    """Lookups follow added, re-addressed and deleted users."""
+    ada = new_user(repo, 'ada@example.com')
+    alan = new_user(repo, 'alan@example.com')
+    assert_emails(repo, {'ada@example.com': ada.id, 'alan@example.com': alan.id})
+
+    ada.update({'email': 'countess@example.com'})
+    repo.update(alan.id, {'email': 'turing@example.com'})
+    assert repo.get_by_attribute('email', 'ada@example.com') is None
+    assert repo.get_by_attribute('email', 'alan@example.com') is None
+    assert_emails(repo, {'countess@example.com': ada.id, 'turing@example.com': alan.id})
+
+    repo.delete(ada.id)
+    assert repo.get_by_attribute('email', 'countess@example.com') is None
+    assert_emails(repo, {'turing@example.com': alan.id})
+
+    grace = new_user(repo, 'countess@example.com')
+    assert_emails(repo, {'countess@example.com': grace.id, 'turing@example.com': alan.id})
+
+
+def test_duplicate_email_is_rejected_on_add(repo):
+    """Adding a second user with a taken email fails and stores nothing."""
+    ada = new_user(repo, 'ada@example.com')
+    with pytest.raises(ValueError):
+        new_user(repo, 'ada@example.com')
+    assert len(repo.get_all()) == 1
+    assert_emails(repo, {'ada@example.com': ada.id})
+
+
+@pytest.mark.parametrize('via', ['model', 'repository'])
+def test_duplicate_email_update_leaves_user_and_index_untouched(repo, via):
+    """A rejected update keeps the old email on the user and in the index."""
+    ada = new_user(repo, 'ada@example.com')
+    alan = new_user(repo, 'alan@example.com')
+    version = alan.updated_at
+
+    with pytest.raises(ValueError):
+        if via == 'model':
+            alan.update({'first_name': 'Alan', 'email': 'ada@example.com'})
+        else:
+            repo.update(alan.id, {'first_name': 'Alan', 'email': 'ada@example.com'})
+
+    assert (alan.first_name, alan.email, alan.updated_at) == ('Ada', 'alan@example.com', version)
+    assert_emails(repo, {'ada@example.com': ada.id, 'alan@example.com': alan.id})
+
+
+def test_invalid_repository_update_is_rejected(repo):
+    """Repository updates are validated like model updates."""
+    ada = new_user(repo, 'ada@example.com')
+    with pytest.raises(ValueError):
+        repo.update(ada.id, {'email': 'not an email'})
+    assert_emails(repo, {'ada@example.com': ada.id})
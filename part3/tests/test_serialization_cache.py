@@ -0,0 +1,84 @@
+"""
+Tests for the cache of serialized entity representations.
+"""
+import pytest
+
+from app.services.cache import SerializationCache
+
+
+@pytest.fixture
+def place(facade):
+    """A place with an owner and an amenity."""
+    owner = facade.create_user({'first_name': 'Ada', 'last_name': 'Lovelace', 'email': 'ada@example.com'})
+    wifi = facade.create_amenity({'name': 'WiFi'})
+    return facade.create_place({'title': 'Loft', 'description': 'Bright', 'price': 80.0, 'latitude': 48.85,
+                                'longitude': 2.35, 'owner_id': owner.id, 'amenities': [wifi.id]})
+
+
+def test_unchanged_entity_is_served_from_the_cache(facade, place):
+    """A second serialization of an unchanged entity is a hit returning the same dict."""
+    cache = facade.serialization_cache
+    first = facade.serialize(place)
+    hits = cache.hits
+    assert facade.serialize(place) is first
+    assert cache.hits == hits + 1
+
+
+def test_update_rebuilds_the_representation(facade, place):
+    """Updating the entity itself invalidates its representation."""
+    facade.serialize(place)
+    facade.update_place(place.id, {'title': 'Penthouse', 'price': 95.0})
+    data = facade.serialize(place)
+    assert (data['title'], data['price']) == ('Penthouse', 95.0)
+
+
+def test_nested_entities_invalidate_the_place(facade, place):
+    """Changes to the owner, an amenity or the reviews show in the place's representation."""
+    facade.serialize(place)
+    facade.update_user(place.owner.id, {'first_name': 'Augusta', 'last_name': 'King', 'email': 'ada@example.com'})
+    assert facade.serialize(place)['owner']['last_name'] == 'King'
+
+    facade.update_amenity(place.amenities[0].id, {'name': 'Fast WiFi'})
+    assert [amenity['name'] for amenity in facade.serialize(place)['amenities']] == ['Fast WiFi']
+
+    guest = facade.create_user({'first_name': 'Alan', 'last_name': 'Turing', 'email': 'alan@example.com'})
+    review = facade.create_review({'text': 'Lovely', 'rating': 4, 'user_id': guest.id, 'place_id': place.id})
+    assert facade.serialize(place)['review_count'] == 1
+
+    facade.serialize(review)
+    facade.update_user(guest.id, {'first_name': 'Alan', 'last_name': 'Mathison', 'email': 'alan@example.com'})
+    assert facade.serialize(review)['user']['last_name'] == 'Mathison'
+
+    facade.delete_review(review.id)
+    assert facade.serialize(place)['review_count'] == 0
+
+
+def test_api_serves_updated_nested_values(client, facade, place):
+    """GET reflects an owner renamed after the place was first served."""
+    assert client.get(f'/api/v1/places/{place.id}').get_json()['owner']['first_name'] == 'Ada'
+    facade.update_user(place.owner.id, {'first_name': 'Augusta', 'last_name': 'Lovelace', 'email': 'ada@example.com'})
+    assert client.get(f'/api/v1/places/{place.id}').get_json()['owner']['first_name'] == 'Augusta'
+
+
+def test_store_false_does_not_cache(facade, place):
+    """One-off serializations leave the cache as it was."""
+    cache = SerializationCache()
+    cache.serialize(place, store=False)
+    assert len(cache) == 0
+    cache.serialize(place)
+    assert len(cache) == 1
+
+
+def test_least_recently_used_entries_are_evicted(facade, place):
+    """The cache keeps at most maxsize entries, dropping the least recently used."""
+    owner, amenity = place.owner, place.amenities[0]
+    cache = SerializationCache(maxsize=2)
+    cache.serialize(owner)
+    cache.serialize(amenity)
+    cache.serialize(owner)
+    cache.serialize(place)
+    assert set(cache._entries) == {owner.id, place.id}
+
+    disabled = SerializationCache(maxsize=0)
+    disabled.serialize(owner)
+    assert len(disabled) == 0
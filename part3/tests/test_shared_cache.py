@@ -0,0 +1,250 @@
+"""
+Tests for the shared memory repository cache and the invalidation bus.
+"""
+import multiprocessing
+import os
+import socket
+import tempfile
+import threading
+import uuid
+from contextlib import suppress
+from multiprocessing.shared_memory import SharedMemory
+
+import pytest
+
+import config
+from app import create_app
+from app.persistence.caching_repository import ABSENT, MISSING, CachePolicy, CachingRepository
+from app.persistence.shared_cache import _HEADER_SIZE, _SEQUENCE, InvalidationBus, SharedMemoryCache
+
+fork = multiprocessing.get_context('fork')
+
+
+class Clock:
+    """A clock the tests move by hand."""
+
+    def __init__(self):
+        """Start at an arbitrary time."""
+        self.now = 1000.0
+
+    def __call__(self):
+        """Return the current time."""
+        return self.now
+
+
+@pytest.fixture
+def name():
+    """A unique segment name, unlinked after the test."""
+    name = f'hbnb-test-{os.getpid()}-{uuid.uuid4().hex[:8]}'
+    yield name
+    with suppress(FileNotFoundError):
+        segment = SharedMemory(name)
+        segment.close()
+        segment.unlink()
+    with suppress(FileNotFoundError):
+        os.unlink(os.path.join(tempfile.gettempdir(), f'{name}.lock'))
+
+
+def test_set_get_discard(name):
+    """Values, cached misses and expiry behave like the LRUCache."""
+    clock = Clock()
+    cache = SharedMemoryCache(name, 16, 256, clock=clock)
+    cache.set('a', {'title': 'Loft'}, ttl=10)
+    cache.set('b', ABSENT, ttl=5)
+    cache.set('c', 'forever')
+    assert cache.get('a') == {'title': 'Loft'}
+    assert cache.get('b') is ABSENT
+    assert cache.get('missing') is MISSING
+    assert len(cache) == 3
+
+    clock.now += 6
+    assert cache.get('b') is MISSING
+    assert cache.get('a') == {'title': 'Loft'}
+    clock.now += 5
+    assert cache.get('a') is MISSING
+    assert cache.get('c') == 'forever'
+
+    cache.discard('c')
+    assert cache.get('c') is MISSING
+    cache.set('d', 1)
+    cache.clear()
+    assert len(cache) == 0
+    cache.close()
+
+
+def test_generation_guards_racing_lookups(name):
+    """A value read before a removal is not stored after it."""
+    cache = SharedMemoryCache(name, 16, 256)
+    generation = cache.generation
+    cache.discard('a')
+    assert cache.generation == generation + 1
+    cache.set('a', 'stale', generation=generation)
+    assert cache.get('a') is MISSING
+    cache.set('a', 'fresh', generation=cache.generation)
+    assert cache.get('a') == 'fresh'
+    cache.close()
+
+
+def test_full_probes_replace_the_entry_closest_to_expiring(name):
+    """With every slot of a key taken, the entry expiring first is replaced."""
+    cache = SharedMemoryCache(name, 4, 256, probes=4)
+    for i, ttl in enumerate([50, 10, 30, 40]):
+        cache.set(f'k{i}', i, ttl=ttl)
+    cache.set('new', 'value', ttl=60)
+    assert cache.get('new') == 'value'
+    assert cache.get('k1') is MISSING
+    assert [cache.get(f'k{i}') for i in (0, 2, 3)] == [0, 2, 3]
+    cache.close()
+
+
+def test_unstorable_values(name):
+    """Oversized values are skipped; values that cannot be pickled are an error."""
+    cache = SharedMemoryCache(name, 16, 256)
+    cache.set('big', 'x' * 1000)
+    assert cache.get('big') is MISSING
+    with pytest.raises(ValueError):
+        cache.set('lock', threading.Lock())
+    with pytest.raises(ValueError):
+        SharedMemoryCache(name, 32, 256)
+    cache.close()
+
+
+def test_reader_skips_a_slot_being_written(name):
+    """A slot whose sequence number is odd reads as missing (seqlock)."""
+    cache = SharedMemoryCache(name, 1, 256, probes=1)
+    cache.set('a', 'value')
+    sequence = _SEQUENCE.unpack_from(cache._buf, _HEADER_SIZE)[0]
+    assert sequence % 2 == 0
+    _SEQUENCE.pack_into(cache._buf, _HEADER_SIZE, sequence + 1)
+    assert cache.get('a') is MISSING
+    _SEQUENCE.pack_into(cache._buf, _HEADER_SIZE, sequence + 2)
+    assert cache.get('a') == 'value'
+    cache.close()
+
+
+def test_concurrent_rewrites_never_return_torn_values(name):
+    """Lookups racing with rewrites of the same slot see whole values or nothing."""
+    cache = SharedMemoryCache(name, 1, 512, probes=1)
+    values = ['short', 'a much longer value ' * 10, {'title': 'Loft', 'price': 80.0}]
+    done = threading.Event()
+
+    def rewrite():
+        for i in range(5000):
+            cache.set('a', values[i % len(values)])
+        done.set()
+
+    writer = threading.Thread(target=rewrite)
+    writer.start()
+    seen = 0
+    while not done.is_set():
+        value = cache.get('a')
+        assert value is MISSING or value in values
+        seen += value is not MISSING
+    writer.join()
+    assert seen
+    cache.close()
+
+
+def _write_keys(name, prefix, count):
+    """Child process: store keys in a shared cache."""
+    cache = SharedMemoryCache(name, 512, 256)
+    for i in range(count):
+        cache.set(f'{prefix}{i}', (prefix, i))
+    cache.discard('parent')
+    cache.close()
+
+
+def test_processes_share_entries_and_serialize_writers(name):
+    """Entries written by other processes are visible, and concurrent writers do not corrupt the table."""
+    cache = SharedMemoryCache(name, 512, 256)
+    cache.set('parent', 'value')
+    children = [fork.Process(target=_write_keys, args=(name, prefix, 100)) for prefix in 'abc']
+    for child in children:
+        child.start()
+    for child in children:
+        child.join()
+        assert child.exitcode == 0
+
+    assert cache.get('parent') is MISSING
+    stored = [cache.get(f'{prefix}{i}') for prefix in 'abc' for i in range(100)]
+    assert all(value is MISSING or value == (key[0], int(key[1:]))
+               for value, key in zip(stored, [f'{p}{i}' for p in 'abc' for i in range(100)]))
+    assert sum(value is not MISSING for value in stored) == len(cache)
+    assert len(cache) > 250
+    cache.close()
+
+
+def test_bus_delivers_invalidations_to_other_processes(tmp_path):
+    """Published invalidations reach every other socket; dead sockets are removed."""
+    received = []
+    arrived = threading.Event()
+
+    def handler(entity, obj_id):
+        received.append((entity, obj_id))
+        if len(received) == 2:
+            arrived.set()
+
+    listener = InvalidationBus(str(tmp_path), handler)
+    publisher = InvalidationBus(str(tmp_path), lambda entity, obj_id: None)
+    dead = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    dead.bind(str(tmp_path / 'dead.sock'))
+    dead.close()
+
+    publisher.publish('Place', 'abc')
+    publisher.publish('User')
+    assert arrived.wait(5)
+    assert received == [('Place', 'abc'), ('User', None)]
+    assert not (tmp_path / 'dead.sock').exists()
+    listener.close()
+    publisher.close()
+
+
+def test_shared_backend_is_refused_for_in_memory_repositories(monkeypatch):
+    """The in-memory facade holds live objects, which the shared table cannot serve."""
+    monkeypatch.setattr(config.Config, 'REPOSITORY_CACHE_ENABLED', True)
+    monkeypatch.setattr(config.Config, 'REPOSITORY_CACHE_BACKEND', 'shared')
+    with pytest.raises(ValueError, match='cannot re-attach copies'):
+        create_app('testing')
+
+
+def test_sql_repository_behind_the_shared_cache(name, tmp_path):
+    """Copies cached by one session are re-attached to the next one without a query."""
+    from app.models.base import db
+    from app.persistence.query_counter import QueryCounter
+    from benchmarks.data import generate
+    from benchmarks.sql_backend import SQLStore
+
+    app = create_app('testing')
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp_path / "cache.db"}'
+    db.init_app(app)
+    with app.app_context():
+        store = SQLStore()
+        store.load(generate(users=3, places=3, reviews=0))
+        place_id = store.place_repo.get_all()[0].id
+        db.session.remove()
+
+    cache = SharedMemoryCache(name, 16, 4096)
+    repo = CachingRepository(store.place_repo, 'Place', CachePolicy(60, 16, 5), cache)
+    titles = []
+    for _ in range(2):
+        with app.test_request_context():
+            with QueryCounter() as counter:
+                place = repo.get(place_id)
+                titles.append(place.title)
+            assert place in db.session
+            queries = counter.count
+            db.session.remove()
+    assert queries == 0
+    assert titles[0] == titles[1]
+    assert (repo.hits, repo.misses) == (1, 1)
+
+    repo.invalidate(place_id)
+    with app.test_request_context():
+        assert repo.get('missing') is None
+        assert cache.get('missing') is ABSENT
+        assert repo.get(place_id).title == titles[0]
+        db.session.remove()
+    assert repo.misses == 3
+    with app.app_context():
+        db.engine.dispose()
+    cache.close()
@@ -0,0 +1,150 @@
+"""
+Tests for BM25 full-text search over places and their reviews.
+"""
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from app.persistence.text import B, K1, idf, tokenize
+
+WORDS = ['harbor', 'harvest', 'garden', 'quiet', 'bright', 'loft', 'cabin', 'lake', 'view', 'cosy', 'station', 'pool']
+
+
+@pytest.fixture
+def owner(facade):
+    """The owner of the places."""
+    return facade.create_user({'first_name': 'Ada', 'last_name': 'Lovelace', 'email': 'ada@example.com'})
+
+
+@pytest.fixture
+def guest(facade):
+    """The author of the reviews."""
+    return facade.create_user({'first_name': 'Alan', 'last_name': 'Turing', 'email': 'alan@example.com'})
+
+
+def new_place(facade, owner, title, description=''):
+    """Create a place with a title and description."""
+    return facade.create_place({'title': title, 'description': description, 'price': 100.0, 'latitude': 0.0,
+                                'longitude': 0.0, 'owner_id': owner.id, 'amenities': []})
+
+
+def found(facade, query, limit=10):
+    """Return the IDs of the places matching a query, best first."""
+    return [place.id for place, _ in facade.search_places_text(query, limit)]
+
+
+def bm25(facade, query):
+    """Score every place document for a query by brute force."""
+    documents = {}
+    for place in facade.get_all_places():
+        counts = Counter()
+        for term in tokenize(place.title):
+            counts[term] += 3
+        counts.update(tokenize(place.description))
+        for review in facade.get_reviews_by_place(place.id):
+            counts.update(tokenize(review.text))
+        if counts:
+            documents[place.id] = counts
+    average = sum(sum(counts.values()) for counts in documents.values()) / len(documents)
+    vocabulary = {term for counts in documents.values() for term in counts}
+
+    def score(counts, term):
+        frequency = sum(1 for other in documents.values() if term in other)
+        if not counts[term]:
+            return 0.0
+        norm = K1 * (1 - B + B * sum(counts.values()) / average)
+        return idf(len(documents), frequency) * counts[term] * (K1 + 1) / (counts[term] + norm)
+
+    terms = list(dict.fromkeys(tokenize(query)))
+    *exact, last = terms
+    expansions = [term for term in vocabulary if term.startswith(last)] if len(last) >= 3 else [last]
+    scores = {}
+    for doc_id, counts in documents.items():
+        total = sum(score(counts, term) for term in exact) + max((score(counts, term) for term in expansions),
+                                                                 default=0.0)
+        if total > 0:
+            scores[doc_id] = total
+    return scores
+
+
+def test_retitled_place_loses_its_old_terms(facade, owner):
+    """Only the current title and description are searchable."""
+    place = new_place(facade, owner, 'Harbor loft', 'Bright rooms')
+    facade.update_place(place.id, {'title': 'Mountain cabin', 'description': 'Quiet rooms'})
+    assert found(facade, 'harbor') == []
+    assert found(facade, 'bright') == []
+    assert found(facade, 'cabin') == [place.id]
+    assert found(facade, 'quiet') == [place.id]
+
+
+def test_ranking(facade, owner):
+    """Titles outweigh descriptions, and repeated terms outrank single ones."""
+    in_title = new_place(facade, owner, 'Garden flat', 'Near the station')
+    in_description = new_place(facade, owner, 'Flat near the station', 'Has a garden')
+    twice = new_place(facade, owner, 'Pool house', 'Pool, pool and a garden view')
+    once = new_place(facade, owner, 'Pool side', 'A lake view')
+    new_place(facade, owner, 'Unrelated', 'Nothing to see')
+
+    ranked = found(facade, 'garden')
+    assert ranked.index(in_title.id) < ranked.index(in_description.id)
+    assert found(facade, 'pool') == [twice.id, once.id]
+
+
+def test_reviews_contribute_to_their_place(facade, owner, guest):
+    """Review text finds its place until the review changes or is deleted."""
+    place = new_place(facade, owner, 'Loft', 'Bright')
+    review = facade.create_review({'text': 'Wonderful sunset terrace', 'rating': 5,
+                                   'user_id': guest.id, 'place_id': place.id})
+    assert found(facade, 'terrace') == [place.id]
+
+    facade.update_review(review.id, {'text': 'Wonderful breakfast'})
+    assert found(facade, 'terrace') == []
+    assert found(facade, 'breakfast') == [place.id]
+
+    facade.delete_review(review.id)
+    assert found(facade, 'breakfast') == []
+    assert found(facade, 'loft') == [place.id]
+
+
+def test_last_word_matches_as_a_prefix(facade, owner):
+    """A partly typed last word matches the terms it starts, accents aside."""
+    harbor = new_place(facade, owner, 'Harbor view')
+    cafe = new_place(facade, owner, 'Café du port')
+    assert found(facade, 'harb') == [harbor.id]
+    assert found(facade, 'ha') == []
+    assert found(facade, 'cafe') == [cafe.id]
+    assert found(facade, 'CAFÉ') == [cafe.id]
+
+
+@pytest.mark.parametrize('query, limit', [
+    ('harbor', 5), ('garden quiet', 3), ('lake view ha', 4), ('cosy loft station', 1), ('pool bright gar', 20)
+])
+def test_scores_match_brute_force_bm25(facade, owner, guest, query, limit):
+    """The best places and their scores are those of a plain BM25 computation."""
+    rng = random.Random(11)
+    places = [new_place(facade, owner, ' '.join(rng.choices(WORDS, k=rng.randint(1, 3))),
+                        ' '.join(rng.choices(WORDS, k=rng.randint(0, 12)))) for _ in range(60)]
+    for _ in range(80):
+        facade.create_review({'text': ' '.join(rng.choices(WORDS, k=rng.randint(1, 6))), 'rating': 3,
+                              'user_id': guest.id, 'place_id': rng.choice(places).id})
+
+    expected = bm25(facade, query)
+    results = facade.search_places_text(query, limit)
+    best = sorted(expected.values(), reverse=True)[:limit]
+    assert [score for _, score in results] == pytest.approx(best)
+    for place, score in results:
+        assert math.isclose(score, expected[place.id])
+
+
+def test_search_endpoint(client, facade, owner):
+    """The endpoint returns scores, best first, and rejects queries without words."""
+    first = new_place(facade, owner, 'Lake cabin', 'Lake view')
+    second = new_place(facade, owner, 'Town flat', 'Lake nearby')
+    response = client.get('/api/v1/places/search?q=lake')
+    assert response.status_code == 200
+    places = response.get_json()
+    assert [place['id'] for place in places] == [first.id, second.id]
+    assert places[0]['score'] > places[1]['score'] > 0
+    assert client.get('/api/v1/places/search?q=%20!!').status_code == 400